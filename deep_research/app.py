@@ -1,37 +1,59 @@
 import os
+import re
+import sys
+import uuid
+import sqlite3
 import streamlit as st
-from typing import TypedDict, List, Annotated
+from typing import Callable, Dict, Optional, Tuple, TypedDict, List, Annotated
 import operator
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from llm_cache import get_response_cache
 
 # Load environment variables
 load_dotenv()
 
+MAX_RESEARCH_AREAS = int(os.getenv("DEEP_RESEARCH_MAX_AREAS", "6"))
+CHECKPOINT_DB = os.getenv("DEEP_RESEARCH_CHECKPOINT_DB", "deep_research_checkpoints.sqlite")
+
 # --- State Definition ---
 class ResearchState(TypedDict):
     task: str
     plan: str
-    content: List[str]
+    # Parallel researcher branches each return one section; the reducer concatenates them
+    content: Annotated[List[str], operator.add]
     draft: str
     critique: str
     revision_count: int
     max_revisions: int
 
+class AreaState(TypedDict):
+    task: str
+    area: str
+
 # --- Nodes ---
+def make_llm(temperature: float) -> ChatOpenAI:
+    """Every node talks to the same model; calls the cache policy allows are served from disk"""
+    cache = get_response_cache()
+    return ChatOpenAI(
+        model="deepseek/deepseek-chat",
+        temperature=temperature,
+        base_url="https://openrouter.ai/api/v1",
+        api_key=os.getenv("OPENAI_API_KEY"),
+        cache=cache if cache.cacheable(temperature) else False
+    )
 
 def planner_node(state: ResearchState):
     print("--- PLANNER ---")
-    llm = ChatOpenAI(
-        model="deepseek/deepseek-chat", 
-        temperature=0,
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = make_llm(temperature=0)
     
     messages = [
         SystemMessage(content="You are a Research Planner. Given a topic, create a concise step-by-step research plan. Focus on 3-5 key areas to investigate."),
@@ -41,26 +63,21 @@ def planner_node(state: ResearchState):
     response = llm.invoke(messages)
     return {"plan": response.content}
 
-def researcher_node(state: ResearchState):
-    print("--- RESEARCHER ---")
+def researcher_node(state: AreaState):
+    print(f"--- RESEARCHER: {state['area'].splitlines()[0][:60]} ---")
     # In a real production app, we would use a Search Tool here.
     # For this demo, we will simulate research using the LLM's internal knowledge 
     # but structured as if it found external info. 
     # This ensures it runs without extra API keys for search if the user doesn't have them,
     # but we could easily swap this for Tavily/Serper.
     
-    llm = ChatOpenAI(
-        model="deepseek/deepseek-chat", 
-        temperature=0.2,
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = make_llm(temperature=0.2)
     
     prompt = f"""You are a Research Specialist. 
-    Execute the following research plan:
-    {state['plan']}
+    Investigate this area of a research plan on "{state['task']}":
+    {state['area']}
     
-    For each point, provide detailed, factual information. 
+    Provide detailed, factual information. 
     If you were using a search engine, you would look for recent data. 
     Since you are an LLM, use your internal knowledge to provide the most accurate and comprehensive info you have.
     """
@@ -68,18 +85,12 @@ def researcher_node(state: ResearchState):
     messages = [HumanMessage(content=prompt)]
     response = llm.invoke(messages)
     
-    # Append to existing content
-    current_content = state.get('content', [])
+    # One section per area; the state reducer merges the parallel branches
     return {"content": [response.content]}
 
 def writer_node(state: ResearchState):
     print("--- WRITER ---")
-    llm = ChatOpenAI(
-        model="deepseek/deepseek-chat", 
-        temperature=0.5,
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = make_llm(temperature=0.5)
     
     content_text = "\n\n".join(state['content'])
     
@@ -94,16 +105,11 @@ def writer_node(state: ResearchState):
     
     messages = [HumanMessage(content=prompt)]
     response = llm.invoke(messages)
-    return {"draft": response.content, "revision_count": state.get("revision_count", 0) + 1}
+    return {"draft": response.content}
 
 def reviewer_node(state: ResearchState):
     print("--- REVIEWER ---")
-    llm = ChatOpenAI(
-        model="deepseek/deepseek-chat", 
-        temperature=0,
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = make_llm(temperature=0)
     
     prompt = f"""You are an Editor in Chief. 
     Review the following draft for clarity, depth, and structure.
@@ -121,12 +127,7 @@ def reviewer_node(state: ResearchState):
 
 def reviser_node(state: ResearchState):
     print("--- REVISER ---")
-    llm = ChatOpenAI(
-        model="deepseek/deepseek-chat", 
-        temperature=0.5,
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = make_llm(temperature=0.5)
     
     prompt = f"""You are a Senior Writer. 
     Revise your draft based on the editor's critique.
@@ -142,10 +143,35 @@ def reviser_node(state: ResearchState):
     
     messages = [HumanMessage(content=prompt)]
     response = llm.invoke(messages)
-    return {"draft": response.content}
+    return {"draft": response.content, "revision_count": state.get("revision_count", 0) + 1}
 
 # --- Conditional Logic ---
+_PLAN_ITEM_RE = re.compile(r"^\s{0,3}(?:#{1,6}\s*)?(?:\*\*)?(?:\d+[.)]|step\s+\d+[:.)]?)\s*", re.IGNORECASE)
+
+def parse_plan_areas(plan: str, max_areas: int = MAX_RESEARCH_AREAS) -> List[str]:
+    """Split a numbered plan into its top-level areas (with their sub-points); the whole plan if it has no list"""
+    areas: List[str] = []
+    for line in plan.splitlines():
+        if _PLAN_ITEM_RE.match(line):
+            areas.append(line.strip())
+        elif areas and line.strip():
+            areas[-1] += "\n" + line.rstrip()
+    if len(areas) < 2:
+        return [plan.strip()]
+    if len(areas) > max_areas:
+        # Fold the overflow into the last branch rather than dropping it
+        areas = areas[:max_areas - 1] + ["\n".join(areas[max_areas - 1:])]
+    return areas
+
+def dispatch_research(state: ResearchState):
+    """Fan out: one researcher branch per plan area, all run in the same step"""
+    return [Send("researcher", {"task": state["task"], "area": area}) for area in parse_plan_areas(state["plan"])]
+
 def should_continue(state: ResearchState):
+    """
+    revision_count counts reviser passes (the writer's first draft is not one), so the loop ends
+    once the reviewer approves or has reviewed `max_revisions` revisions.
+    """
     critique = state['critique']
     count = state['revision_count']
     max_revs = state['max_revisions']
@@ -155,7 +181,12 @@ def should_continue(state: ResearchState):
     return "revise"
 
 # --- Graph Construction ---
-def build_graph():
+def create_checkpointer(db_file: str = CHECKPOINT_DB) -> SqliteSaver:
+    """Every completed step is persisted per thread_id, so interrupted runs can resume"""
+    # Parallel researcher branches write from worker threads; SqliteSaver serializes access itself
+    return SqliteSaver(sqlite3.connect(db_file, check_same_thread=False))
+
+def build_graph(checkpointer: Optional[SqliteSaver] = None):
     workflow = StateGraph(ResearchState)
     
     workflow.add_node("planner", planner_node)
@@ -166,7 +197,7 @@ def build_graph():
     
     workflow.set_entry_point("planner")
     
-    workflow.add_edge("planner", "researcher")
+    workflow.add_conditional_edges("planner", dispatch_research, ["researcher"])
     workflow.add_edge("researcher", "writer")
     workflow.add_edge("writer", "reviewer")
     
@@ -181,9 +212,75 @@ def build_graph():
     
     workflow.add_edge("reviser", "reviewer")
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+# --- Execution ---
+STREAMED_NODES = ("writer", "reviser")
+
+def run_research(graph, inputs: Optional[Dict], config: Optional[Dict] = None,
+                 on_step: Optional[Callable[[str, Dict], None]] = None,
+                 on_token: Optional[Callable[[str, str], None]] = None) -> ResearchState:
+    """
+    Run the workflow once and return its final state.
+    With a checkpointed graph, `config` carries the thread_id and `inputs=None` resumes that
+    thread from its last completed step.
+    `on_step(node, update)` fires as each node finishes; `on_token(node, text)` receives
+    the writer/reviser output token by token while it is generated.
+    """
+    final_state = dict(inputs or {})
+    for mode, chunk in graph.stream(inputs, config, stream_mode=["updates", "messages", "values"]):
+        if mode == "values":
+            # Full state after every step, reducers already applied
+            final_state = chunk
+        elif mode == "updates":
+            for node, update in chunk.items():
+                if on_step:
+                    on_step(node, update or {})
+        elif mode == "messages" and on_token:
+            message, metadata = chunk
+            node = metadata.get("langgraph_node")
+            if node in STREAMED_NODES and message.content:
+                on_token(node, message.content)
+    if config is not None and graph.checkpointer is not None:
+        final_state = graph.get_state(config).values
+    return final_state
+
+def prepare_run(graph, config: Dict, topic: str, max_revisions: int) -> Tuple[Optional[Dict], str]:
+    """
+    Decide how to (re)start the thread in `config`: (inputs for graph.stream, what is happening).
+    A new thread starts from the planner; an interrupted one resumes where it stopped; a finished,
+    unapproved one whose revision budget was raised goes back into the review loop with its
+    existing research and draft. Anything else is "done" and needs no LLM calls.
+    """
+    snapshot = graph.get_state(config)
+    state = snapshot.values
+    if not state:
+        return {"task": topic, "max_revisions": max_revisions, "revision_count": 0, "content": []}, "new"
+    if snapshot.next:
+        return None, "resume"
+    approved = "APPROVE" in state.get("critique", "")
+    if max_revisions != state.get("max_revisions") and max_revisions > state.get("revision_count", 0) and not approved:
+        # Written as if by the reviser, so the next step is the reviewer
+        graph.update_state(config, {"max_revisions": max_revisions}, as_node="reviser")
+        return None, "revise"
+    return None, "done"
 
 # --- Streamlit App ---
+@st.cache_resource(show_spinner=False)
+def get_graph():
+    """One compiled graph and checkpoint connection per server process"""
+    return build_graph(create_checkpointer())
+
+def render_llm_cache_stats(box):
+    stats = get_response_cache().stats()
+    box.caption(
+        f"{stats['entries']} responses cached · {stats['size_mb']:.1f}/{stats['max_mb']:.0f} MB · "
+        f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+    )
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
 def main():
     st.set_page_config(page_title="Deep Research Agent", layout="wide")
     st.title("🧠 Deep Research Agent")
@@ -193,56 +290,99 @@ def main():
         st.warning("⚠️ OPENAI_API_KEY not found in .env file.")
         st.stop()
         
+    if "run_id" not in st.session_state:
+        st.session_state.run_id = new_run_id()
+
     topic = st.text_input("Enter a research topic:", placeholder="e.g., The Future of AI Agents in Enterprise")
-    max_revisions = st.slider("Max Revisions", 1, 5, 2)
+    max_revisions = st.slider("Max Revisions", 1, 5, 2,
+                              help="How many times the reviser may rework the first draft if the reviewer does not approve it")
+
+    with st.sidebar:
+        st.subheader("Run")
+        st.session_state.run_id = st.text_input(
+            "Run ID", value=st.session_state.run_id,
+            help="Progress is checkpointed under this ID. Reuse it to resume an interrupted run, "
+                 "or raise Max Revisions to continue a finished run's review loop."
+        ).strip() or new_run_id()
+        if st.button("New Run"):
+            st.session_state.run_id = new_run_id()
+            st.rerun()
+
+        st.subheader("LLM Cache")
+        llm_cache = get_response_cache()
+        llm_cache.enabled = st.checkbox("Reuse identical LLM calls", value=llm_cache.enabled)
+        llm_cache.max_temperature = st.number_input(
+            "Cache calls up to temperature", min_value=0.0, max_value=1.0, step=0.1,
+            value=float(llm_cache.max_temperature), disabled=not llm_cache.enabled,
+            help="The planner and reviewer run at 0; the writers sample at 0.5 and are not cached by default."
+        )
+        cache_stats_box = st.empty()
+        render_llm_cache_stats(cache_stats_box)
+        if st.button("Clear LLM Cache"):
+            llm_cache.clear()
+            render_llm_cache_stats(cache_stats_box)
     
     if st.button("Start Deep Research"):
         if not topic:
             st.error("Please enter a topic.")
             return
             
-        graph = build_graph()
+        graph = get_graph()
+        config = {"configurable": {"thread_id": st.session_state.run_id}}
+        stored_topic = graph.get_state(config).values.get("task")
+        if stored_topic and stored_topic != topic:
+            # A run ID belongs to one topic; a new topic gets a fresh run
+            st.session_state.run_id = new_run_id()
+            config = {"configurable": {"thread_id": st.session_state.run_id}}
         
         status_container = st.container()
         result_container = st.container()
         
         with status_container:
-            st.info("🚀 Initializing Agent Workflow...")
-            
-            # Run the graph
-            inputs = {
-                "task": topic,
-                "max_revisions": max_revisions,
-                "revision_count": 0,
-                "content": []
-            }
+            inputs, run_mode = prepare_run(graph, config, topic, max_revisions)
+            run_id = st.session_state.run_id
+            st.info({
+                "new": f"🚀 Starting run `{run_id}`...",
+                "resume": f"♻️ Resuming run `{run_id}` from its last completed step...",
+                "revise": f"🔁 Continuing the review loop of run `{run_id}` (max revisions {max_revisions})...",
+                "done": f"📦 Run `{run_id}` is already complete; showing its saved report.",
+            }[run_mode])
             
-            # We'll stream the updates to show progress
+            with result_container:
+                report_placeholder = st.empty()
+            streamed = {"node": None, "text": ""}
+
+            def show_step(node: str, update: Dict):
+                if node in STREAMED_NODES:
+                    streamed["node"] = None  # the next pass starts a fresh draft
+                st.write(f"✅ Finished Step: **{node.upper()}**")
+                with st.expander(f"See {node} output"):
+                    st.json(update)
+
+            def show_token(node: str, text: str):
+                if streamed["node"] != node:
+                    streamed["node"], streamed["text"] = node, ""
+                streamed["text"] += text
+                report_placeholder.markdown(streamed["text"])
+
             try:
-                for output in graph.stream(inputs):
-                    for key, value in output.items():
-                        st.write(f"✅ Finished Step: **{key.upper()}**")
-                        with st.expander(f"See {key} output"):
-                            st.json(value)
-                            
-                # Get final state (simulated since stream yields partials)
-                # In a real app we'd capture the final output from the stream loop
-                
+                cache_before = (llm_cache.hits, llm_cache.misses)
+                if run_mode == "done":
+                    final_state = graph.get_state(config).values
+                else:
+                    final_state = run_research(graph, inputs, config, on_step=show_step, on_token=show_token)
                 st.success("Research Complete!")
-                
+                run_hits, run_misses = llm_cache.hits - cache_before[0], llm_cache.misses - cache_before[1]
+                if run_hits + run_misses:
+                    st.caption(f"⚡ {run_hits} of {run_hits + run_misses} cacheable LLM calls served from cache")
+                render_llm_cache_stats(cache_stats_box)
             except Exception as e:
                 st.error(f"Error: {str(e)}")
-                
-        # Since we can't easily get the final state from the simple stream loop above without logic,
-        # we'll just re-run or rely on the last output. 
-        # Actually, let's just grab the last 'draft' from the expanders or run invoke() instead of stream() for simplicity if we want just the result.
-        # But stream() is cooler. 
-        # Let's run invoke() to get the final artifact cleanly for the result container.
-        
-        with st.spinner("Finalizing report..."):
-            final_state = graph.invoke(inputs)
-            
+                st.info(f"Completed steps are saved. Click Start again with run ID `{run_id}` to resume.")
+                return
+
         with result_container:
+            report_placeholder.empty()
             st.divider()
             st.header("📄 Final Report")
             st.markdown(final_state['draft'])
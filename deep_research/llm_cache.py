@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration
+
+# --- Configuration ---
+LLM_CACHE_DB = os.getenv("DEEP_RESEARCH_LLM_CACHE_DB", "deep_research_llm_cache.sqlite")
+LLM_CACHE_TTL_HOURS = float(os.getenv("DEEP_RESEARCH_LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_MB = float(os.getenv("DEEP_RESEARCH_LLM_CACHE_MAX_MB", "100"))
+# Only calls at or below this temperature are cached; sampled output should stay fresh
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("DEEP_RESEARCH_LLM_CACHE_MAX_TEMPERATURE", "0"))
+
+class ResponseCache(BaseCache):
+    """
+    SQLite cache for chat model responses, shared by every graph node.
+    LangChain hands us the serialized messages (`prompt`) and the model parameters
+    (`llm_string`, which includes the model name and temperature); the key is a hash of both.
+    Entries expire after `ttl_hours`; past `max_mb` the least recently used are evicted.
+    Whether a call is cached at all is decided per model through `cacheable(temperature)`.
+    """
+
+    def __init__(self, db_file: str = LLM_CACHE_DB, ttl_hours: float = LLM_CACHE_TTL_HOURS,
+                 max_mb: float = LLM_CACHE_MAX_MB, max_temperature: float = LLM_CACHE_MAX_TEMPERATURE):
+        self.db_file = db_file
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_temperature = max_temperature
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self.ensure_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ensure_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)")
+
+    def cacheable(self, temperature: float) -> bool:
+        return self.enabled and temperature <= self.max_temperature
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        now = time.time()
+        key = self._key(prompt, llm_string)
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._count(hit=True)
+                return [ChatGeneration(message=message) for message in messages_from_dict(json.loads(row[0]))]
+            if row:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self._count(hit=False)
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        # Chat models only: store the messages as plain dicts rather than pickled/revived objects
+        payload = json.dumps(messages_to_dict([generation.message for generation in return_val]))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), payload, len(payload), now, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk entries from least recently used and drop them until we are under budget
+        excess = total - self.max_bytes
+        doomed = []
+        for rowid, size in conn.execute("SELECT rowid, size FROM llm_cache ORDER BY last_access"):
+            doomed.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM llm_cache WHERE rowid = ?", doomed)
+
+    def clear(self, **kwargs: Any):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_mb": size / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """One cache per process; it lives in this module so it survives Streamlit reruns of the app script"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
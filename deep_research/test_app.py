@@ -0,0 +1,84 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("langgraph.checkpoint.sqlite")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import app
+
+class FakeLLM:
+    """Answers every node by its prompt; the reviewer approves once `approve_after` reviews have happened"""
+
+    def __init__(self):
+        self.calls = []
+        self.approve_after = None
+
+    def invoke(self, messages):
+        text = " ".join(message.content for message in messages)
+        if "Research Planner" in text:
+            node, reply = "planner", "1. Market size\n2. Key players"
+        elif "Research Specialist" in text:
+            node, reply = "researcher", "findings"
+        elif "Senior Technical Writer" in text:
+            node, reply = "writer", "first draft"
+        elif "Editor in Chief" in text:
+            node = "reviewer"
+            reviews = self.calls.count("reviewer") + 1
+            reply = "APPROVE" if self.approve_after and reviews >= self.approve_after else "Needs more depth"
+        else:
+            node, reply = "reviser", f"revision {self.calls.count('reviser') + 1}"
+        self.calls.append(node)
+        return SimpleNamespace(content=reply)
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(app, "make_llm", lambda temperature: fake)
+    return fake
+
+def inputs(max_revisions):
+    return {"task": "AI agents", "max_revisions": max_revisions, "revision_count": 0, "content": []}
+
+def test_should_continue():
+    assert app.should_continue({"critique": "APPROVE", "revision_count": 0, "max_revisions": 2}) == "end"
+    assert app.should_continue({"critique": "more", "revision_count": 1, "max_revisions": 2}) == "revise"
+    assert app.should_continue({"critique": "more", "revision_count": 2, "max_revisions": 2}) == "end"
+
+@pytest.mark.parametrize("max_revisions", [1, 2, 3])
+def test_unapproved_draft_stops_after_max_revisions(llm, max_revisions):
+    final = app.run_research(app.build_graph(), inputs(max_revisions))
+    calls = llm.calls
+
+    assert calls.count("writer") == 1
+    assert calls.count("reviser") == max_revisions
+    assert calls.count("reviewer") == max_revisions + 1
+    assert final["revision_count"] == max_revisions
+    assert final["draft"] == f"revision {max_revisions}"
+
+def test_approval_ends_the_loop_early(llm):
+    llm.approve_after = 2
+    final = app.run_research(app.build_graph(), inputs(5))
+    assert llm.calls.count("reviser") == 1
+    assert final["revision_count"] == 1
+    assert final["critique"] == "APPROVE"
+
+def test_raising_max_revisions_continues_a_finished_run(llm):
+    graph = app.build_graph(app.create_checkpointer(":memory:"))
+    config = {"configurable": {"thread_id": "run-1"}}
+
+    first, mode = app.prepare_run(graph, config, "AI agents", 1)
+    assert mode == "new"
+    assert app.run_research(graph, first, config)["revision_count"] == 1
+    assert app.prepare_run(graph, config, "AI agents", 1) == (None, "done")
+
+    llm.calls.clear()
+    assert app.prepare_run(graph, config, "AI agents", 3) == (None, "revise")
+    final = app.run_research(graph, None, config)
+    assert final["revision_count"] == 3
+    # Only the review loop ran again
+    assert set(llm.calls) == {"reviewer", "reviser"}
+    assert llm.calls.count("reviser") == 2
@@ -1,17 +1,23 @@
 import streamlit as st
-import requests
-from agno.agent import Agent
 from agno.tools.firecrawl import FirecrawlTools
-from agno.models.openai import OpenAIChat
-from firecrawl import FirecrawlApp
-from pydantic import BaseModel, Field
-from typing import List
-from composio_phidata import Action, ComposioToolSet
-import json
+from typing import List, Optional
 import os
-import pandas as pd
 from dotenv import load_dotenv, set_key
 import pathlib
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from extract_cache import ExtractCache
+from lead_store import FRESHNESS_HOURS, LeadStore
+from lead_table import build_lead_table, csv_file, parquet_bytes, to_records
+from quora_parser import MIN_PARSE_CONFIDENCE
+from pipeline import DescriptionMemo, create_prompt_transformation_agent, search_for_urls, transform_description
+from relevance import MIN_RELEVANCE, rank_leads
+from search_client import SearchError
+from sheets_export import ComposioSheetsExecutor, LocalSheetsStub, SheetsExporter
+from extraction import (
+    BATCH_SHARD_SIZE, EXTRACT_TIMEOUT_SECONDS, EXTRACT_WORKERS, extract_batched, extract_concurrently
+)
 
 # Get the absolute path to the .env file
 env_path = pathlib.Path(os.path.join(os.getcwd(), '.env'))
@@ -19,163 +25,101 @@ env_path = pathlib.Path(os.path.join(os.getcwd(), '.env'))
 # Load environment variables from .env file
 load_dotenv(dotenv_path=env_path)
 
-class QuoraUserInteractionSchema(BaseModel):
-    username: str = Field(description="The username of the user who posted the question or answer")
-    bio: str = Field(description="The bio or description of the user")
-    post_type: str = Field(description="The type of post, either 'question' or 'answer'")
-    timestamp: str = Field(description="When the question or answer was posted")
-    upvotes: int = Field(default=0, description="Number of upvotes received")
-    links: List[str] = Field(default_factory=list, description="Any links included in the post")
+# --- Process-wide resources (built once, shared across reruns and sessions) ---
+@st.cache_resource(show_spinner=False)
+def get_extract_cache() -> ExtractCache:
+    """One cache per server process, so hit/miss counters survive Streamlit reruns"""
+    return ExtractCache()
+
+@st.cache_resource(show_spinner=False)
+def get_lead_store() -> LeadStore:
+    return LeadStore()
+
+@st.cache_resource(show_spinner=False)
+def get_transformation_agent(openai_api_key: str):
+    return create_prompt_transformation_agent(openai_api_key)
+
+@st.cache_resource(show_spinner=False)
+def get_description_memo() -> DescriptionMemo:
+    return DescriptionMemo()
 
-class QuoraPageSchema(BaseModel):
-    interactions: List[QuoraUserInteractionSchema] = Field(description="List of all user interactions (questions and answers) on the page")
+@st.cache_resource(show_spinner=False)
+def get_composio_executor(composio_api_key: str) -> ComposioSheetsExecutor:
+    """One Composio toolset per key instead of one per export"""
+    return ComposioSheetsExecutor(composio_api_key)
 
-def search_for_urls(company_description: str, firecrawl_api_key: str, num_links: int) -> List[str]:
-    url = "https://api.firecrawl.dev/v1/search"
-    headers = {
-        "Authorization": f"Bearer {firecrawl_api_key}",
-        "Content-Type": "application/json"
-    }
-    query1 = f"quora websites where people are looking for {company_description} services"
-    payload = {
-        "query": query1,
-        "limit": num_links,
-        "lang": "en",
-        "location": "United States",
-        "timeout": 60000,
-    }
-    response = requests.post(url, json=payload, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("success"):
-            results = data.get("data", [])
-            return [result["url"] for result in results]
-    return []
+@st.cache_resource(show_spinner=False)
+def get_sheets_stub() -> LocalSheetsStub:
+    return LocalSheetsStub()
 
-def extract_user_info_from_urls(urls: List[str], firecrawl_api_key: str) -> List[dict]:
+def render_cache_stats(box):
+    stats = get_extract_cache().stats()
+    box.caption(
+        f"{stats['entries']} pages cached · {stats['size_mb']:.1f}/{stats['max_mb']:.0f} MB · "
+        f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+    )
+
+def extract_user_info_from_urls(urls: List[str], firecrawl_api_key: str, max_workers: int = EXTRACT_WORKERS,
+                                timeout: float = EXTRACT_TIMEOUT_SECONDS, batch: bool = False,
+                                shard_size: int = BATCH_SHARD_SIZE, cache: Optional[ExtractCache] = None,
+                                lead_store: Optional[LeadStore] = None,
+                                parse_threshold: Optional[float] = None) -> List[dict]:
     user_info_list = []
-    firecrawl_app = FirecrawlApp(api_key=firecrawl_api_key)
-    
-    try:
-        for url in urls:
-            st.write(f"🔍 Extracting from: {url}")
-            response = firecrawl_app.extract(
-                urls=[url],
-                prompt="""
-                Extract information about all users who have posted questions or answers on this Quora page.
-                For each user, extract their username, bio, the type of post (question or answer), 
-                when it was posted, number of upvotes, and any links they included.
-                """,
-                schema=QuoraPageSchema.model_json_schema()
-            )
-            
-            # Check if response is object or dict
-            if hasattr(response, 'success'):
-                success = response.success
-                data = response.data
-            else:
-                success = response.get('success')
-                data = response.get('data', response)
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return user_info_list
+    if batch:
+        shards = -(-len(urls) // shard_size)
+        progress = st.progress(0.0, text=f"Submitting {len(urls)} pages as {shards} batch extract job(s)...")
+        results = extract_batched(urls, firecrawl_api_key, shard_size, timeout, cache,
+                                  parse_threshold=parse_threshold)
+    else:
+        progress = st.progress(0.0, text=f"Extracting {len(urls)} pages with {max_workers} workers...")
+        results = extract_concurrently(urls, firecrawl_api_key, max_workers, timeout, cache,
+                                       parse_threshold=parse_threshold)
 
-            if success or data:
-                extracted_data = data
-                # st.write(f"Debug Raw Data: {str(extracted_data)[:500]}") # Uncomment if needed
-                if 'interactions' in extracted_data:
-                    count = len(extracted_data['interactions'])
-                    st.write(f"✅ Found {count} interactions")
-                    for interaction in extracted_data['interactions']:
-                        user_info = {
-                            'url': url,
-                            'username': interaction.get('username', 'Unknown'),
-                            'bio': interaction.get('bio', 'No bio available'),
-                            'post_type': interaction.get('post_type', 'Unknown'),
-                            'timestamp': interaction.get('timestamp', 'Unknown'),
-                            'upvotes': interaction.get('upvotes', 0),
-                            'links': interaction.get('links', [])
-                        }
-                        user_info_list.append(user_info)
-    except Exception as e:
-        st.error(f"Error extracting user info: {str(e)}")
-    
+    # Each page is reported as soon as its extraction (or its batch job) finishes
+    parsed_pages = 0
+    for finished, result in enumerate(results, start=1):
+        if result["error"]:
+            st.error(f"❌ {result['url']}: {result['error']}")
+        elif result.get("cached"):
+            st.write(f"⚡ {len(result['user_info'])} interactions from cache for {result['url']}")
+            user_info_list.extend(result["user_info"])
+        elif result.get("method") == "parsed":
+            parsed_pages += 1
+            st.write(f"🧩 Parsed {len(result['user_info'])} interactions on {result['url']} without the LLM "
+                     f"(confidence {result['confidence']:.2f}, {result['seconds']:.1f}s)")
+        else:
+            st.write(f"✅ Found {len(result['user_info'])} interactions on {result['url']} ({result['seconds']:.1f}s)")
+        if not result["error"] and not result.get("cached"):
+            user_info_list.extend(result["user_info"])
+            # Empty pages are usually a failed extraction; leave them due for a re-crawl
+            if lead_store is not None and result["user_info"]:
+                lead_store.record_crawl(result["url"], len(result["user_info"]))
+        progress.progress(finished / len(urls), text=f"Extracted {finished}/{len(urls)} pages")
+
+    if parse_threshold is not None:
+        st.caption(f"🧩 {parsed_pages}/{len(urls)} pages parsed locally without LLM extraction")
     return user_info_list
 
 def format_user_info_to_flattened_json(user_info_list: List[dict]) -> List[dict]:
-    flattened_data = []
-    
-    for user_info in user_info_list:
-        flattened_user = {
-            'url': user_info.get('url', ''),
-            'username': user_info.get('username', ''),
-            'bio': user_info.get('bio', ''),
-            'post_type': user_info.get('post_type', ''),
-            'timestamp': user_info.get('timestamp', ''),
-            'upvotes': user_info.get('upvotes', 0),
-            'links': ', '.join(user_info.get('links', [])),
-        }
-        flattened_data.append(flattened_user)
-    
-    return flattened_data
+    return to_records(build_lead_table(user_info_list))
 
-def create_google_sheets_agent(composio_api_key: str, openai_api_key: str) -> Agent:
-    composio_tools = ComposioToolSet(
-        api_key=composio_api_key,
-        actions=[Action.GOOGLE_SHEETS_CREATE]
-    )
-    
-    base_url = None
-    if openai_api_key.startswith("sk-or-"):
-        base_url = "https://openrouter.ai/api/v1"
-    
-    return Agent(
-        model=OpenAIChat(id="deepseek/deepseek-chat", api_key=openai_api_key, base_url=base_url, max_tokens=1024),
-        tools=[composio_tools],
-        markdown=True
-    )
+def get_sheets_executor(composio_api_key: str, use_stub: bool = False):
+    """Composio in production; the in-memory stub keeps its sheets across Streamlit reruns"""
+    return get_sheets_stub() if use_stub else get_composio_executor(composio_api_key)
 
-def write_to_google_sheets(flattened_data: List[dict], composio_api_key: str, openai_api_key: str) -> str:
+def write_to_google_sheets(flattened_data: List[dict], composio_api_key: str, campaign: str,
+                           use_stub: bool = False) -> str:
+    """Create or incrementally update the campaign's sheet directly; no LLM is involved"""
     if not flattened_data:
         return ""
-    
-    agent = create_google_sheets_agent(composio_api_key, openai_api_key)
-    
-    json_data = json.dumps(flattened_data, indent=2)
-    
-    response = agent.run(
-        f"""Create a Google Sheet with the following data:
-        {json_data}
-        
-        Format it nicely with appropriate column headers and return the link to the sheet.
-        """
-    )
-    
-    # Extract the Google Sheets link from the response
-    content = response.content
-    if "https://docs.google.com/spreadsheets" in content:
-        for line in content.split('\n'):
-            if "https://docs.google.com/spreadsheets" in line:
-                return line.strip()
-    
-    return ""
-
-def create_prompt_transformation_agent(openai_api_key: str) -> Agent:
-    base_url = None
-    if openai_api_key.startswith("sk-or-"):
-        base_url = "https://openrouter.ai/api/v1"
-        
-    return Agent(
-        model=OpenAIChat(id="deepseek/deepseek-chat", api_key=openai_api_key, base_url=base_url, max_tokens=1024),
-        description="You are an expert at transforming verbose product/service descriptions into concise, targeted phrases for search queries.",
-        instructions=[
-            "Your task is to take a detailed description and extract the core product or service being offered, condensing it into 3-4 words.",
-            "Examples:",
-            "Input: 'We're looking for businesses that need help with their social media marketing, especially those struggling with content creation and engagement'",
-            "Output: 'social media marketing'",
-            "Input: 'Need to find businesses interested in implementing machine learning solutions for fraud detection'",
-            "Output: 'ML fraud detection'",
-            "Always focus on the core product/service and keep it concise but clear."
-        ],
-        markdown=True
-    )
+    exporter = SheetsExporter(get_sheets_executor(composio_api_key, use_stub))
+    result = exporter.export(flattened_data, campaign=campaign.strip().lower(), title=f"Quora Leads - {campaign}")
+    st.write(f"📊 Sheet updated: {result['appended']} new rows, {result['updated']} changed, "
+             f"{result['unchanged']} already exported")
+    return result["url"]
 
 # Function to save API keys to .env file
 def save_api_keys_to_env():
@@ -299,6 +243,44 @@ def main():
         # Search settings
         st.subheader("Search Settings")
         num_links = st.number_input("Number of links to search", min_value=1, max_value=10, value=3)
+        extract_mode = st.radio("Extraction mode", ["Parallel (one job per page)", "Batch (shared extract jobs)"],
+                                help="Batch mode submits several pages per Firecrawl extract job and polls for the result.")
+        batch_mode = extract_mode.startswith("Batch")
+        if batch_mode:
+            shard_size = st.slider("Pages per batch job", min_value=1, max_value=10, value=min(BATCH_SHARD_SIZE, 10))
+            extract_workers = EXTRACT_WORKERS
+        else:
+            extract_workers = st.slider("Parallel extractions", min_value=1, max_value=10, value=min(EXTRACT_WORKERS, 10))
+            shard_size = BATCH_SHARD_SIZE
+        extract_timeout = st.number_input("Per-page timeout (seconds)", min_value=10, max_value=600,
+                                          value=int(EXTRACT_TIMEOUT_SECONDS))
+        parse_first = st.checkbox("Parse pages locally first", value=True,
+                                  help="Scrape each page and parse it with rules; only low-confidence pages use LLM extraction.")
+        parse_threshold = st.slider("Minimum parse confidence", min_value=0.0, max_value=1.0,
+                                    value=MIN_PARSE_CONFIDENCE, step=0.05, disabled=not parse_first)
+
+        sheets_stub = st.checkbox("Dry-run Sheets export (local stub)",
+                                  value=os.getenv("LEAD_GEN_SHEETS_STUB", "").lower() in ("1", "true", "yes"),
+                                  help="Exercise the export without calling Composio.")
+
+        min_relevance = st.slider("Minimum relevance", min_value=0.0, max_value=1.0, value=MIN_RELEVANCE, step=0.01,
+                                  help="Cosine similarity of each lead's bio and post to the search description.")
+
+        st.subheader("Lead Store")
+        incremental = st.checkbox("Incremental mode", value=True,
+                                  help="Skip pages crawled recently and export only leads not seen before.")
+        freshness_hours = st.number_input("Skip pages crawled within (hours)", min_value=0.0, max_value=720.0,
+                                          value=FRESHNESS_HOURS, disabled=not incremental)
+        store_stats = get_lead_store().stats()
+        st.caption(f"{store_stats['leads']} leads from {store_stats['pages']} pages stored")
+
+        st.subheader("Extraction Cache")
+        use_cache = st.checkbox("Reuse cached page extractions", value=True)
+        cache_stats_box = st.empty()
+        render_cache_stats(cache_stats_box)
+        if st.button("Clear Cache"):
+            get_extract_cache().clear()
+            render_cache_stats(cache_stats_box)
         
         if st.button("Reset Session"):
             # Keep API keys but clear other session state
@@ -330,9 +312,12 @@ def main():
         else:
             with st.spinner("Processing your query..."):
                 try:
-                    transform_agent = create_prompt_transformation_agent(st.session_state.openai_api_key)
-                    company_description_response = transform_agent.run(f"Transform this query into a concise 3-4 word company description: {user_query}")
-                    company_description = company_description_response.content
+                    memo = get_description_memo()
+                    hits_before = memo.hits
+                    transform_agent = get_transformation_agent(st.session_state.openai_api_key)
+                    company_description = transform_description(transform_agent, user_query, memo)
+                    if memo.hits > hits_before:
+                        st.caption("⚡ Reused the description from an earlier identical query")
                 except Exception as e:
                     st.warning(f"AI transformation failed ({str(e)}), using raw query.")
                     company_description = user_query
@@ -340,42 +325,75 @@ def main():
                 st.write("🎯 Searching for:", company_description)
             
             with st.spinner("Searching for relevant URLs..."):
-                urls = search_for_urls(company_description, st.session_state.firecrawl_api_key, num_links)
+                try:
+                    urls = search_for_urls(company_description, st.session_state.firecrawl_api_key, num_links)
+                except SearchError as e:
+                    st.error(f"Search failed: {e}")
+                    st.stop()
             
             if urls:
                 st.subheader("Quora Links Used:")
                 for url in urls:
                     st.write(url)
+
+                lead_store = get_lead_store()
+                crawl_urls = urls
+                if incremental:
+                    fresh = lead_store.fresh_urls(urls, freshness_hours)
+                    crawl_urls = [url for url in urls if url not in fresh]
+                    if fresh:
+                        st.info(f"⏭️ Skipping {len(fresh)} page(s) crawled in the last {freshness_hours:g}h")
                 
                 with st.spinner("Extracting user info from URLs..."):
-                    user_info_list = extract_user_info_from_urls(urls, st.session_state.firecrawl_api_key)
+                    user_info_list = extract_user_info_from_urls(
+                        crawl_urls, st.session_state.firecrawl_api_key, extract_workers, extract_timeout,
+                        batch=batch_mode, shard_size=shard_size,
+                        cache=get_extract_cache() if use_cache else None,
+                        lead_store=lead_store,
+                        parse_threshold=parse_threshold if parse_first else None
+                    )
+                render_cache_stats(cache_stats_box)
+
+                new_leads = lead_store.upsert_leads(user_info_list, campaign=company_description)
+                st.write(f"🆕 {len(new_leads)} new leads, {len(user_info_list) - len(new_leads)} already in the lead store")
+                if incremental:
+                    # Recurring campaigns only ship what they have not shipped before
+                    user_info_list = new_leads
+
+                # Local TF-IDF scoring against the search description: best leads first, noise dropped
+                user_info_list, dropped = rank_leads(user_info_list, company_description, min_relevance)
+                if dropped:
+                    st.write(f"🎯 Filtered out {dropped} interactions scoring below {min_relevance:.2f} relevance")
                 
                 with st.spinner("Formatting user info..."):
-                    flattened_data = format_user_info_to_flattened_json(user_info_list)
+                    # Columnar table built straight from the extraction results; links stay a list column
+                    df = build_lead_table(user_info_list)
                     
-                    # Create DataFrame and CSV for download
-                    if flattened_data:
-                        df = pd.DataFrame(flattened_data)
-                    else:
-                        # Create empty DataFrame with expected columns
-                        columns = ['url', 'username', 'bio', 'post_type', 'timestamp', 'upvotes', 'links']
-                        df = pd.DataFrame(columns=columns)
-                        
-                    csv = df.to_csv(index=False).encode('utf-8')
+                    st.success(f"✅ Extracted {len(df)} leads!")
+                    st.write("Leads found: ", len(df))
                     
-                    st.success(f"✅ Extracted {len(flattened_data)} leads!")
-                    st.write("Leads found: ", len(flattened_data))
-                    
-                    st.download_button(
-                        label="📥 Download Leads as CSV",
-                        data=csv,
-                        file_name="quora_leads.csv",
-                        mime="text/csv",
-                    )
+                    col_csv, col_parquet = st.columns(2)
+                    with col_csv:
+                        st.download_button(
+                            label="📥 Download Leads as CSV",
+                            data=csv_file(df),
+                            file_name="quora_leads.csv",
+                            mime="text/csv",
+                        )
+                    with col_parquet:
+                        st.download_button(
+                            label="📥 Download Leads as Parquet",
+                            data=parquet_bytes(df),
+                            file_name="quora_leads.parquet",
+                            mime="application/octet-stream",
+                        )
+                    flattened_data = to_records(df)
                 
                 with st.spinner("Writing to Google Sheets..."):
                     try:
-                        google_sheets_link = write_to_google_sheets(flattened_data, st.session_state.composio_api_key, st.session_state.openai_api_key)
+                        google_sheets_link = write_to_google_sheets(
+                            flattened_data, st.session_state.composio_api_key, company_description, use_stub=sheets_stub
+                        )
                         if google_sheets_link:
                             st.subheader("Google Sheets Link:")
                             st.markdown(f"[View Google Sheet]({google_sheets_link})")
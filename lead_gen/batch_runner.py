@@ -0,0 +1,317 @@
+"""
+Headless lead_gen campaigns.
+
+Runs the full pipeline (describe -> search -> extract -> store -> score -> export) for every
+lead description in a file, several campaigns at a time:
+
+    python lead_gen/batch_runner.py campaigns.txt --workers 4 --rate 2 --format both
+
+The input is one description per line, or JSONL with {"description": ..., "campaign": ...}.
+All campaigns share one token-bucket rate limit for API calls, the extraction cache, the
+search cache and the lead store. Finished campaigns are recorded in <output-dir>/progress.json,
+so an interrupted run picks up where it stopped. Leads go to <output-dir>/leads.jsonl and/or
+<output-dir>/parquet/<campaign>-<key>.parquet, followed by a per-stage timing report.
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from extract_cache import ExtractCache
+from extraction import BATCH_SHARD_SIZE, EXTRACT_TIMEOUT_SECONDS, EXTRACT_WORKERS, extract_batched, extract_concurrently
+from lead_store import FRESHNESS_HOURS, LeadStore
+from lead_table import build_lead_table
+from quora_parser import MIN_PARSE_CONFIDENCE
+from pipeline import DescriptionMemo, create_prompt_transformation_agent, search_for_urls, transform_description
+from relevance import MIN_RELEVANCE, rank_leads
+
+load_dotenv()
+
+# --- Shared infrastructure ---
+class TokenBucket:
+    """Process-wide rate limit: `rate` calls per second on average, bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class StageTimer:
+    """Thread-safe wall-clock totals per pipeline stage"""
+
+    def __init__(self):
+        self.totals: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.totals[name].append(time.perf_counter() - started)
+
+    def report(self, wall_seconds: float) -> str:
+        lines = [f"{'Stage':<12}{'Calls':>7}{'Total s':>10}{'Mean s':>9}{'Max s':>9}"]
+        for name, durations in self.totals.items():
+            lines.append(
+                f"{name:<12}{len(durations):>7}{sum(durations):>10.1f}"
+                f"{sum(durations) / len(durations):>9.2f}{max(durations):>9.2f}"
+            )
+        lines.append(f"Wall clock: {wall_seconds:.1f}s (stage totals overlap across parallel campaigns)")
+        return "\n".join(lines)
+
+class Progress:
+    """Resumable record of finished campaigns, rewritten atomically after each one"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+
+    def done(self, key: str) -> bool:
+        return self.state.get(key, {}).get("status") == "done"
+
+    def record(self, key: str, entry: Dict):
+        with self._lock:
+            self.state[key] = entry
+            tmp_file = f"{self.path}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(tmp_file, self.path)
+
+# --- Campaigns ---
+def load_campaigns(path: str) -> List[Dict]:
+    campaigns = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                description = entry["description"]
+                campaigns.append({"description": description, "campaign": entry.get("campaign") or description})
+            else:
+                campaigns.append({"description": line, "campaign": line})
+    return campaigns
+
+def campaign_key(description: str) -> str:
+    return hashlib.sha1(description.strip().lower().encode("utf-8")).hexdigest()[:12]
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60] or "campaign"
+
+class BatchRunner:
+    def __init__(self, args):
+        self.args = args
+        self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
+        self.firecrawl_api_key = os.getenv("FIRECRAWL_API_KEY", "")
+        self.limiter = TokenBucket(args.rate, args.burst)
+        self.timer = StageTimer()
+        self.cache = None if args.no_cache else ExtractCache()
+        self.store = LeadStore()
+        os.makedirs(args.output_dir, exist_ok=True)
+        self.progress = Progress(os.path.join(args.output_dir, "progress.json"))
+        self._jsonl_lock = threading.Lock()
+        self._exported = self._load_exported()
+        self.memo = DescriptionMemo()
+        self._agent = None
+        self._agent_lock = threading.Lock()
+
+    def _transformation_agent(self):
+        with self._agent_lock:
+            if self._agent is None:
+                self._agent = create_prompt_transformation_agent(self.openai_api_key)
+            return self._agent
+
+    def _describe(self, description: str) -> str:
+        if self.args.no_transform or not self.openai_api_key:
+            return description
+        # Checked before taking a rate-limit token: memoized descriptions cost no API call
+        memoized = self.memo.get(description)
+        if memoized is not None:
+            return memoized.strip()
+        self.limiter.acquire()
+        try:
+            company_description = transform_description(self._transformation_agent(), description).strip()
+            if company_description:
+                self.memo.put(description, company_description)
+            return company_description or description
+        except Exception as e:
+            print(f"⚠️ Transformation failed for '{description[:40]}' ({e}); using the raw description")
+            return description
+
+    def _extract(self, urls: List[str]) -> List[dict]:
+        parse_threshold = None if self.args.no_parse else self.args.parse_threshold
+        if self.args.mode == "batch":
+            results = extract_batched(urls, self.firecrawl_api_key, self.args.shard_size, self.args.timeout,
+                                      self.cache, throttle=self.limiter.acquire, parse_threshold=parse_threshold)
+        else:
+            results = extract_concurrently(urls, self.firecrawl_api_key, self.args.extract_workers,
+                                           self.args.timeout, self.cache, throttle=self.limiter.acquire,
+                                           parse_threshold=parse_threshold)
+        user_info_list = []
+        for result in results:
+            if result["error"]:
+                print(f"   ❌ {result['url']}: {result['error']}")
+                continue
+            user_info_list.extend(result["user_info"])
+            if not result.get("cached") and result["user_info"]:
+                self.store.record_crawl(result["url"], len(result["user_info"]))
+        return user_info_list
+
+    def _load_exported(self) -> Dict[str, set]:
+        """(url, username) pairs already in leads.jsonl per campaign key, from earlier (possibly crashed) runs"""
+        exported: Dict[str, set] = defaultdict(set)
+        try:
+            with open(os.path.join(self.args.output_dir, "leads.jsonl"), "r") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    if row.get("campaign_key"):
+                        exported[row["campaign_key"]].add((row.get("url"), row.get("username")))
+        except FileNotFoundError:
+            pass
+        return exported
+
+    def _export(self, key: str, campaign: str, leads: List[dict]):
+        """
+        Idempotent per campaign, because progress is only recorded after the export:
+        a campaign re-run after a crash skips JSONL rows it already wrote and rewrites its Parquet file.
+        """
+        if self.args.format in ("jsonl", "both"):
+            with self._jsonl_lock, open(os.path.join(self.args.output_dir, "leads.jsonl"), "a") as f:
+                written = self._exported[key]
+                for lead in leads:
+                    lead_id = (lead.get("url"), lead.get("username"))
+                    if lead_id in written:
+                        continue
+                    f.write(json.dumps({"campaign": campaign, "campaign_key": key, **lead}) + "\n")
+                    written.add(lead_id)
+        if self.args.format in ("parquet", "both") and leads:
+            parquet_dir = os.path.join(self.args.output_dir, "parquet")
+            os.makedirs(parquet_dir, exist_ok=True)
+            path = os.path.join(parquet_dir, f"{slugify(campaign)}-{key}.parquet")
+            df = build_lead_table(leads).assign(campaign=campaign)
+            df.to_parquet(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+
+    def run_campaign(self, entry: Dict) -> Dict:
+        description, campaign = entry["description"], entry["campaign"]
+        with self.timer.stage("describe"):
+            company_description = self._describe(description)
+        with self.timer.stage("search"):
+            self.limiter.acquire()
+            urls = search_for_urls(company_description, self.firecrawl_api_key, self.args.num_links)
+        if self.args.incremental:
+            fresh = self.store.fresh_urls(urls, self.args.freshness_hours)
+            urls = [url for url in urls if url not in fresh]
+        with self.timer.stage("extract"):
+            user_info_list = self._extract(urls)
+        with self.timer.stage("store"):
+            new_leads = self.store.upsert_leads(user_info_list, campaign=campaign)
+        with self.timer.stage("score"):
+            ranked, dropped = rank_leads(new_leads if self.args.incremental else user_info_list,
+                                         company_description, self.args.min_relevance)
+        with self.timer.stage("export"):
+            self._export(campaign_key(description), campaign, ranked)
+        return {"status": "done", "campaign": campaign, "query": company_description, "pages": len(urls),
+                "leads": len(user_info_list), "new_leads": len(new_leads), "exported": len(ranked),
+                "below_threshold": dropped, "finished_at": time.time()}
+
+    def run(self, campaigns: List[Dict]) -> int:
+        pending = [entry for entry in campaigns if not self.progress.done(campaign_key(entry["description"]))]
+        skipped = len(campaigns) - len(pending)
+        print(f"🚀 {len(pending)} campaigns to run ({skipped} already done), {self.args.workers} at a time")
+
+        started = time.perf_counter()
+        failures = 0
+        with ThreadPoolExecutor(max_workers=self.args.workers, thread_name_prefix="campaign") as executor:
+            futures = {executor.submit(self.run_campaign, entry): entry for entry in pending}
+            for future in as_completed(futures):
+                entry = futures[future]
+                key = campaign_key(entry["description"])
+                try:
+                    result = future.result()
+                    print(f"✅ {result['campaign']}: {result['leads']} leads ({result['new_leads']} new, "
+                          f"{result['exported']} exported) from {result['pages']} pages")
+                except Exception as e:
+                    failures += 1
+                    result = {"status": "failed", "campaign": entry["campaign"], "error": str(e)}
+                    print(f"❌ {entry['campaign']}: {e}")
+                self.progress.record(key, result)
+
+        print("\n⏱️ Stage timings")
+        print(self.timer.report(time.perf_counter() - started))
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"Extraction cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})")
+        memo_stats = self.memo.stats()
+        print(f"Description memo: {memo_stats['hits']} of {memo_stats['hits'] + memo_stats['misses']} lookups reused")
+        return failures
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run lead_gen campaigns without the Streamlit UI")
+    parser.add_argument("input", help="Text file (one description per line) or JSONL with description/campaign")
+    parser.add_argument("--output-dir", default="lead_gen_runs")
+    parser.add_argument("--format", choices=["jsonl", "parquet", "both"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=4, help="Campaigns processed in parallel")
+    parser.add_argument("--rate", type=float, default=2.0, help="API calls per second across all campaigns (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--num-links", type=int, default=5)
+    parser.add_argument("--mode", choices=["parallel", "batch"], default="parallel")
+    parser.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS)
+    parser.add_argument("--shard-size", type=int, default=BATCH_SHARD_SIZE)
+    parser.add_argument("--timeout", type=float, default=EXTRACT_TIMEOUT_SECONDS)
+    parser.add_argument("--parse-threshold", type=float, default=MIN_PARSE_CONFIDENCE,
+                        help="Pages the local parser handles with at least this confidence skip LLM extraction")
+    parser.add_argument("--no-parse", action="store_true", help="Always use LLM extraction")
+    parser.add_argument("--incremental", action="store_true", help="Skip fresh pages and export only new leads")
+    parser.add_argument("--freshness-hours", type=float, default=FRESHNESS_HOURS)
+    parser.add_argument("--min-relevance", type=float, default=MIN_RELEVANCE,
+                        help="Drop leads whose bio/post score below this TF-IDF cosine similarity")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-transform", action="store_true", help="Search with the raw descriptions")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.getenv("FIRECRAWL_API_KEY"):
+        sys.exit("FIRECRAWL_API_KEY is not set")
+    runner = BatchRunner(args)
+    sys.exit(1 if runner.run(load_campaigns(args.input)) else 0)
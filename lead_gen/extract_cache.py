@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# --- Configuration ---
+CACHE_DB_FILE = os.getenv("LEAD_GEN_CACHE_DB", "lead_gen_cache.sqlite")
+CACHE_TTL_HOURS = float(os.getenv("LEAD_GEN_CACHE_TTL_HOURS", "168"))
+CACHE_MAX_MB = float(os.getenv("LEAD_GEN_CACHE_MAX_MB", "50"))
+
+def content_hash(value) -> str:
+    """Stable hash of a prompt string or a JSON schema"""
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+class ExtractCache:
+    """
+    Disk cache for Firecrawl extraction results, keyed on (URL, schema hash, prompt hash).
+    Changing the schema or the prompt therefore misses instead of serving stale shapes.
+    Entries expire after `ttl_hours`; when the cache grows past `max_mb` the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, db_file: str = CACHE_DB_FILE, ttl_hours: float = CACHE_TTL_HOURS,
+                 max_mb: float = CACHE_MAX_MB):
+        self.db_file = db_file
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self.ensure_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ensure_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extract_cache (
+                    url TEXT NOT NULL,
+                    schema_hash TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (url, schema_hash, prompt_hash)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_extract_cache_access ON extract_cache (last_access)")
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, url: str, schema_hash: str, prompt_hash: str) -> Optional[List[dict]]:
+        now = time.time()
+        key = (url, schema_hash, prompt_hash)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, created_at FROM extract_cache WHERE url = ? AND schema_hash = ? AND prompt_hash = ?",
+                key,
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                conn.execute(
+                    "UPDATE extract_cache SET last_access = ? WHERE url = ? AND schema_hash = ? AND prompt_hash = ?",
+                    (now, *key),
+                )
+                self._count(hit=True)
+                return json.loads(row[0])
+            if row:
+                conn.execute("DELETE FROM extract_cache WHERE url = ? AND schema_hash = ? AND prompt_hash = ?", key)
+        self._count(hit=False)
+        return None
+
+    def put(self, url: str, schema_hash: str, prompt_hash: str, user_info: List[dict]):
+        payload = json.dumps(user_info)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO extract_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, schema_hash, prompt_hash, payload, len(payload), now, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM extract_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extract_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk entries from least recently used and drop them until we are under budget
+        excess = total - self.max_bytes
+        doomed = []
+        for rowid, size in conn.execute("SELECT rowid, size FROM extract_cache ORDER BY last_access"):
+            doomed.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM extract_cache WHERE rowid = ?", doomed)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM extract_cache")
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extract_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_mb": size / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,360 @@
+import os
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from firecrawl import FirecrawlApp
+from pydantic import BaseModel, Field
+
+from extract_cache import ExtractCache, content_hash
+from quora_parser import PARSER_VERSION, parse_quora_markdown
+
+# --- Configuration ---
+EXTRACT_WORKERS = int(os.getenv("LEAD_GEN_EXTRACT_WORKERS", "5"))
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("LEAD_GEN_EXTRACT_TIMEOUT", "120"))
+BATCH_SHARD_SIZE = int(os.getenv("LEAD_GEN_BATCH_SHARD_SIZE", "5"))
+# Batch mode's scrape-and-parse pass: plain scrapes plus local parsing, sized apart from the LLM extract pool
+PARSE_WORKERS = int(os.getenv("LEAD_GEN_PARSE_WORKERS", "8"))
+BATCH_POLL_MIN_SECONDS = 1.0
+BATCH_POLL_MAX_SECONDS = 10.0
+
+class QuoraUserInteractionSchema(BaseModel):
+    username: str = Field(description="The username of the user who posted the question or answer")
+    bio: str = Field(description="The bio or description of the user")
+    post_type: str = Field(description="The type of post, either 'question' or 'answer'")
+    timestamp: str = Field(description="When the question or answer was posted")
+    upvotes: int = Field(default=0, description="Number of upvotes received")
+    links: List[str] = Field(default_factory=list, description="Any links included in the post")
+    content: str = Field(default="", description="The text of the question or answer, truncated to about 300 characters")
+
+class QuoraPageSchema(BaseModel):
+    interactions: List[QuoraUserInteractionSchema] = Field(description="List of all user interactions (questions and answers) on the page")
+
+class QuoraBatchInteractionSchema(QuoraUserInteractionSchema):
+    source_url: str = Field(description="The exact URL of the Quora page this question or answer was found on")
+
+class QuoraBatchSchema(BaseModel):
+    interactions: List[QuoraBatchInteractionSchema] = Field(description="List of all user interactions (questions and answers) across all pages")
+
+EXTRACT_PROMPT = """
+                Extract information about all users who have posted questions or answers on this Quora page.
+                For each user, extract their username, bio, the type of post (question or answer),
+                when it was posted, number of upvotes, any links they included, and the start of their post.
+                """
+
+# Cache key parts: any change to the schema or prompt invalidates earlier results
+SCHEMA_HASH = content_hash(QuoraPageSchema.model_json_schema())
+PROMPT_HASH = content_hash(EXTRACT_PROMPT)
+
+BATCH_PROMPT_SUFFIX = """
+                Several pages are processed together. For every interaction also set source_url to the exact
+                URL of the page it appeared on, copied from this list:
+                """
+
+# Batch jobs run a different schema and prompt (the URL list appended to this template),
+# so their per-page results are cached under their own key rather than the single-page one
+BATCH_SCHEMA_HASH = content_hash(QuoraBatchSchema.model_json_schema())
+BATCH_PROMPT_HASH = content_hash(EXTRACT_PROMPT + BATCH_PROMPT_SUFFIX)
+
+# (schema hash, prompt hash) per extraction method
+CACHE_KEYS = {
+    "llm": (SCHEMA_HASH, PROMPT_HASH),
+    "batch": (BATCH_SCHEMA_HASH, BATCH_PROMPT_HASH),
+}
+PARSER_HASH = content_hash(f"quora_parser:{PARSER_VERSION}")
+
+def _cache_key(method: str, parse_threshold: Optional[float] = None) -> Optional[Tuple[str, str]]:
+    """Parsed results get their own key: the parser version and the confidence they had to reach"""
+    if method == "parsed":
+        return (PARSER_HASH, content_hash(f"min_confidence:{parse_threshold:g}")) if parse_threshold is not None else None
+    return CACHE_KEYS.get(method)
+
+def _field(response, name: str, default=None):
+    """Read a field from an SDK response object or a plain dict"""
+    if isinstance(response, dict):
+        return response.get(name, default)
+    return getattr(response, name, default)
+
+def response_data(response) -> Optional[Dict]:
+    """Payload of an extract response, which is an object or a dict depending on the SDK version"""
+    if hasattr(response, 'success'):
+        success = response.success
+        data = response.data
+    else:
+        success = response.get('success')
+        data = response.get('data', response)
+    return data if (success or data) else None
+
+def interactions_to_user_info(url: str, data: Optional[Dict]) -> List[dict]:
+    if not data or 'interactions' not in data:
+        return []
+    return [
+        {
+            'url': url,
+            'username': interaction.get('username', 'Unknown'),
+            'bio': interaction.get('bio', 'No bio available'),
+            'post_type': interaction.get('post_type', 'Unknown'),
+            'timestamp': interaction.get('timestamp', 'Unknown'),
+            'upvotes': interaction.get('upvotes', 0),
+            'links': interaction.get('links', []),
+            'content': interaction.get('content', '')
+        }
+        for interaction in data['interactions']
+    ]
+
+def extract_page(firecrawl_app: FirecrawlApp, url: str) -> List[dict]:
+    """One blocking extract job for a single Quora page"""
+    response = firecrawl_app.extract(
+        urls=[url],
+        prompt=EXTRACT_PROMPT,
+        schema=QuoraPageSchema.model_json_schema()
+    )
+    return interactions_to_user_info(url, response_data(response))
+
+def scrape_markdown(firecrawl_app: FirecrawlApp, url: str) -> str:
+    """Plain markdown scrape of one page (no LLM involved)"""
+    # The v2 client calls it scrape; firecrawl-py 2.x/v1 API exposes scrape_url
+    scrape = getattr(firecrawl_app, "scrape", None) or firecrawl_app.scrape_url
+    document = scrape(url, formats=["markdown"])
+    return _field(document, "markdown") or _field(_field(document, "data") or {}, "markdown") or ""
+
+def parse_page(firecrawl_app: FirecrawlApp, url: str) -> Tuple[List[dict], float]:
+    """Scrape a page and parse it deterministically: (user_info, confidence)"""
+    return parse_quora_markdown(scrape_markdown(firecrawl_app, url), url)
+
+def _split_cached(urls: List[str], cache: Optional[ExtractCache], methods: Tuple[str, ...],
+                  parse_threshold: Optional[float] = None) -> Tuple[List[Dict], List[str]]:
+    """Cached per-URL results (from the first of `methods` that has one) and the URLs that still need a call"""
+    urls = list(dict.fromkeys(urls))
+    if cache is None:
+        return [], urls
+    hits, misses = [], []
+    for url in urls:
+        for method in methods:
+            keys = _cache_key(method, parse_threshold)
+            user_info = cache.get(url, *keys) if keys else None
+            if user_info is not None:
+                hits.append({"url": url, "user_info": user_info, "error": None, "seconds": 0.0,
+                             "cached": True, "method": method})
+                break
+        else:
+            misses.append(url)
+    return hits, misses
+
+def _try_parse(firecrawl_app: FirecrawlApp, url: str) -> Tuple[List[dict], float]:
+    # A failed scrape only means the page falls back to the LLM
+    try:
+        return parse_page(firecrawl_app, url)
+    except Exception as e:
+        print(f"⚠️ Scraping {url} for local parsing failed: {e}")
+        return [], 0.0
+
+def _parse_pass(urls: List[str], firecrawl_api_key: str, parse_threshold: float, max_workers: int,
+                throttle: Optional[Callable[[], None]]) -> Tuple[List[Dict], List[str]]:
+    """Scrape and parse URLs concurrently: confident results, and the URLs that still need the LLM"""
+    local = threading.local()
+
+    def run(url: str) -> Tuple[List[dict], float, float]:
+        if throttle:
+            throttle()
+        if not hasattr(local, "app"):
+            local.app = FirecrawlApp(api_key=firecrawl_api_key)
+        started = time.monotonic()
+        user_info, confidence = _try_parse(local.app, url)
+        return user_info, confidence, time.monotonic() - started
+
+    parsed, fallback = [], []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="parse") as executor:
+        for url, (user_info, confidence, seconds) in zip(urls, executor.map(run, urls)):
+            if user_info and confidence >= parse_threshold:
+                parsed.append({"url": url, "user_info": user_info, "error": None, "seconds": seconds,
+                               "method": "parsed", "confidence": confidence})
+            else:
+                fallback.append(url)
+    return parsed, fallback
+
+def _store(cache: Optional[ExtractCache], result: Dict, parse_threshold: Optional[float] = None) -> Dict:
+    # Empty pages are usually a failed extraction, so only real results are kept
+    keys = _cache_key(result.get("method", "llm"), parse_threshold)
+    if cache is not None and keys and not result["error"] and result["user_info"]:
+        cache.put(result["url"], *keys, result["user_info"])
+    return result
+
+def extract_concurrently(urls: List[str], firecrawl_api_key: str, max_workers: int = EXTRACT_WORKERS,
+                         timeout: float = EXTRACT_TIMEOUT_SECONDS, cache: Optional[ExtractCache] = None,
+                         throttle: Optional[Callable[[], None]] = None,
+                         parse_threshold: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Extract every URL on a bounded thread pool and yield one result per URL as soon as it finishes:
+    {"url", "user_info", "error", "seconds", "method", "confidence"}.
+    A failing or slow page never affects the others: its exception (or a timeout once it has
+    been running for `timeout` seconds) is reported in "error" and the rest carry on.
+    With a cache, cached pages are yielded first and never reach Firecrawl.
+    With `parse_threshold`, each page is first scraped and parsed locally; only pages parsed with
+    a lower confidence go on to an LLM extract job ("method" says which one produced the result).
+    `throttle`, if given, is called (and may block) before every Firecrawl request.
+    """
+    # LLM-only runs never see parsed results; parse-first runs take either, LLM results first
+    methods = ("llm",) if parse_threshold is None else ("llm", "parsed")
+    hits, urls = _split_cached(urls, cache, methods, parse_threshold)
+    yield from hits
+    if not urls:
+        return
+
+    local = threading.local()
+    started: Dict[str, float] = {}
+
+    def run(url: str) -> Tuple[List[dict], str, Optional[float]]:
+        if throttle:
+            throttle()
+        started[url] = time.monotonic()
+        if not hasattr(local, "app"):
+            local.app = FirecrawlApp(api_key=firecrawl_api_key)
+        confidence = None
+        if parse_threshold is not None:
+            user_info, confidence = _try_parse(local.app, url)
+            if user_info and confidence >= parse_threshold:
+                return user_info, "parsed", confidence
+            if throttle:
+                throttle()
+        return extract_page(local.app, url), "llm", confidence
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="extract")
+    pending = {executor.submit(run, url): url for url in urls}
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                result = {"url": url, "user_info": [], "error": None,
+                          "seconds": time.monotonic() - started.get(url, time.monotonic())}
+                try:
+                    result["user_info"], result["method"], result["confidence"] = future.result()
+                except Exception as e:
+                    result["error"] = str(e) or type(e).__name__
+                yield _store(cache, result, parse_threshold)
+
+            now = time.monotonic()
+            for future, url in list(pending.items()):
+                if url in started and now - started[url] > timeout:
+                    # The worker thread cannot be interrupted; stop waiting for it instead
+                    pending.pop(future)
+                    future.cancel()
+                    yield {"url": url, "user_info": [], "error": f"Timed out after {timeout:g}s",
+                           "seconds": now - started[url]}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _normalize_url(url: str) -> str:
+    return url.strip().lower().split("#")[0].split("?")[0].rstrip("/").replace("://www.", "://")
+
+def _assign_source(source_url: Optional[str], shard: List[str]) -> Optional[str]:
+    """Map the model's source_url back to one of the URLs we submitted"""
+    if len(shard) == 1:
+        return shard[0]
+    if not source_url:
+        return None
+    wanted = _normalize_url(source_url)
+    for url in shard:
+        normalized = _normalize_url(url)
+        if wanted == normalized or wanted.endswith(normalized.split("://", 1)[-1]):
+            return url
+    for url in shard:
+        # Quora question slugs are unique, so the last path segment is enough
+        if wanted.rsplit("/", 1)[-1] == _normalize_url(url).rsplit("/", 1)[-1]:
+            return url
+    return None
+
+def _start_job(firecrawl_app: FirecrawlApp, shard: List[str]) -> str:
+    prompt = EXTRACT_PROMPT + BATCH_PROMPT_SUFFIX + "\n".join(shard)
+    schema = QuoraBatchSchema.model_json_schema()
+    # firecrawl-py 2.x/v1 API exposes async_extract; the v2 client calls it start_extract
+    start = getattr(firecrawl_app, "start_extract", None) or firecrawl_app.async_extract
+    job = start(urls=shard, prompt=prompt, schema=schema)
+    job_id = _field(job, "id")
+    if not job_id:
+        raise RuntimeError(_field(job, "error") or "Extract job was not accepted")
+    return job_id
+
+def _shard_results(shard: List[str], data: Optional[Dict], seconds: float) -> List[Dict]:
+    by_url: Dict[str, List[dict]] = {url: [] for url in shard}
+    unmatched = 0
+    for interaction in (data or {}).get("interactions", []):
+        url = _assign_source(interaction.get("source_url"), shard)
+        if url is None:
+            unmatched += 1
+            continue
+        by_url[url].extend(interactions_to_user_info(url, {"interactions": [interaction]}))
+    if unmatched:
+        print(f"⚠️ {unmatched} interactions could not be matched to a source URL and were dropped")
+    return [{"url": url, "user_info": info, "error": None, "seconds": seconds, "method": "batch"}
+            for url, info in by_url.items()]
+
+def extract_batched(urls: List[str], firecrawl_api_key: str, shard_size: int = BATCH_SHARD_SIZE,
+                    timeout: float = EXTRACT_TIMEOUT_SECONDS, cache: Optional[ExtractCache] = None,
+                    throttle: Optional[Callable[[], None]] = None,
+                    parse_threshold: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Submit the URLs as a few async extract jobs (`shard_size` URLs each), poll them with
+    exponential backoff and yield per-URL results in the same shape as extract_concurrently.
+    Interactions are mapped back to their page through the schema's source_url field.
+    Cached pages are yielded first and left out of the jobs; with `parse_threshold`, so are
+    pages the local parser handles confidently.
+    """
+    methods = ("batch",) if parse_threshold is None else ("batch", "parsed")
+    hits, urls = _split_cached(urls, cache, methods, parse_threshold)
+    yield from hits
+    if urls and parse_threshold is not None:
+        parsed, urls = _parse_pass(urls, firecrawl_api_key, parse_threshold, PARSE_WORKERS, throttle)
+        for result in parsed:
+            yield _store(cache, result, parse_threshold)
+    if not urls:
+        return
+
+    firecrawl_app = FirecrawlApp(api_key=firecrawl_api_key)
+    shard_size = max(1, shard_size)
+    started = time.monotonic()
+
+    jobs: Dict[str, List[str]] = {}
+    for i in range(0, len(urls), shard_size):
+        shard = urls[i:i + shard_size]
+        if throttle:
+            throttle()
+        try:
+            jobs[_start_job(firecrawl_app, shard)] = shard
+        except Exception as e:
+            for url in shard:
+                yield {"url": url, "user_info": [], "error": f"Could not start extract job: {e}", "seconds": 0.0}
+
+    delay = BATCH_POLL_MIN_SECONDS
+    while jobs:
+        time.sleep(delay)
+        elapsed = time.monotonic() - started
+        for job_id, shard in list(jobs.items()):
+            if throttle:
+                throttle()
+            try:
+                status = firecrawl_app.get_extract_status(job_id)
+            except Exception as e:
+                # Transient polling errors are retried until the deadline
+                print(f"⚠️ Polling extract job {job_id} failed: {e}")
+                continue
+            state = _field(status, "status")
+            if state == "completed":
+                jobs.pop(job_id)
+                for result in _shard_results(shard, _field(status, "data"), elapsed):
+                    yield _store(cache, result)
+            elif state in ("failed", "cancelled"):
+                jobs.pop(job_id)
+                error = _field(status, "error") or f"Extract job {state}"
+                for url in shard:
+                    yield {"url": url, "user_info": [], "error": error, "seconds": elapsed}
+
+        if jobs and time.monotonic() - started > timeout:
+            for shard in jobs.values():
+                for url in shard:
+                    yield {"url": url, "user_info": [], "error": f"Timed out after {timeout:g}s",
+                           "seconds": time.monotonic() - started}
+            return
+        delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
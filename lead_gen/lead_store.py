@@ -0,0 +1,160 @@
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+# --- Configuration ---
+LEAD_STORE_DB = os.getenv("LEAD_GEN_STORE_DB", "lead_gen_leads.sqlite")
+FRESHNESS_HOURS = float(os.getenv("LEAD_GEN_FRESHNESS_HOURS", "24"))
+
+LEAD_FIELDS = ("url", "username", "bio", "post_type", "timestamp", "upvotes", "links")
+
+class LeadStore:
+    """
+    Persistent store for every lead lead_gen has found.
+    (url, username) is unique, so re-crawled pages update existing leads instead of
+    duplicating them, and each URL remembers when it was last crawled so incremental
+    runs can skip pages that are still fresh.
+    """
+
+    def __init__(self, db_file: str = LEAD_STORE_DB):
+        self.db_file = db_file
+        self.ensure_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ensure_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS leads (
+                    url TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    bio TEXT,
+                    post_type TEXT,
+                    timestamp TEXT,
+                    upvotes INTEGER,
+                    links TEXT,
+                    campaign TEXT,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_url_username ON leads (url, username)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_campaign ON leads (campaign, first_seen)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crawls (
+                    url TEXT PRIMARY KEY,
+                    crawled_at TEXT NOT NULL,
+                    interactions INTEGER NOT NULL
+                )
+                """
+            )
+
+    # --- Crawl bookkeeping ---
+    def fresh_urls(self, urls: Iterable[str], max_age_hours: float = FRESHNESS_HOURS) -> Set[str]:
+        """URLs successfully crawled within the freshness window (pages that yielded nothing are never fresh)"""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return set()
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT url FROM crawls WHERE crawled_at >= ? AND interactions > 0 AND url IN ({', '.join('?' for _ in urls)})",
+                [cutoff, *urls],
+            ).fetchall()
+        return {row["url"] for row in rows}
+
+    def record_crawl(self, url: str, interactions: int):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO crawls (url, crawled_at, interactions) VALUES (?, ?, ?)",
+                (url, datetime.now().isoformat(), interactions),
+            )
+
+    # --- Leads ---
+    def upsert_leads(self, user_info_list: List[dict], campaign: str) -> List[dict]:
+        """Insert new leads and refresh known ones in one transaction. Returns only the new leads."""
+        now = datetime.now().isoformat()
+        new_leads = []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for user_info in user_info_list:
+                values = [user_info.get(field) for field in LEAD_FIELDS]
+                values[LEAD_FIELDS.index("links")] = json.dumps(user_info.get("links") or [])
+                inserted = conn.execute(
+                    f"INSERT OR IGNORE INTO leads ({', '.join(LEAD_FIELDS)}, campaign, first_seen, last_seen) "
+                    f"VALUES ({', '.join('?' for _ in LEAD_FIELDS)}, ?, ?, ?)",
+                    [*values, campaign, now, now],
+                ).rowcount
+                if inserted:
+                    new_leads.append(user_info)
+                else:
+                    conn.execute(
+                        "UPDATE leads SET bio = ?, post_type = ?, timestamp = ?, upvotes = ?, links = ?, last_seen = ? "
+                        "WHERE url = ? AND username = ?",
+                        [*values[2:], now, user_info.get("url"), user_info.get("username")],
+                    )
+            conn.execute("COMMIT")
+        return new_leads
+
+    def find(self, campaign: Optional[str] = None, since: Optional[str] = None, limit: int = 1000) -> List[Dict]:
+        """Stored leads, newest first; `since` is an ISO timestamp compared with first_seen"""
+        clauses, params = [], []
+        if campaign:
+            clauses.append("campaign = ?")
+            params.append(campaign)
+        if since:
+            clauses.append("first_seen >= ?")
+            params.append(since)
+        query = "SELECT * FROM leads"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY first_seen DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        for row in rows:
+            row["links"] = json.loads(row["links"] or "[]")
+        return rows
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            leads = conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+            pages = conn.execute("SELECT COUNT(*) FROM crawls").fetchone()[0]
+        return {"leads": leads, "pages": pages}
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description="Query leads stored by lead_gen")
+    parser.add_argument("--campaign")
+    parser.add_argument("--since", help="ISO date/time; only leads first seen after it")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    store = LeadStore()
+    rows = store.find(args.campaign, args.since, args.limit)
+    writer = csv.DictWriter(sys.stdout, fieldnames=[*LEAD_FIELDS, "campaign", "first_seen", "last_seen"])
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({**row, "links": ", ".join(row["links"])})
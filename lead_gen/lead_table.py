@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+from typing import IO, Iterator, List
+
+import pandas as pd
+
+from sheets_export import LEAD_COLUMNS
+
+# --- Configuration ---
+CSV_CHUNK_ROWS = int(os.getenv("LEAD_GEN_CSV_CHUNK_ROWS", "5000"))
+SPOOL_MAX_BYTES = 8 * 1024 * 1024  # exports bigger than this spill to a temp file
+
+# The Sheets columns plus what the local exports add on top
+TABLE_COLUMNS = [*LEAD_COLUMNS, 'content', 'relevance']
+_DEFAULTS = {'url': '', 'username': 'Unknown', 'bio': 'No bio available', 'post_type': 'Unknown',
+             'timestamp': 'Unknown', 'upvotes': 0, 'content': '', 'relevance': None}
+
+def build_lead_table(user_info_list: List[dict]) -> pd.DataFrame:
+    """
+    Build the leads table column by column straight from the extraction results.
+    `links` stays a list column (Parquet list<string>); it is only joined into text for CSV/Sheets.
+    """
+    columns = {
+        column: [user_info.get(column, default) for user_info in user_info_list]
+        for column, default in _DEFAULTS.items()
+    }
+    columns['links'] = [list(user_info.get('links') or []) for user_info in user_info_list]
+    df = pd.DataFrame(columns, columns=TABLE_COLUMNS)
+    df['upvotes'] = pd.to_numeric(df['upvotes'], errors='coerce').fillna(0).astype('int64')
+    df['relevance'] = pd.to_numeric(df['relevance'], errors='coerce').astype('float64')
+    for column in ('url', 'username', 'bio', 'post_type', 'timestamp', 'content'):
+        df[column] = df[column].fillna('').astype(str)
+    return df
+
+def _joined_links(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(links=df['links'].str.join(', ').fillna(''))
+
+def to_records(df: pd.DataFrame) -> List[dict]:
+    """Flat rows (links joined) for row-oriented consumers such as the Sheets export"""
+    return _joined_links(df).to_dict('records')
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode the table as CSV `chunk_rows` rows at a time; only one chunk is in memory at once"""
+    if df.empty:
+        yield pd.DataFrame(columns=TABLE_COLUMNS).to_csv(index=False).encode('utf-8')
+        return
+    for start in range(0, len(df), chunk_rows):
+        chunk = _joined_links(df.iloc[start:start + chunk_rows])
+        yield chunk.to_csv(index=False, header=start == 0).encode('utf-8')
+
+def csv_file(df: pd.DataFrame, chunk_rows: int = CSV_CHUNK_ROWS) -> IO[bytes]:
+    """CSV export as a rewound file object (in memory when small, on disk when large)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    for chunk in iter_csv_chunks(df, chunk_rows):
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+def parquet_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, engine='pyarrow', index=False)
+    return buffer.getvalue()
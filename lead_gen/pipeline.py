@@ -0,0 +1,109 @@
+"""Streamlit-free pipeline steps shared by the app and the batch runner"""
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+
+from search_client import get_search_client
+
+# --- Configuration ---
+TRANSFORM_MODEL = "deepseek/deepseek-chat"
+TRANSFORM_MEMO_FILE = os.getenv("LEAD_GEN_TRANSFORM_MEMO", "lead_gen_transform_memo.json")
+TRANSFORM_MEMO_SIZE = int(os.getenv("LEAD_GEN_TRANSFORM_MEMO_SIZE", "1000"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def create_prompt_transformation_agent(openai_api_key: str) -> Agent:
+    base_url = None
+    if openai_api_key.startswith("sk-or-"):
+        base_url = "https://openrouter.ai/api/v1"
+        
+    return Agent(
+        model=OpenAIChat(id=TRANSFORM_MODEL, api_key=openai_api_key, base_url=base_url, max_tokens=1024),
+        description="You are an expert at transforming verbose product/service descriptions into concise, targeted phrases for search queries.",
+        instructions=[
+            "Your task is to take a detailed description and extract the core product or service being offered, condensing it into 3-4 words.",
+            "Examples:",
+            "Input: 'We're looking for businesses that need help with their social media marketing, especially those struggling with content creation and engagement'",
+            "Output: 'social media marketing'",
+            "Input: 'Need to find businesses interested in implementing machine learning solutions for fraud detection'",
+            "Output: 'ML fraud detection'",
+            "Always focus on the core product/service and keep it concise but clear."
+        ],
+        markdown=True
+    )
+
+class DescriptionMemo:
+    """
+    LRU of query -> company description, persisted to a JSON file so repeat queries skip the
+    LLM across restarts. Keys include the model, so switching models starts fresh.
+    """
+
+    def __init__(self, path: Optional[str] = TRANSFORM_MEMO_FILE, max_entries: int = TRANSFORM_MEMO_SIZE):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        if path:
+            try:
+                with open(path, "r") as f:
+                    self._entries.update(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    @staticmethod
+    def key(user_query: str, model: str = TRANSFORM_MODEL) -> str:
+        return f"{model}|{_WHITESPACE_RE.sub(' ', user_query.strip().lower())}"
+
+    def get(self, user_query: str) -> Optional[str]:
+        key = self.key(user_query)
+        with self._lock:
+            description = self._entries.get(key)
+            if description is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return description
+
+    def put(self, user_query: str, description: str):
+        key = self.key(user_query)
+        with self._lock:
+            self._entries[key] = description
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                tmp_file = f"{self.path}.tmp"
+                with open(tmp_file, "w") as f:
+                    json.dump(self._entries, f, indent=2)
+                os.replace(tmp_file, self.path)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+def transform_description(agent: Agent, user_query: str, memo: Optional[DescriptionMemo] = None) -> str:
+    """Condense a lead description into a search phrase; memoized queries never reach the LLM"""
+    if memo is not None:
+        description = memo.get(user_query)
+        if description is not None:
+            return description
+    response = agent.run(f"Transform this query into a concise 3-4 word company description: {user_query}")
+    description = response.content
+    if memo is not None and description and description.strip():
+        memo.put(user_query, description)
+    return description
+
+def search_for_urls(company_description: str, firecrawl_api_key: str, num_links: int) -> List[str]:
+    """Raises SearchError when the search itself fails, so it is not mistaken for "no results" """
+    query1 = f"quora websites where people are looking for {company_description} services"
+    return get_search_client(firecrawl_api_key).search(query1, limit=num_links, lang="en", location="United States")
@@ -0,0 +1,104 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
+# --- Configuration ---
+MIN_PARSE_CONFIDENCE = float(os.getenv("LEAD_GEN_MIN_PARSE_CONFIDENCE", "0.6"))
+CONTENT_CHARS = 300
+# Bump whenever the parsing rules change: cached parsed results are keyed on it
+PARSER_VERSION = "2"
+
+# Author links look like [Name](https://www.quora.com/profile/Name-Slug); avatar image links never match
+_PROFILE_RE = re.compile(
+    r"\[(?!!)([^\]\n]{1,100})\]\((?:https?://(?:[a-z]+\.)?quora\.com)?/profile/([^)\s?#/]+)[^)]*\)"
+)
+_TIMESTAMP_RE = re.compile(
+    r"\b(?:(?:Updated|Answered|Asked|Posted|Originally Answered)\s+)?"
+    r"(?:\d{1,2}[ymwdh]\b|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.? \d{1,2}(?:, \d{4})?)"
+)
+_UPVOTE_RE = re.compile(r"Upvote[ \t]*·[ \t]*(\d[\d.,]*[KkMm]?)|(\d[\d.,]*[KkMm]?)[ \t]+upvotes?\b", re.IGNORECASE)
+_LINK_RE = re.compile(r"\[[^\]]*\]\((https?://[^)\s]+)\)|(?<![(\[])\b(https?://[^\s)\]]+)")
+_INTERNAL_LINK_RE = re.compile(r"^https?://(?:[a-z0-9-]+\.)*(?:quora\.com|quoracdn\.net)(?:/|$)", re.IGNORECASE)
+_META_LINE_RE = re.compile(r"^(?:Follow|Upvote|Share|Related|Sponsored|Continue Reading|\d[\d.,]*[KkMm]?\s*(?:comments?|shares?|views?)\b)",
+                           re.IGNORECASE)
+_MARKDOWN_CLEAN_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)|\[([^\]]*)\]\([^)]*\)")
+
+def _count(text: str) -> int:
+    text = text.replace(",", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:].lower(), 1)
+    number = text[:-1] if multiplier > 1 else text
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        return 0
+
+def _plain(text: str) -> str:
+    """Markdown -> plain text: drop images, keep link labels, collapse whitespace"""
+    return re.sub(r"\s+", " ", _MARKDOWN_CLEAN_RE.sub(r"\1", text)).strip()
+
+def _blocks(markdown: str) -> List[Tuple[str, str, str]]:
+    """Split a page at each author link: (username, profile slug, text until the next author)"""
+    matches = list(_PROFILE_RE.finditer(markdown))
+    blocks = []
+    for i, match in enumerate(matches):
+        if blocks and blocks[-1][1] == match.group(2) and not markdown[matches[i - 1].end():match.start()].strip(" ·\n"):
+            continue  # name repeated right after the author's avatar/name link
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        username = match.group(1).replace("Profile photo for ", "").strip()
+        blocks.append((username, match.group(2), markdown[match.end():end]))
+    return blocks
+
+def _parse_block(url: str, username: str, body: str) -> Tuple[dict, float]:
+    lines = [line.strip() for line in body.splitlines() if line.strip()]
+    # The header (credential · date) is the rest of the author line or the line below it
+    header_lines = next((n for n in (1, 2) if _TIMESTAMP_RE.search(" ".join(lines[:n]))), 1)
+    header = " ".join(lines[:header_lines])
+
+    timestamp_match = _TIMESTAMP_RE.search(header)
+    upvote_match = _UPVOTE_RE.search(body)
+    upvotes = _count(next(group for group in upvote_match.groups() if group)) if upvote_match else 0
+
+    # Credential/bio is what precedes the timestamp in the header, e.g. ", CEO at Acme · Updated 2y"
+    bio = ""
+    if timestamp_match:
+        bio = _plain(header[:timestamp_match.start()]).strip(" ·,-")
+    elif lines:
+        bio = _plain(lines[0]).strip(" ·,-")
+    bio = re.sub(r"^(?:Follow\s*·?\s*)", "", bio).strip(" ·,-")
+
+    content_lines = [line for line in lines[header_lines:] if not _META_LINE_RE.match(line) and not _UPVOTE_RE.search(line)]
+    content = _plain(" ".join(content_lines))[:CONTENT_CHARS]
+
+    links = []
+    for match in _LINK_RE.finditer(body):
+        link = (match.group(1) or match.group(2)).rstrip(".,;")
+        if not _INTERNAL_LINK_RE.match(link) and link not in links:
+            links.append(link)
+
+    post_type = "question" if timestamp_match and timestamp_match.group(0).startswith("Asked") else "answer"
+    user_info = {
+        "url": url,
+        "username": username,
+        "bio": bio or "No bio available",
+        "post_type": post_type,
+        "timestamp": timestamp_match.group(0) if timestamp_match else "Unknown",
+        "upvotes": upvotes,
+        "links": links,
+        "content": content,
+    }
+    # One point per structural field we actually found
+    confidence = (1.0 + bool(timestamp_match) + bool(upvote_match) + (len(content) >= 20)) / 4
+    return user_info, confidence
+
+def parse_quora_markdown(markdown: Optional[str], url: str) -> Tuple[List[dict], float]:
+    """
+    Deterministically parse a scraped Quora page (Firecrawl markdown) into user_info rows.
+    Returns the rows and a page confidence in [0, 1]: the mean share of structural
+    fields (author, timestamp, upvotes, post text) found per post, 0 if no posts were found.
+    """
+    if not markdown:
+        return [], 0.0
+    parsed = [_parse_block(url, username, body) for username, _, body in _blocks(markdown)]
+    if not parsed:
+        return [], 0.0
+    return [user_info for user_info, _ in parsed], sum(score for _, score in parsed) / len(parsed)
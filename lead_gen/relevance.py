@@ -0,0 +1,94 @@
+import os
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# --- Configuration ---
+N_FEATURES = 2 ** 18
+MIN_RELEVANCE = float(os.getenv("LEAD_GEN_MIN_RELEVANCE", "0.05"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how i in is it me my need of on or our so "
+    "that the their them there they this to we what when where which who why will with you your".split()
+)
+_BIGRAM_PRIME = 1_000_003
+_bucket_cache: Dict[str, int] = {}
+
+def _bucket(token: str) -> int:
+    # crc32 is stable across processes, unlike hash(); tokens repeat a lot, so memoize
+    bucket = _bucket_cache.get(token)
+    if bucket is None:
+        bucket = zlib.crc32(token.encode("utf-8")) % N_FEATURES
+        if len(_bucket_cache) < 500_000:
+            _bucket_cache[token] = bucket
+    return bucket
+
+def _unigram_buckets(text: str) -> List[int]:
+    return [_bucket(w) for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+def _with_bigrams(doc_ids: np.ndarray, unigrams: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Append hashed bigrams of consecutive tokens within the same document, fully vectorized"""
+    same_doc = doc_ids[:-1] == doc_ids[1:]
+    bigrams = (unigrams[:-1][same_doc] * _BIGRAM_PRIME + unigrams[1:][same_doc] + 1) % N_FEATURES
+    return np.concatenate([doc_ids, doc_ids[:-1][same_doc]]), np.concatenate([unigrams, bigrams])
+
+def lead_text(user_info: dict) -> str:
+    """What a lead is scored on: their bio, their post and the question slug in the page URL"""
+    slug = user_info.get("url", "").rstrip("/").rsplit("/", 1)[-1].replace("-", " ")
+    return " ".join(str(part) for part in (user_info.get("bio", ""), user_info.get("content", ""), slug) if part)
+
+def score_relevance(texts: List[str], query: str) -> np.ndarray:
+    """
+    Cosine similarity between each text and the query in a hashed TF-IDF space
+    (unigrams + bigrams, sublinear tf, smoothed idf fitted on `texts`).
+    Documents are never materialized as vectors: term counts are aggregated into
+    (doc, bucket) pairs and every reduction is a NumPy bincount.
+    """
+    n_docs = len(texts)
+    if n_docs == 0:
+        return np.zeros(0)
+
+    per_doc = [_unigram_buckets(text) for text in texts]
+    lengths = np.fromiter((len(ids) for ids in per_doc), dtype=np.int64, count=n_docs)
+    if not lengths.sum():
+        return np.zeros(n_docs)
+    doc_ids, buckets = _with_bigrams(
+        np.repeat(np.arange(n_docs, dtype=np.int64), lengths),
+        np.fromiter((bucket for ids in per_doc for bucket in ids), dtype=np.int64, count=int(lengths.sum())),
+    )
+
+    keys = doc_ids * N_FEATURES + buckets
+    pairs, counts = np.unique(keys, return_counts=True)
+    rows, cols = np.divmod(pairs, N_FEATURES)
+
+    df = np.bincount(cols, minlength=N_FEATURES)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[cols]
+    doc_norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+
+    query_vector = np.zeros(N_FEATURES)
+    query_unigrams = np.asarray(_unigram_buckets(query), dtype=np.int64)
+    if query_unigrams.size == 0:
+        return np.zeros(n_docs)
+    _, query_terms = _with_bigrams(np.zeros(query_unigrams.size, dtype=np.int64), query_unigrams)
+    query_buckets, query_counts = np.unique(query_terms, return_counts=True)
+    query_vector[query_buckets] = (1.0 + np.log(query_counts)) * idf[query_buckets]
+    query_norm = np.linalg.norm(query_vector)
+
+    dots = np.bincount(rows, weights=weights * query_vector[cols], minlength=n_docs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = dots / (doc_norms * query_norm)
+    return np.nan_to_num(scores)
+
+def rank_leads(user_info_list: List[dict], query: str, threshold: float = MIN_RELEVANCE) -> Tuple[List[dict], int]:
+    """Leads scoring at least `threshold`, best first, each with a 'relevance' field; plus how many were dropped"""
+    scores = score_relevance([lead_text(user_info) for user_info in user_info_list], query)
+    order = np.argsort(-scores, kind="stable")
+    ranked = [
+        {**user_info_list[i], "relevance": round(float(scores[i]), 4)}
+        for i in order if scores[i] >= threshold
+    ]
+    return ranked, len(user_info_list) - len(ranked)
@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Configuration ---
+SEARCH_URL = "https://api.firecrawl.dev/v1/search"
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("LEAD_GEN_SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("LEAD_GEN_SEARCH_CACHE_SIZE", "256"))
+SEARCH_MAX_RETRIES = int(os.getenv("LEAD_GEN_SEARCH_RETRIES", "3"))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("LEAD_GEN_SEARCH_TIMEOUT", "60"))
+
+class SearchError(Exception):
+    """The search request failed (as opposed to succeeding with no results)"""
+
+class SearchClient:
+    """
+    Firecrawl search over one pooled, keep-alive session.
+    Connection errors, 429 and 5xx responses are retried with exponential backoff
+    (honouring Retry-After); results are cached in memory for `cache_ttl` seconds,
+    keyed on (query, limit, lang, location).
+    """
+
+    def __init__(self, api_key: str, cache_ttl: float = SEARCH_CACHE_TTL_SECONDS,
+                 max_retries: int = SEARCH_MAX_RETRIES, timeout: float = SEARCH_TIMEOUT_SECONDS):
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[Tuple, Tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),  # search has no side effects, so POST is safe to retry
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def _cached(self, key: Tuple) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[0] <= self.cache_ttl:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            self._cache.pop(key, None)
+            self.misses += 1
+            return None
+
+    def _remember(self, key: Tuple, urls: List[str]):
+        with self._lock:
+            self._cache[key] = (time.monotonic(), list(urls))
+            self._cache.move_to_end(key)
+            while len(self._cache) > SEARCH_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+    def search(self, query: str, limit: int, lang: str = "en", location: str = "United States") -> List[str]:
+        """Result URLs for `query`; raises SearchError if the request ultimately fails"""
+        key = (query.strip().lower(), limit, lang, location)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        payload = {
+            "query": query,
+            "limit": limit,
+            "lang": lang,
+            "location": location,
+            "timeout": int(self.timeout * 1000),
+        }
+        try:
+            # Leave the server its full timeout plus a margin before giving up on the socket
+            response = self.session.post(SEARCH_URL, json=payload, timeout=self.timeout + 10)
+        except requests.RequestException as e:
+            raise SearchError(f"Search request failed after retries: {e}") from e
+
+        if response.status_code != 200:
+            raise SearchError(f"Search failed with HTTP {response.status_code}: {response.text[:200]}")
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise SearchError(f"Search returned a non-JSON response: {response.text[:200]}") from e
+        if not isinstance(data, dict):
+            raise SearchError(f"Search returned an unexpected response: {str(data)[:200]}")
+        if not data.get("success"):
+            raise SearchError(f"Search was not successful: {data.get('error') or data}")
+
+        urls = [result["url"] for result in data.get("data", []) if result.get("url")]
+        self._remember(key, urls)
+        return urls
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+_clients: Dict[str, SearchClient] = {}
+_clients_lock = threading.Lock()
+
+def get_search_client(api_key: str) -> SearchClient:
+    """One client per API key and process, so the pool and cache survive Streamlit reruns"""
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = SearchClient(api_key)
+        return _clients[api_key]
@@ -0,0 +1,195 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# --- Configuration ---
+SHEETS_STATE_FILE = os.getenv("LEAD_GEN_SHEETS_STATE", "lead_gen_sheets_state.json")
+SHEETS_BATCH_ROWS = int(os.getenv("LEAD_GEN_SHEETS_BATCH_ROWS", "500"))
+SHEET_NAME = "Sheet1"
+
+# Composio action slugs; override if your Composio version names them differently
+CREATE_ACTION = os.getenv("LEAD_GEN_SHEETS_CREATE_ACTION", "GOOGLESHEETS_CREATE_GOOGLE_SHEET1")
+APPEND_ACTION = os.getenv("LEAD_GEN_SHEETS_APPEND_ACTION", "GOOGLESHEETS_SPREADSHEETS_VALUES_APPEND")
+UPDATE_ACTION = os.getenv("LEAD_GEN_SHEETS_UPDATE_ACTION", "GOOGLESHEETS_BATCH_UPDATE")
+
+LEAD_COLUMNS = ['url', 'username', 'bio', 'post_type', 'timestamp', 'upvotes', 'links']
+
+def lead_key(row: Dict) -> str:
+    return f"{row.get('url', '')}|{row.get('username', '')}"
+
+def _row_hash(values: List) -> str:
+    return hashlib.sha1(json.dumps(values, default=str).encode("utf-8")).hexdigest()[:12]
+
+def to_columns(rows: List[List]) -> List[List]:
+    """Row-major -> column-major, the layout the append call sends"""
+    return [list(column) for column in zip(*rows)] if rows else []
+
+# --- Executors ---
+class ComposioSheetsExecutor:
+    """Runs Google Sheets actions straight through the Composio toolset (no LLM in the loop)"""
+
+    def __init__(self, composio_api_key: str, entity_id: str = "default"):
+        from composio_phidata import ComposioToolSet
+        self.toolset = ComposioToolSet(api_key=composio_api_key, entity_id=entity_id)
+
+    def execute(self, action: str, params: Dict) -> Dict:
+        result = self.toolset.execute_action(action=action, params=params)
+        # Older Composio releases spell the flag "successfull"
+        if not (result.get("successful") or result.get("successfull")):
+            raise RuntimeError(f"{action} failed: {result.get('error') or result}")
+        return result.get("data", {})
+
+class LocalSheetsStub:
+    """
+    In-memory stand-in for the Composio Sheets actions, for tests and dry runs.
+    Every call is recorded in `calls`; sheet contents are kept row-major in `sheets`.
+    """
+
+    def __init__(self):
+        self.sheets: Dict[str, List[List]] = {}
+        self.calls: List[Tuple[str, Dict]] = []
+        self._lock = threading.Lock()
+
+    def execute(self, action: str, params: Dict) -> Dict:
+        with self._lock:
+            self.calls.append((action, params))
+            if action == CREATE_ACTION:
+                spreadsheet_id = f"stub-{len(self.sheets) + 1}"
+                self.sheets[spreadsheet_id] = []
+                return {"response_data": {"spreadsheetId": spreadsheet_id,
+                                          "spreadsheetUrl": f"stub://sheets/{spreadsheet_id}"}}
+            if action == APPEND_ACTION:
+                grid = self.sheets[params["spreadsheetId"]]
+                values = params["values"]
+                rows = [list(row) for row in zip(*values)] if params.get("majorDimension") == "COLUMNS" else values
+                grid.extend(rows)
+                return {"updates": {"updatedRows": len(rows)}}
+            if action == UPDATE_ACTION:
+                grid = self.sheets[params["spreadsheet_id"]]
+                start = int(params["first_cell_location"].lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")) - 1
+                for offset, row in enumerate(params["values"]):
+                    grid[start + offset] = list(row)
+                return {"updatedRows": len(params["values"])}
+            raise ValueError(f"LocalSheetsStub does not implement {action}")
+
+# --- Exporter ---
+class SheetsExporter:
+    """
+    Incremental Google Sheets export.
+    The first export of a campaign creates the sheet; later ones append only new leads
+    (column-major batches of `batch_rows`) and rewrite rows whose values changed.
+    Per-campaign state (sheet id, row number and hash per lead) lives in a JSON file and is
+    saved after every successful Sheets call, so a failed export resumes where it stopped.
+    """
+
+    def __init__(self, executor, state_file: str = SHEETS_STATE_FILE, batch_rows: int = SHEETS_BATCH_ROWS):
+        self.executor = executor
+        self.state_file = state_file
+        self.batch_rows = batch_rows
+
+    def _read_state(self) -> Dict:
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_state(self, state: Dict):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def _create_sheet(self, title: str) -> Dict:
+        data = self.executor.execute(CREATE_ACTION, {"title": title})
+        info = data.get("response_data", data)
+        spreadsheet_id = info["spreadsheetId"]
+        return {
+            "spreadsheet_id": spreadsheet_id,
+            "url": info.get("spreadsheetUrl") or f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}",
+            "next_row": 1,
+            "header_written": False,
+            "rows": {},
+        }
+
+    def _append(self, state: Dict, sheet: Dict, entries: List[Tuple[Optional[str], str, List]]):
+        """
+        Append (lead key, hash, values) entries in batches. State is saved after every batch,
+        so a failure part-way never leads to rows being appended twice on retry.
+        """
+        for start in range(0, len(entries), self.batch_rows):
+            batch = entries[start:start + self.batch_rows]
+            self.executor.execute(APPEND_ACTION, {
+                "spreadsheetId": sheet["spreadsheet_id"],
+                "range": f"{SHEET_NAME}!A{sheet['next_row']}",
+                "valueInputOption": "RAW",
+                "majorDimension": "COLUMNS",
+                "values": to_columns([values for _, _, values in batch]),
+            })
+            for offset, (key, digest, _) in enumerate(batch):
+                if key is None:
+                    sheet["header_written"] = True
+                else:
+                    sheet["rows"][key] = [sheet["next_row"] + offset, digest]
+            sheet["next_row"] += len(batch)
+            self._write_state(state)
+
+    def _update(self, state: Dict, sheet: Dict, changed: List[Tuple[int, str, str, List]]):
+        """Rewrite changed rows, one call per run of consecutive rows; hashes are saved as each call succeeds"""
+        changed.sort()
+        run: List[Tuple[int, str, str, List]] = []
+        for entry in changed + [None]:
+            if run and (entry is None or entry[0] != run[-1][0] + 1):
+                self.executor.execute(UPDATE_ACTION, {
+                    "spreadsheet_id": sheet["spreadsheet_id"],
+                    "sheet_name": SHEET_NAME,
+                    "first_cell_location": f"A{run[0][0]}",
+                    "values": [values for _, _, _, values in run],
+                })
+                for _, key, digest, _ in run:
+                    sheet["rows"][key][1] = digest
+                self._write_state(state)
+                run = []
+            if entry is not None:
+                run.append(entry)
+
+    def export(self, rows: List[Dict], campaign: str, title: Optional[str] = None) -> Dict:
+        """Upsert `rows` into the campaign's sheet. Returns {"url", "appended", "updated", "unchanged"}."""
+        state = self._read_state()
+        sheet = state.get(campaign)
+        if sheet is None:
+            # Saved straight away: a failure later in the export must not orphan the new sheet
+            sheet = state[campaign] = self._create_sheet(title or f"Quora Leads - {campaign}")
+            self._write_state(state)
+
+        new_rows: List[Tuple[Optional[str], str, List]] = []
+        if not sheet.get("header_written", True):
+            new_rows.append((None, "", list(LEAD_COLUMNS)))
+
+        appended, changed, unchanged = 0, [], 0
+        pending: Dict[str, int] = {}
+        for row in rows:
+            values = [row.get(column, "") for column in LEAD_COLUMNS]
+            key, digest = lead_key(row), _row_hash(values)
+            known = sheet["rows"].get(key)
+            if key in pending:
+                # Repeated within this export: the last version wins
+                new_rows[pending[key]] = (key, digest, values)
+            elif known is None:
+                pending[key] = len(new_rows)
+                new_rows.append((key, digest, values))
+                appended += 1
+            elif known[1] != digest:
+                changed.append((known[0], key, digest, values))
+            else:
+                unchanged += 1
+
+        if new_rows:
+            self._append(state, sheet, new_rows)
+        if changed:
+            self._update(state, sheet, changed)
+
+        print(f"📊 [Sheets] {campaign}: {appended} appended, {len(changed)} updated, {unchanged} unchanged")
+        return {"url": sheet["url"], "appended": appended, "updated": len(changed), "unchanged": unchanged}
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from extract_cache import ExtractCache, content_hash
+
+ROWS = [{"username": "jane", "bio": "founder"}]
+
+def test_content_hash_is_stable_for_schemas():
+    assert content_hash({"b": 1, "a": [1, 2]}) == content_hash({"a": [1, 2], "b": 1})
+    assert content_hash("prompt") != content_hash("prompt ")
+
+def test_entries_are_keyed_on_url_schema_and_prompt(tmp_path):
+    cache = ExtractCache(str(tmp_path / "cache.sqlite"))
+    cache.put("https://q/a", "schema", "prompt", ROWS)
+
+    assert cache.get("https://q/a", "schema", "prompt") == ROWS
+    assert cache.get("https://q/a", "schema", "other prompt") is None
+    assert cache.get("https://q/a", "other schema", "prompt") is None
+    assert cache.get("https://q/b", "schema", "prompt") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 3)
+    assert stats["hit_rate"] == 0.25
+
+def test_expired_entries_miss_and_are_dropped(tmp_path):
+    cache = ExtractCache(str(tmp_path / "cache.sqlite"), ttl_hours=0.1 / 3600)
+    cache.put("https://q/a", "s", "p", ROWS)
+    time.sleep(0.15)
+    assert cache.get("https://q/a", "s", "p") is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted_over_the_size_cap(tmp_path):
+    payload = [{"content": "x" * 400}]
+    cache = ExtractCache(str(tmp_path / "cache.sqlite"), max_mb=1000 / (1024 * 1024))
+    cache.put("https://q/a", "s", "p", payload)
+    cache.put("https://q/b", "s", "p", payload)
+    time.sleep(0.01)
+    assert cache.get("https://q/a", "s", "p") is not None  # a is now more recent than b
+
+    cache.put("https://q/c", "s", "p", payload)
+    assert cache.get("https://q/b", "s", "p") is None
+    assert cache.get("https://q/a", "s", "p") == payload
+    assert cache.get("https://q/c", "s", "p") == payload
+
+def test_cache_survives_reopening_and_clear_resets(tmp_path):
+    db_file = str(tmp_path / "cache.sqlite")
+    ExtractCache(db_file).put("https://q/a", "s", "p", ROWS)
+    cache = ExtractCache(db_file)
+    assert cache.get("https://q/a", "s", "p") == ROWS
+    cache.clear()
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (0, 0, 0)
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("firecrawl")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import extraction
+from extract_cache import ExtractCache, content_hash
+
+PARSEABLE = (
+    "[Jane Doe](https://www.quora.com/profile/Jane-Doe)\n\nFounder at Acme · 2y\n\n"
+    "We built a support chatbot last year and it paid for itself in three months.\n\n1.2K views\n\nUpvote · 12\n"
+)
+
+class FakeFirecrawl:
+    """Stand-in for FirecrawlApp that records every call"""
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, api_key=None):
+        pass
+
+    def _record(self, *call):
+        with self.lock:
+            self.calls.append(call)
+
+    def scrape(self, url, formats):
+        self._record("scrape", url)
+        return {"markdown": PARSEABLE if "parseable" in url else "nothing to parse"}
+
+    def extract(self, urls, prompt, schema):
+        self._record("extract", tuple(urls), content_hash(prompt), content_hash(schema))
+        if "broken" in urls[0]:
+            raise RuntimeError("extract failed")
+        return {"success": True, "data": {"interactions": [{"username": "single", "bio": "b"}]}}
+
+    def start_extract(self, urls, prompt, schema):
+        self._record("start_extract", tuple(urls), content_hash(schema))
+        return {"id": "job-1"}
+
+    def get_extract_status(self, job_id):
+        self._record("status", job_id)
+        urls = [url for call in self.calls if call[0] == "start_extract" for url in call[1]]
+        return {"status": "completed",
+                "data": {"interactions": [{"username": "batched", "source_url": url} for url in urls]}}
+
+@pytest.fixture
+def app(monkeypatch):
+    FakeFirecrawl.calls = []
+    monkeypatch.setattr(extraction, "FirecrawlApp", FakeFirecrawl)
+    monkeypatch.setattr(extraction, "BATCH_POLL_MIN_SECONDS", 0.01)
+    return FakeFirecrawl
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractCache(str(tmp_path / "cache.sqlite"))
+
+def by_url(results):
+    return {result["url"]: result for result in results}
+
+def calls(app, kind):
+    return [call for call in app.calls if call[0] == kind]
+
+URLS = ["https://www.quora.com/a", "https://www.quora.com/b"]
+
+def test_concurrent_path_isolates_failures(app):
+    results = by_url(extraction.extract_concurrently(URLS + ["https://www.quora.com/broken"], "key"))
+    assert [user["username"] for user in results["https://www.quora.com/a"]["user_info"]] == ["single"]
+    assert results["https://www.quora.com/broken"]["error"] == "extract failed"
+    assert results["https://www.quora.com/broken"]["user_info"] == []
+
+def test_concurrent_results_are_cached_under_the_single_page_key(app, cache):
+    first = by_url(extraction.extract_concurrently(URLS, "key", cache=cache))
+    assert {result["method"] for result in first.values()} == {"llm"}
+    assert {call[2:] for call in calls(app, "extract")} == {(extraction.PROMPT_HASH, extraction.SCHEMA_HASH)}
+    for url in URLS:
+        assert cache.get(url, extraction.SCHEMA_HASH, extraction.PROMPT_HASH) is not None
+        assert cache.get(url, extraction.BATCH_SCHEMA_HASH, extraction.BATCH_PROMPT_HASH) is None
+
+    app.calls = []
+    second = by_url(extraction.extract_concurrently(URLS, "key", cache=cache))
+    assert all(result["cached"] for result in second.values())
+    assert app.calls == []
+
+def test_changed_prompt_misses_the_cache(app, cache, monkeypatch):
+    list(extraction.extract_concurrently(URLS, "key", cache=cache))
+    monkeypatch.setitem(extraction.CACHE_KEYS, "llm", (extraction.SCHEMA_HASH, content_hash("a new prompt")))
+    app.calls = []
+    results = list(extraction.extract_concurrently(URLS, "key", cache=cache))
+    assert not any(result.get("cached") for result in results)
+    assert len(calls(app, "extract")) == 2
+
+def test_batch_path_maps_results_back_and_uses_its_own_key(app, cache):
+    results = by_url(extraction.extract_batched(URLS, "key", shard_size=5, cache=cache))
+    assert len(calls(app, "start_extract")) == 1
+    assert calls(app, "start_extract")[0][2] == extraction.BATCH_SCHEMA_HASH
+    for url in URLS:
+        assert results[url]["method"] == "batch"
+        assert [user["url"] for user in results[url]["user_info"]] == [url]
+        assert cache.get(url, extraction.BATCH_SCHEMA_HASH, extraction.BATCH_PROMPT_HASH) is not None
+        assert cache.get(url, extraction.SCHEMA_HASH, extraction.PROMPT_HASH) is None
+
+    # Batch entries never satisfy a single-page run, and vice versa
+    app.calls = []
+    list(extraction.extract_concurrently(URLS, "key", cache=cache))
+    assert len(calls(app, "extract")) == 2
+    app.calls = []
+    assert all(result["cached"] for result in extraction.extract_batched(URLS, "key", cache=cache))
+    assert app.calls == []
+
+def test_parsed_results_are_only_served_to_parse_first_runs(app, cache):
+    urls = ["https://www.quora.com/parseable", "https://www.quora.com/plain"]
+    results = by_url(extraction.extract_concurrently(urls, "key", cache=cache, parse_threshold=0.5))
+    assert results[urls[0]]["method"] == "parsed"
+    assert results[urls[1]]["method"] == "llm"
+    assert [call[1] for call in calls(app, "extract")] == [(urls[1],)]
+
+    # LLM-only run: the parsed page goes to the LLM, the LLM page is a hit
+    app.calls = []
+    results = by_url(extraction.extract_concurrently(urls, "key", cache=cache))
+    assert results[urls[0]]["method"] == "llm" and not results[urls[0]].get("cached")
+    assert results[urls[1]]["cached"]
+
+    # Parse-first batch run: the parsed entry is reused and that page is not scraped again
+    app.calls = []
+    results = by_url(extraction.extract_batched(urls, "key", cache=cache, parse_threshold=0.5))
+    assert results[urls[0]]["cached"]
+    assert ("scrape", urls[0]) not in app.calls
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lead_store import LeadStore
+
+def lead(url, username, **fields):
+    return {"url": url, "username": username, "bio": "bio", "post_type": "answer", "timestamp": "2y",
+            "upvotes": 1, "links": [], **fields}
+
+def test_upsert_returns_only_new_leads_and_refreshes_known_ones(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite"))
+    first = [lead("https://q/a", "jane"), lead("https://q/a", "raj")]
+    assert store.upsert_leads(first, campaign="ai") == first
+
+    again = [lead("https://q/a", "jane", upvotes=40, links=["https://acme.io"]), lead("https://q/b", "jane")]
+    assert store.upsert_leads(again, campaign="ai") == again[1:]
+
+    rows = {(row["url"], row["username"]): row for row in store.find(campaign="ai")}
+    assert len(rows) == 3
+    assert rows[("https://q/a", "jane")]["upvotes"] == 40
+    assert rows[("https://q/a", "jane")]["links"] == ["https://acme.io"]
+    assert store.find(campaign="other") == []
+    assert store.stats() == {"leads": 3, "pages": 0}
+
+def test_only_pages_that_yielded_leads_are_fresh(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite"))
+    store.record_crawl("https://q/a", 3)
+    store.record_crawl("https://q/empty", 0)
+
+    assert store.fresh_urls(["https://q/a", "https://q/empty", "https://q/new"]) == {"https://q/a"}
+    assert store.fresh_urls([]) == set()
+
+def test_stale_crawls_are_not_fresh(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite"))
+    store.record_crawl("https://q/a", 3)
+    old = (datetime.now() - timedelta(hours=30)).isoformat()
+    with sqlite3.connect(store.db_file) as conn:
+        conn.execute("UPDATE crawls SET crawled_at = ?", (old,))
+
+    assert store.fresh_urls(["https://q/a"], max_age_hours=24) == set()
+    assert store.fresh_urls(["https://q/a"], max_age_hours=48) == {"https://q/a"}
+
+def test_find_since_filters_on_first_seen(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite"))
+    store.upsert_leads([lead("https://q/a", "jane")], campaign="ai")
+    future = (datetime.now() + timedelta(minutes=1)).isoformat()
+    assert store.find(since=future) == []
+    assert len(store.find(since="2000-01-01")) == 1
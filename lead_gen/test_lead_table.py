@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lead_table import TABLE_COLUMNS, build_lead_table, iter_csv_chunks, to_records
+from sheets_export import LEAD_COLUMNS
+
+LEADS = [
+    {"url": "https://q/a", "username": "jane", "upvotes": "12", "links": ["https://a.io", "https://b.io"],
+     "relevance": 0.5},
+    {"url": "https://q/b", "bio": None},
+]
+
+def test_table_columns_extend_the_sheet_columns():
+    assert TABLE_COLUMNS[:len(LEAD_COLUMNS)] == LEAD_COLUMNS
+
+def test_build_lead_table_fills_defaults_and_types():
+    df = build_lead_table(LEADS)
+    assert list(df.columns) == TABLE_COLUMNS
+    assert df["upvotes"].tolist() == [12, 0]
+    assert df.loc[1, "username"] == "Unknown"
+    assert df.loc[1, "links"] == []
+    assert to_records(df)[0]["links"] == "https://a.io, https://b.io"
+
+def test_csv_chunks_write_the_header_once():
+    chunks = list(iter_csv_chunks(build_lead_table(LEADS * 3), chunk_rows=2))
+    assert len(chunks) == 3
+    text = b"".join(chunks).decode("utf-8")
+    assert text.count("url,username") == 1
+    assert len(text.strip().splitlines()) == 7
+    assert list(iter_csv_chunks(build_lead_table([])))[0].decode("utf-8").strip() == ",".join(TABLE_COLUMNS)
@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from quora_parser import parse_quora_markdown
+
+PAGE = """
+# How do I automate customer support?
+
+[![Profile photo for Jane Doe](https://qph.cf2.quoracdn.net/jane.jpg)](https://www.quora.com/profile/Jane-Doe)
+
+[Jane Doe](https://www.quora.com/profile/Jane-Doe)
+
+Founder at Acme · Updated 2y
+
+We built a support chatbot last year and it paid for itself in three months. See [our write-up](https://acme.io/blog).
+
+1.2K views
+
+Upvote · 1.5K
+
+Share
+
+[Raj Patel](/profile/Raj-Patel)
+
+Asked Mar 3, 2023
+
+Is there a cheap chatbot for a five person team? https://example.com/pricing.
+
+12 comments
+"""
+
+def test_parses_each_author_block():
+    rows, confidence = parse_quora_markdown(PAGE, "https://www.quora.com/q")
+    assert [row["username"] for row in rows] == ["Jane Doe", "Raj Patel"]
+
+    jane, raj = rows
+    assert jane["bio"] == "Founder at Acme"
+    assert jane["timestamp"] == "Updated 2y"
+    assert jane["post_type"] == "answer"
+    assert jane["upvotes"] == 1500
+    assert jane["links"] == ["https://acme.io/blog"]
+    assert raj["post_type"] == "question"
+    assert raj["timestamp"] == "Asked Mar 3, 2023"
+    assert raj["links"] == ["https://example.com/pricing"]
+    # Jane has every structural field, Raj has no upvotes
+    assert confidence == (1.0 + 0.75) / 2
+
+def test_meta_lines_with_abbreviated_counts_are_not_content():
+    jane, raj = parse_quora_markdown(PAGE, "https://www.quora.com/q")[0]
+    assert jane["content"] == (
+        "We built a support chatbot last year and it paid for itself in three months. See our write-up."
+    )
+    assert "views" not in jane["content"] and "Share" not in jane["content"]
+    assert raj["content"] == "Is there a cheap chatbot for a five person team? https://example.com/pricing."
+
+def test_content_is_truncated():
+    page = "[A](/profile/A)\n\n2y\n\n" + "word " * 200
+    (row,), _ = parse_quora_markdown(page, "u")
+    assert len(row["content"]) == 300
+
+def test_pages_without_authors_have_zero_confidence():
+    assert parse_quora_markdown(None, "u") == ([], 0.0)
+    assert parse_quora_markdown("", "u") == ([], 0.0)
+    assert parse_quora_markdown("Just some text with [a link](https://a.io)", "u") == ([], 0.0)
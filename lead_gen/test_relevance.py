@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from relevance import lead_text, rank_leads, score_relevance
+
+QUERY = "companies looking for an AI chatbot for customer support"
+LEADS = [
+    {"url": "https://www.quora.com/What-is-the-best-pizza", "bio": "Chef", "content": "Neapolitan dough needs time."},
+    {"url": "https://www.quora.com/How-do-I-automate-customer-support", "bio": "Head of Support at Acme",
+     "content": "We are evaluating an AI chatbot for customer support tickets."},
+    {"url": "https://www.quora.com/Is-AI-useful", "bio": "Student", "content": "AI is useful in many areas."},
+]
+
+def test_lead_text_includes_question_slug():
+    assert lead_text(LEADS[0]) == "Chef Neapolitan dough needs time. What is the best pizza"
+
+def test_most_relevant_lead_scores_highest():
+    scores = score_relevance([lead_text(lead) for lead in LEADS], QUERY)
+    assert scores.shape == (3,)
+    assert scores.argmax() == 1
+    assert scores[0] == 0
+    assert np.all((scores >= 0) & (scores <= 1 + 1e-9))
+
+def test_identical_text_scores_one():
+    assert score_relevance(["ai chatbot support"], "AI chatbot support")[0] == pytest.approx(1.0)
+
+def test_empty_inputs_score_zero():
+    assert score_relevance([], QUERY).shape == (0,)
+    assert score_relevance(["", "the and of"], QUERY).tolist() == [0.0, 0.0]
+    assert score_relevance(["ai chatbot"], "the of and").tolist() == [0.0]
+
+def test_rank_leads_orders_filters_and_annotates():
+    ranked, dropped = rank_leads(LEADS, QUERY, threshold=0.05)
+    assert [lead["bio"] for lead in ranked] == ["Head of Support at Acme", "Student"]
+    assert dropped == 1
+    assert ranked[0]["relevance"] > ranked[1]["relevance"]
+    assert "relevance" not in LEADS[1]
+
+    everyone, dropped = rank_leads(LEADS, QUERY, threshold=0.0)
+    assert len(everyone) == 3 and dropped == 0
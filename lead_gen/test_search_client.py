@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import search_client
+from search_client import SearchClient, SearchError, get_search_client
+
+class FakeResponse:
+    def __init__(self, status_code=200, json_data=None, text=""):
+        self.status_code = status_code
+        self._json = json_data
+        self.text = text
+
+    def json(self):
+        if self._json is None:
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return self._json
+
+def client_returning(monkeypatch, *responses):
+    client = SearchClient("key")
+    posted = []
+
+    def post(url, json, timeout):
+        posted.append(json)
+        return responses[min(len(posted), len(responses)) - 1]
+
+    monkeypatch.setattr(client.session, "post", post)
+    return client, posted
+
+def test_results_are_cached_per_query(monkeypatch):
+    ok = FakeResponse(json_data={"success": True, "data": [{"url": "https://q/a"}, {"title": "no url"}]})
+    client, posted = client_returning(monkeypatch, ok)
+
+    assert client.search("AI chatbots", limit=5) == ["https://q/a"]
+    assert client.search("  ai chatbots ", limit=5) == ["https://q/a"]
+    assert client.search("AI chatbots", limit=10) == ["https://q/a"]
+    assert len(posted) == 2
+    assert client.stats()["hits"] == 1
+
+def test_non_json_body_raises_search_error(monkeypatch):
+    client, _ = client_returning(monkeypatch, FakeResponse(text="<html>gateway</html>"))
+    with pytest.raises(SearchError, match="non-JSON"):
+        client.search("query", limit=5)
+
+def test_unsuccessful_or_failed_responses_raise_and_are_not_cached(monkeypatch):
+    client, posted = client_returning(
+        monkeypatch,
+        FakeResponse(status_code=402, text="payment required"),
+        FakeResponse(json_data={"success": False, "error": "bad query"}),
+        FakeResponse(json_data=["not", "a", "dict"]),
+        FakeResponse(json_data={"success": True, "data": []}),
+    )
+    with pytest.raises(SearchError, match="HTTP 402"):
+        client.search("query", limit=5)
+    with pytest.raises(SearchError, match="bad query"):
+        client.search("query", limit=5)
+    with pytest.raises(SearchError):
+        client.search("query", limit=5)
+    assert client.search("query", limit=5) == []
+    assert len(posted) == 4
+
+def test_concurrent_callers_share_one_client(monkeypatch):
+    created = []
+    original_init = SearchClient.__init__
+
+    def slow_init(self, api_key, *args, **kwargs):
+        time.sleep(0.05)
+        created.append(api_key)
+        original_init(self, api_key, *args, **kwargs)
+
+    monkeypatch.setattr(SearchClient, "__init__", slow_init)
+    monkeypatch.setattr(search_client, "_clients", {})
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(get_search_client("key"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == ["key"]
+    assert len({id(client) for client in clients}) == 1
+    assert get_search_client("other key") is not clients[0]
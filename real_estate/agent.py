@@ -51,14 +51,14 @@ class PropertyFindingAgent:
         )
         self.firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
 
-    def find_properties(
-        self, 
+    def fetch_listings(
+        self,
         city: str,
         max_price: float,
         property_category: str = "Residential",
         property_type: str = "Flat"
-    ) -> str:
-        """Find and analyze properties based on user preferences"""
+    ) -> List[Dict]:
+        """Crawl listing portals and return the raw extracted properties"""
         formatted_location = city.lower()
         
         urls = [
@@ -96,8 +96,27 @@ class PropertyFindingAgent:
             properties = []
             
         print("Processed Properties:", properties)
+        return properties
 
-        
+    def find_properties(
+        self, 
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat"
+    ) -> str:
+        """Find and analyze properties based on user preferences"""
+        properties = self.fetch_listings(city, max_price, property_category, property_type)
+        return self.analyze_properties(properties, max_price, property_category, property_type)
+
+    def analyze_properties(
+        self,
+        properties: List[Dict],
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat"
+    ) -> str:
+        """Have the LLM pick and compare the best matching properties"""
         analysis = self.agent.run(
             f"""As a real estate expert, analyze these properties and market trends:
 
@@ -13,30 +13,43 @@ except ImportError:
     sys.path.append(os.path.join(os.getcwd(), 'skylix_portfolio', 'real_estate'))
     from agent import PropertyFindingAgent
 
+from saved_searches import SavedSearchStore, listing_key
+
 # Mock WhatsApp Interface
 class WhatsAppSimulator:
-    def __init__(self):
+    def __init__(self, agent=None, typing_delay: float = 0.5, input_fn=None, saved_searches=None):
+        """
+        agent, input_fn and typing_delay are overridable so scripted replays
+        (see replay.py) can drive the same conversation without keys or delays.
+        """
         load_dotenv()
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.firecrawl_key = os.getenv("FIRECRAWL_API_KEY")
+        self.typing_delay = typing_delay
+        self.input_fn = input_fn or input
         
-        if not self.api_key or not self.firecrawl_key:
-            print("⚠️  Error: Missing API keys. Please check your .env file.")
-            print("Required: OPENAI_API_KEY, FIRECRAWL_API_KEY")
-            sys.exit(1)
+        if agent is None:
+            self.api_key = os.getenv("OPENAI_API_KEY")
+            self.firecrawl_key = os.getenv("FIRECRAWL_API_KEY")
             
-        self.agent = PropertyFindingAgent(
-            firecrawl_api_key=self.firecrawl_key,
-            openai_api_key=self.api_key
-        )
+            if not self.api_key or not self.firecrawl_key:
+                print("⚠️  Error: Missing API keys. Please check your .env file.")
+                print("Required: OPENAI_API_KEY, FIRECRAWL_API_KEY")
+                sys.exit(1)
+                
+            agent = PropertyFindingAgent(
+                firecrawl_api_key=self.firecrawl_key,
+                openai_api_key=self.api_key
+            )
+        self.agent = agent
+        self.saved_searches = saved_searches or SavedSearchStore()
         self.user_data = {}
 
     def send_message(self, text):
         print(f"\n🤖 Skylix Agent: {text}")
-        time.sleep(0.5)  # Simulate typing delay
+        if self.typing_delay:
+            time.sleep(self.typing_delay)  # Simulate typing delay
 
     def receive_message(self):
-        return input("\n👤 You: ").strip()
+        return self.input_fn("\n👤 You: ").strip()
 
     def start_conversation(self):
         print("\n" + "="*40)
@@ -73,11 +86,16 @@ class WhatsAppSimulator:
 
         # Call the actual agent
         try:
-            results = self.agent.find_properties(
+            listings = self.agent.fetch_listings(
                 city=self.user_data['city'],
                 max_price=self.user_data['budget'],
                 property_type=self.user_data['type']
             )
+            results = self.agent.analyze_properties(
+                listings,
+                max_price=self.user_data['budget'],
+                property_type=self.user_data['type']
+            )
             
             self.send_message("Here is what I found for you! 👇")
             print("\n" + "-"*40)
@@ -90,7 +108,15 @@ class WhatsAppSimulator:
             if 'yes' in response.lower():
                 self.send_message("Great! 📅 I've marked this as a hot lead. Our human agent will call you within 10 minutes to confirm the time.")
             else:
-                self.send_message("No problem! I'll keep looking for better matches and WhatsApp you if something comes up. 👋")
+                self.send_message("No problem! What's your WhatsApp number? I'll keep looking for better matches and WhatsApp you if something comes up.")
+                phone = self.receive_message()
+                if phone:
+                    self.saved_searches.save(
+                        phone,
+                        self.user_data,
+                        seen_listings=[listing_key(listing) for listing in listings]
+                    )
+                self.send_message("Saved! 🔔 You'll hear from us as soon as a new match is listed. 👋")
 
         except Exception as e:
             self.send_message(f"Oops! I encountered a glitch: {str(e)}")
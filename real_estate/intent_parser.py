@@ -0,0 +1,177 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from saved_searches import parse_price_to_crores
+
+# --- Configuration ---
+SLOT_FILLER_MODEL = os.getenv("SLOT_FILLER_MODEL", "gpt-4o-mini")
+SLOT_CACHE_SIZE = int(os.getenv("SLOT_CACHE_SIZE", "1024"))
+
+KNOWN_CITIES = {
+    "bangalore": "Bangalore", "bengaluru": "Bangalore", "mumbai": "Mumbai", "bombay": "Mumbai",
+    "pune": "Pune", "delhi": "Delhi", "new delhi": "Delhi", "gurgaon": "Gurgaon", "gurugram": "Gurgaon",
+    "noida": "Noida", "hyderabad": "Hyderabad", "chennai": "Chennai", "kolkata": "Kolkata",
+    "ahmedabad": "Ahmedabad", "navi mumbai": "Navi Mumbai", "thane": "Thane", "kochi": "Kochi",
+    "jaipur": "Jaipur", "chandigarh": "Chandigarh", "goa": "Goa", "mysore": "Mysore",
+}
+
+MENU_CHOICES = {"1": "find", "2": "contact", "3": "company"}
+
+# One alternation, one finditer pass: whichever rule matches at each position wins.
+# Property types come first so "3BHK" is never read as a price, and a budget needs
+# a unit or a budget word ("under 2", "80 lakh") to count. Only known cities are
+# recognised here; anything else is asked for ("in Finding a flat" is not a city).
+_PRICE_UNIT = r"\s*(?:crores?|cr\b|lakhs?|lacs?|l\b)"
+_CURRENCY = r"(?:(?:₹|\brs\.?|\binr)\s*)?"
+_CITY_ALTERNATION = "|".join(sorted((re.escape(city) for city in KNOWN_CITIES), key=len, reverse=True))
+_SLOT_RE = re.compile(
+    rf"""
+    (?P<house>\b(?:individual\ house|independent\ house|house|villa|bungalow|row\ ?house)s?\b)
+    | (?P<flat>\b(?:flat|apartment|condo|penthouse|studio)s?\b|\b\d\s*bhk\b)
+    | (?P<budget>
+        (?:(?P<budget_word>\b(?:under|below|upto|up\ to|max(?:imum)?|budget(?:\ of|\ is)?|within|around))\s*)?
+        {_CURRENCY}(?P<low>\d+(?:\.\d+)?)(?P<low_unit>{_PRICE_UNIT})?
+        (?:\s*(?:-|to)\s*{_CURRENCY}(?P<high>\d+(?:\.\d+)?))?
+        (?P<budget_unit>{_PRICE_UNIT})?
+      )
+    | \b(?P<city>{_CITY_ALTERNATION})\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_MENU_RE = re.compile(r"^\s*([1-3])\s*[.)]?\s*$")
+_MENU_KEYWORDS = {
+    "find": re.compile(r"\b(find|search|buy|looking|property|properties)\b", re.IGNORECASE),
+    "contact": re.compile(r"\b(contact|agent|call|talk|human)\b", re.IGNORECASE),
+    "company": re.compile(r"\b(company|about|address|hours|who are you)\b", re.IGNORECASE),
+}
+
+def normalize_message(message: str) -> str:
+    return re.sub(r"[^\w₹.\s]", "", re.sub(r"\s+", " ", message.strip().lower()))
+
+def _budget_crores(match: re.Match) -> Optional[float]:
+    """Upper end of a budget, each end in its own unit: '50 lakh to 1 crore' -> 1.0, '80-95 lakh' -> 0.95"""
+    low_unit = match.group("low_unit") or match.group("budget_unit") or ""
+    high_unit = match.group("budget_unit") or low_unit
+    amounts = [parse_price_to_crores(match.group("low") + low_unit)]
+    if match.group("high"):
+        amounts.append(parse_price_to_crores(match.group("high") + high_unit))
+    return max((amount for amount in amounts if amount is not None), default=None)
+
+def parse_slots(message: str) -> Dict:
+    """Rule tier: pull city, budget (in crores) and property type out of free text in one pass"""
+    slots = {}
+    for match in _SLOT_RE.finditer(message):
+        if match.group("house"):
+            slots["type"] = "Individual House"
+        elif match.group("flat"):
+            slots.setdefault("type", "Flat")
+        elif match.group("budget"):
+            if match.group("budget_word") or match.group("low_unit") or match.group("budget_unit"):
+                slots.setdefault("budget", _budget_crores(match))
+        elif match.group("city"):
+            slots["city"] = KNOWN_CITIES[match.group("city").lower()]
+    return {key: value for key, value in slots.items() if value}
+
+def parse_menu_choice(message: str) -> Optional[str]:
+    """Exact '1'/'2'/'3' or a menu keyword; a digit inside a sentence doesn't count"""
+    match = _MENU_RE.match(message)
+    if match:
+        return MENU_CHOICES[match.group(1)]
+    for choice, pattern in _MENU_KEYWORDS.items():
+        if pattern.search(message):
+            return choice
+    return None
+
+class LLMSlotFiller:
+    """
+    LLM tier, only consulted when the rules find nothing.
+    Results (including "nothing found") are cached by normalized message.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = SLOT_FILLER_MODEL, cache_size: int = SLOT_CACHE_SIZE):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model = model
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._client = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    def fill(self, message: str) -> Dict:
+        key = normalize_message(message)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return dict(self._cache[key])
+            self.misses += 1
+
+        slots = self._call_llm(message)
+
+        with self._lock:
+            self._cache[key] = slots
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(slots)
+
+    def _call_llm(self, message: str) -> Dict:
+        if not self.api_key:
+            return {}
+        try:
+            completion = self._get_client().chat.completions.create(
+                model=self.model,
+                temperature=0,
+                max_tokens=100,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": (
+                        "Extract property search details from an Indian real estate WhatsApp message. "
+                        "Reply with JSON: {\"city\": string|null, \"budget_crores\": number|null, "
+                        "\"type\": \"Flat\"|\"Individual House\"|null}. Convert lakhs to crores (80 lakh = 0.8). "
+                        "Use null for anything not stated."
+                    )},
+                    {"role": "user", "content": message},
+                ],
+            )
+            data = json.loads(completion.choices[0].message.content or "{}")
+        except Exception as e:
+            print(f"⚠️ [Intent] LLM slot filling failed: {e}")
+            return {}
+
+        slots = {
+            "city": data.get("city"),
+            "budget": parse_price_to_crores(data.get("budget_crores")),
+            "type": data.get("type") if data.get("type") in ("Flat", "Individual House") else None,
+        }
+        return {key: value for key, value in slots.items() if value}
+
+class IntentParser:
+    """Tiered understanding: precompiled rules first, cached LLM slot filler as fallback"""
+
+    def __init__(self, slot_filler: Optional[LLMSlotFiller] = None):
+        self.slot_filler = slot_filler if slot_filler is not None else LLMSlotFiller()
+
+    def parse(self, message: str, use_llm: bool = True) -> Dict:
+        slots = parse_slots(message)
+        if slots:
+            return {"slots": slots, "source": "rules"}
+
+        # Short replies ("ok", "thanks") aren't worth an LLM round trip
+        if use_llm and len(message.split()) >= 3:
+            slots = self.slot_filler.fill(message)
+            if slots:
+                return {"slots": slots, "source": "llm"}
+
+        return {"slots": {}, "source": "none"}
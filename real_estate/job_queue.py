@@ -0,0 +1,233 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# --- Configuration ---
+JOB_QUEUE_DB = os.getenv("JOB_QUEUE_DB", "search_jobs.db")
+DEFAULT_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A failed job waits base * 2^(attempts-1) seconds before it can be claimed again
+DEFAULT_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+
+# Job lifecycle: pending -> running -> done | failed
+# A running job whose lease has expired is treated as pending again, so a crash
+# or redeploy mid-search never loses the job. A job that failed is pending again
+# but only becomes claimable at available_at, after an exponential backoff.
+STATUSES = ("pending", "running", "done", "failed")
+
+
+class SearchJobQueue:
+    """SQLite-backed queue of property searches with leases"""
+
+    def __init__(self, db_file: str = JOB_QUEUE_DB, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retry_backoff_seconds: float = DEFAULT_RETRY_BACKOFF_SECONDS):
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        self.ensure_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ensure_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_jobs (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    payload TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_until REAL,
+                    last_error TEXT,
+                    available_at REAL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(search_jobs)")}
+            if "available_at" not in columns:
+                conn.execute("ALTER TABLE search_jobs ADD COLUMN available_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_jobs_status ON search_jobs (status, lease_until)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_jobs_user ON search_jobs (user_id, status)")
+
+    def enqueue(self, user_id: str, payload: Optional[Dict] = None) -> str:
+        """Add a search for this user, reusing an unfinished job if one exists"""
+        now = datetime.now().isoformat()
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT id FROM search_jobs WHERE user_id = ? AND status IN ('pending', 'running')",
+                (user_id,),
+            ).fetchone()
+            if existing:
+                conn.execute("COMMIT")
+                return existing["id"]
+
+            job_id = f"JOB-{uuid.uuid4().hex[:12]}"
+            conn.execute(
+                "INSERT INTO search_jobs (id, user_id, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?)",
+                (job_id, user_id, json.dumps(payload or {}), now, now),
+            )
+            conn.execute("COMMIT")
+        print(f"📥 [Queue] Enqueued {job_id} for {user_id}")
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Lease the oldest runnable job to this worker.
+        Runnable means pending and past its retry backoff, or running with an expired lease (its worker died).
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT * FROM search_jobs
+                WHERE (status = 'pending' AND (available_at IS NULL OR available_at <= ?))
+                   OR (status = 'running' AND lease_until < ?)
+                ORDER BY created_at
+                LIMIT 1
+                """,
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            attempts = row["attempts"] + 1
+            if attempts > self.max_attempts:
+                conn.execute(
+                    "UPDATE search_jobs SET status = 'failed', lease_owner = NULL, lease_until = NULL, "
+                    "last_error = COALESCE(last_error, 'lease expired too many times'), updated_at = ? WHERE id = ?",
+                    (datetime.now().isoformat(), row["id"]),
+                )
+                conn.execute("COMMIT")
+                job = dict(row)
+                job["status"] = "failed"
+                job["attempts"] = row["attempts"]
+                job["payload"] = json.loads(row["payload"] or "{}")
+                return job
+
+            conn.execute(
+                "UPDATE search_jobs SET status = 'running', attempts = ?, lease_owner = ?, lease_until = ?, "
+                "updated_at = ? WHERE id = ?",
+                (attempts, self.worker_id, now + self.lease_seconds, datetime.now().isoformat(), row["id"]),
+            )
+            conn.execute("COMMIT")
+
+        job = dict(row)
+        job["status"] = "running"
+        job["attempts"] = attempts
+        job["payload"] = json.loads(row["payload"] or "{}")
+        return job
+
+    def extend_lease(self, job_id: str) -> bool:
+        """Heartbeat for long searches so the job is not reclaimed while still running"""
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE search_jobs SET lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, datetime.now().isoformat(), job_id, self.worker_id),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id: str):
+        self._finish(job_id, "done", None)
+
+    def fail(self, job_id: str, error: str, retry: bool = True) -> str:
+        """
+        Release a job after an error; it is retried after an exponential backoff
+        until max_attempts is reached. Returns the job's new status.
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT attempts FROM search_jobs WHERE id = ?", (job_id,)).fetchone()
+        if retry and row and row["attempts"] < self.max_attempts:
+            delay = self.retry_backoff_seconds * 2 ** max(row["attempts"] - 1, 0)
+            self._finish(job_id, "pending", error, available_at=time.time() + delay)
+            return "pending"
+        self._finish(job_id, "failed", error)
+        return "failed"
+
+    def _finish(self, job_id: str, status: str, error: Optional[str], available_at: Optional[float] = None):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE search_jobs SET status = ?, lease_owner = NULL, lease_until = NULL, available_at = ?, "
+                "last_error = COALESCE(?, last_error), updated_at = ? WHERE id = ?",
+                (status, available_at, error, datetime.now().isoformat(), job_id),
+            )
+
+    def unfinished_users(self) -> List[str]:
+        """Users with a search still pending or in progress"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT user_id FROM search_jobs WHERE status IN ('pending', 'running')"
+            ).fetchall()
+        return [row["user_id"] for row in rows]
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        query = "SELECT * FROM search_jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        jobs = []
+        now = time.time()
+        for row in rows:
+            job = dict(row)
+            job["payload"] = json.loads(job["payload"] or "{}")
+            if job["lease_until"]:
+                job["lease_expires_in"] = round(job["lease_until"] - now, 1)
+            if job["available_at"] and job["status"] == "pending":
+                job["retry_in"] = round(max(job["available_at"] - now, 0), 1)
+            jobs.append(job)
+        return jobs
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM search_jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def purge_finished(self, older_than_days: int = 7) -> int:
+        """Drop done/failed jobs older than the given age"""
+        cutoff = datetime.fromtimestamp(time.time() - older_than_days * 86400).isoformat()
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "DELETE FROM search_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (cutoff,),
+            )
+            return cur.rowcount
@@ -1,5 +1,7 @@
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,6 +11,10 @@ WHATSAPP_VERSION = "v17.0"
 PHONE_NUMBER_ID = os.getenv("META_PHONE_NUMBER_ID")
 ACCESS_TOKEN = os.getenv("META_ACCESS_TOKEN")
 VERIFY_TOKEN = os.getenv("META_VERIFY_TOKEN")
+BATCH_SEND_WORKERS = int(os.getenv("WHATSAPP_BATCH_WORKERS", "4"))
+
+# Shared session so repeated sends reuse the TLS connection to graph.facebook.com
+_session = requests.Session()
 
 def send_whatsapp_message(to_number: str, text: str):
     """
@@ -35,7 +41,7 @@ def send_whatsapp_message(to_number: str, text: str):
     print(f"📤 Attempting to send message to {to_number}: {text}")
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        response = _session.post(url, headers=headers, json=data, timeout=30)
         if response.status_code != 200:
             print(f"❌ Meta API Error: {response.status_code}")
             print(f"Response Body: {response.text}")
@@ -47,3 +53,15 @@ def send_whatsapp_message(to_number: str, text: str):
         if 'response' in locals() and response is not None:
              print("Response Body:", response.text)
         return False
+
+def send_whatsapp_messages(messages: List[Tuple[str, str]], max_workers: int = BATCH_SEND_WORKERS) -> Dict[str, bool]:
+    """
+    Sends many (to_number, text) messages over the shared session with bounded concurrency.
+    Returns {to_number: sent_ok}.
+    """
+    if not messages:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(messages)))) as pool:
+        results = pool.map(lambda message: send_whatsapp_message(*message), messages)
+        return {to_number: ok for (to_number, _), ok in zip(messages, results)}
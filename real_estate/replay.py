@@ -0,0 +1,229 @@
+"""
+Non-interactive replay and benchmark harness for the WhatsApp bot.
+
+Drives scripted conversations from a JSONL file through the same code the CLI
+simulators use, with the typing delay off, a stub property agent and scratch
+database files, then reports per-turn latency and throughput.
+
+Each JSONL line is one conversation:
+    {"id": "free-text", "user_id": "+919000000001",
+     "turns": ["hi", {"user": "3BHK under 80 lakh in Pune", "expect": "Searching"}]}
+
+"expect" is a case-insensitive substring that must appear in the bot's replies
+for that turn. Any failed expectation makes the run exit with status 1.
+
+Usage:
+    python replay.py replays/smoke.jsonl
+    python replay.py replays/smoke.jsonl --target simulator --repeat 20
+    python replay.py replays/smoke.jsonl --agent mypkg.agents:FakeAgent
+"""
+import os
+import io
+import sys
+import json
+import math
+import time
+import argparse
+import importlib
+import tempfile
+import contextlib
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from whatsapp_agent import RealEstateWhatsAppBot, LeadDatabase, simulate_turn
+from bot import WhatsAppSimulator
+from intent_parser import IntentParser, LLMSlotFiller
+from saved_searches import SavedSearchStore
+
+# --- Stubs ---
+class StubPropertyAgent:
+    """Deterministic stand-in for PropertyFindingAgent (no Firecrawl/OpenAI calls)"""
+
+    def __init__(self, search_latency: float = 0.0):
+        self.search_latency = search_latency
+
+    def fetch_listings(self, city: str, max_price: float, property_category: str = "Residential",
+                       property_type: str = "Flat") -> List[Dict]:
+        if self.search_latency:
+            time.sleep(self.search_latency)
+        return [
+            {
+                "Building_name": f"Stub {property_type} {i + 1}",
+                "Property_type": property_type,
+                "location_address": f"Sector {i + 1}, {city}",
+                "Price": f"{round(float(max_price) * (0.6 + 0.1 * i), 2)} Cr",
+                "Description": "Scripted listing for replay runs",
+            }
+            for i in range(3)
+        ]
+
+    def analyze_properties(self, properties: List[Dict], max_price: float, property_category: str = "Residential",
+                           property_type: str = "Flat") -> str:
+        lines = [f"• {p['Building_name']} - {p['Price']} ({p['location_address']})" for p in properties]
+        return "🏠 SELECTED PROPERTIES\n" + "\n".join(lines)
+
+    def find_properties(self, city: str, max_price: float, property_category: str = "Residential",
+                        property_type: str = "Flat") -> str:
+        properties = self.fetch_listings(city, max_price, property_category, property_type)
+        return self.analyze_properties(properties, max_price, property_category, property_type)
+
+    def get_location_trends(self, city: str) -> str:
+        return f"📊 No trend data in replay mode for {city}"
+
+class OfflineSlotFiller(LLMSlotFiller):
+    """Slot filler that never calls the LLM, so replays are deterministic and free"""
+
+    def _call_llm(self, message: str) -> Dict:
+        return {}
+
+def load_agent(spec: str, search_latency: float):
+    if spec == "stub":
+        return StubPropertyAgent(search_latency=search_latency)
+    if spec == "real":
+        return None  # let the bot/simulator build PropertyFindingAgent from .env
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+def load_conversations(path: str) -> List[Dict]:
+    conversations = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            conversation = json.loads(line)
+            conversation.setdefault("id", f"conversation-{line_number}")
+            conversation.setdefault("user_id", f"+91900000{line_number:04d}")
+            conversation["turns"] = [
+                turn if isinstance(turn, dict) else {"user": turn}
+                for turn in conversation.get("turns", conversation.get("messages", []))
+            ]
+            conversations.append(conversation)
+    return conversations
+
+# --- Runners ---
+def _check(turn: Dict, replies: List[str]) -> Optional[str]:
+    expected = turn.get("expect")
+    if expected and expected.lower() not in "\n".join(replies).lower():
+        return f"expected {expected!r} in reply to {turn['user']!r}, got {replies[-1][:80]!r}"
+    return None
+
+def replay_webhook(conversation: Dict, bot: RealEstateWhatsAppBot, user_suffix: str = "") -> List[Dict]:
+    """Runs a conversation through RealEstateWhatsAppBot, the logic behind server.py"""
+    user_id = conversation["user_id"] + user_suffix
+    results = []
+    for turn in conversation["turns"]:
+        start = time.perf_counter()
+        replies = simulate_turn(bot, user_id, turn["user"])
+        results.append({"latency": time.perf_counter() - start, "error": _check(turn, replies)})
+    return results
+
+def replay_simulator(conversation: Dict, agent, saved_searches: SavedSearchStore) -> List[Dict]:
+    """Runs a conversation through bot.py's WhatsAppSimulator with scripted input"""
+    turns = conversation["turns"]
+    replies: List[str] = []
+    timings: List[float] = []
+    results_replies: List[List[str]] = []
+    position = {"next": 0, "started": None}
+
+    def scripted_input(prompt: str = "") -> str:
+        # The time since the previous answer was handed over is that turn's processing time
+        if position["started"] is not None:
+            timings.append(time.perf_counter() - position["started"])
+            results_replies.append(list(replies))
+        replies.clear()
+        index = position["next"]
+        position["next"] += 1
+        position["started"] = time.perf_counter()
+        return turns[index]["user"] if index < len(turns) else ""
+
+    simulator = WhatsAppSimulator(agent=agent, typing_delay=0, input_fn=scripted_input, saved_searches=saved_searches)
+    simulator.send_message = replies.append
+    simulator.start_conversation()
+    if position["started"] is not None:
+        timings.append(time.perf_counter() - position["started"])
+        results_replies.append(list(replies))
+
+    return [
+        {"latency": latency, "error": _check(turn, turn_replies)}
+        for turn, latency, turn_replies in zip(turns, timings, results_replies)
+    ]
+
+# --- Reporting ---
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def print_report(target: str, conversation_count: int, results: List[Dict], wall_time: float, verbose: bool):
+    latencies = [r["latency"] * 1000 for r in results]
+    failures = [r for r in results if r["error"]]
+
+    print("\n" + "=" * 50)
+    print(f"📊 REPLAY REPORT ({target})")
+    print("=" * 50)
+    print(f"Conversations: {conversation_count} | Turns: {len(results)} | Failures: {len(failures)}")
+    if latencies:
+        print(
+            f"Turn latency (ms): mean {sum(latencies) / len(latencies):.2f} | p50 {percentile(latencies, 50):.2f} | "
+            f"p95 {percentile(latencies, 95):.2f} | max {max(latencies):.2f}"
+        )
+    print(f"Wall time: {wall_time:.3f} s | Throughput: {len(results) / wall_time if wall_time else 0:.1f} turns/s")
+
+    for failure in failures[: None if verbose else 10]:
+        print(f"❌ {failure['conversation']}: {failure['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scripted WhatsApp conversations and benchmark the bot")
+    parser.add_argument("script", help="JSONL file with one conversation per line")
+    parser.add_argument("--target", choices=["webhook", "simulator"], default="webhook",
+                        help="webhook = RealEstateWhatsAppBot (server/whatsapp_agent), simulator = bot.py")
+    parser.add_argument("--agent", default="stub", help="'stub', 'real' or module:Class for a custom property agent")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Seconds the stub agent sleeps per search")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the whole script this many times")
+    parser.add_argument("--llm", action="store_true", help="Allow the LLM slot filler (off by default for determinism)")
+    parser.add_argument("--db-dir", help="Keep the scratch lead/saved-search files here instead of a temp dir")
+    parser.add_argument("--verbose", action="store_true", help="Show bot output and every failure")
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.script)
+    agent = load_agent(args.agent, args.search_latency)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_dir = args.db_dir or tmp_dir
+        os.makedirs(db_dir, exist_ok=True)
+        saved_searches = SavedSearchStore(os.path.join(db_dir, "saved_searches.json"))
+        bot = None
+        if args.target == "webhook":
+            bot = RealEstateWhatsAppBot(
+                property_agent=agent,
+                db=LeadDatabase(os.path.join(db_dir, "real_estate_leads.json")),
+                intent_parser=IntentParser(None if args.llm else OfflineSlotFiller()),
+                saved_searches=saved_searches,
+            )
+
+        results: List[Dict] = []
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        start = time.perf_counter()
+        with output:
+            for iteration in range(args.repeat):
+                for conversation in conversations:
+                    if args.target == "webhook":
+                        # A distinct user per iteration so state never leaks between repeats
+                        turns = replay_webhook(conversation, bot, user_suffix=f"-{iteration}" if args.repeat > 1 else "")
+                    else:
+                        turns = replay_simulator(conversation, agent, saved_searches)
+                    for turn in turns:
+                        turn["conversation"] = conversation["id"]
+                    results.extend(turns)
+        wall_time = time.perf_counter() - start
+
+    print_report(args.target, len(conversations) * args.repeat, results, wall_time, args.verbose)
+    sys.exit(1 if any(r["error"] for r in results) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# --- Configuration ---
+SAVED_SEARCHES_FILE = os.getenv("SAVED_SEARCHES_FILE", "saved_searches.json")
+# Listings far below the budget are rarely "better matches"; only alert from this fraction up
+ALERT_MIN_BUDGET_RATIO = float(os.getenv("ALERT_MIN_BUDGET_RATIO", "0.5"))
+MAX_LISTINGS_PER_ALERT = 3
+
+# --- Price Parsing ---
+_PRICE_RE = re.compile(
+    r"(?P<amount>\d+(?:,\d{2,3})*(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(?P<amount_high>\d+(?:,\d{2,3})*(?:\.\d+)?))?"
+    r"\s*(?P<unit>crores?|cr\.?|lakhs?|lacs?|l\b)?",
+    re.IGNORECASE,
+)
+
+def parse_price_to_crores(text, upper_bound: bool = False) -> Optional[float]:
+    """
+    Convert a listing price such as '₹1.25 Cr', '85 Lakh' or '9,50,00,000' into crores.
+    For ranges ('80-95 Lakh') the lower bound is used, or the upper one for budgets.
+    Bare numbers below 1000 are assumed to already be in crores (how users state budgets).
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+
+    # Prefer a number with a unit so '3 BHK, 1.1 Cr' reads as 1.1 rather than 3
+    matches = list(_PRICE_RE.finditer(str(text)))
+    if not matches:
+        return None
+    match = next((m for m in matches if m.group("unit")), matches[0])
+
+    amount_text = match.group("amount_high") if upper_bound and match.group("amount_high") else match.group("amount")
+    amount = float(amount_text.replace(",", ""))
+    unit = (match.group("unit") or "").lower().rstrip(".")
+
+    if unit.startswith("cr"):
+        return amount
+    if unit.startswith("la") or unit == "l":
+        return amount / 100
+    if amount >= 1000:
+        # Raw rupee amount
+        return amount / 10_000_000
+    return amount
+
+def normalize_city(city: str) -> str:
+    return re.sub(r"\s+", " ", (city or "").strip().lower())
+
+def listing_key(listing: Dict) -> str:
+    """Stable identifier for a crawled listing, used to avoid alerting twice"""
+    name = listing.get("Building_name") or listing.get("building_name") or ""
+    address = listing.get("location_address") or ""
+    price = listing.get("Price") or listing.get("price") or ""
+    raw = f"{name}|{address}|{price}".lower()
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+# --- Interval Index ---
+class _IntervalNode:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+class IntervalTree:
+    """
+    Static centered interval tree over closed intervals [low, high].
+    Stabbing queries return every interval containing a point in O(log n + k).
+    Writes only mark the tree dirty; it is rebuilt on the next query.
+    """
+
+    def __init__(self):
+        self._intervals: Dict[str, Tuple[float, float]] = {}
+        self._root = None
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def add(self, key: str, low: float, high: float):
+        self._intervals[key] = (low, high)
+        self._dirty = True
+
+    def remove(self, key: str):
+        if self._intervals.pop(key, None) is not None:
+            self._dirty = True
+
+    def stab(self, point: float) -> List[str]:
+        if self._dirty:
+            items = [(low, high, key) for key, (low, high) in self._intervals.items()]
+            self._root = self._build(items)
+            self._dirty = False
+
+        hits = []
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                for low, high, key in node.by_start:
+                    if low > point:
+                        break
+                    hits.append(key)
+                node = node.left
+            elif point > node.center:
+                for low, high, key in node.by_end:
+                    if high < point:
+                        break
+                    hits.append(key)
+                node = node.right
+            else:
+                hits.extend(key for _, _, key in node.by_start)
+                break
+        return hits
+
+    def _build(self, items):
+        if not items:
+            return None
+        endpoints = sorted(p for low, high, _ in items for p in (low, high))
+        center = endpoints[len(endpoints) // 2]
+
+        left, right, here = [], [], []
+        for item in items:
+            if item[1] < center:
+                left.append(item)
+            elif item[0] > center:
+                right.append(item)
+            else:
+                here.append(item)
+
+        return _IntervalNode(
+            center,
+            sorted(here, key=lambda item: item[0]),
+            sorted(here, key=lambda item: item[1], reverse=True),
+            self._build(left),
+            self._build(right),
+        )
+
+# --- Saved Search Store ---
+class SavedSearchStore:
+    """
+    JSON-backed saved searches (one per lead) with an in-memory index:
+    (city, property type) -> interval tree over the acceptable price band.
+    """
+
+    def __init__(self, db_file: str = SAVED_SEARCHES_FILE, min_budget_ratio: float = ALERT_MIN_BUDGET_RATIO):
+        self.db_file = db_file
+        self.min_budget_ratio = min_budget_ratio
+        self._lock = threading.Lock()
+        self._searches: Dict[str, Dict] = self._read_db()
+        self._index: Dict[Tuple[str, str], IntervalTree] = defaultdict(IntervalTree)
+        for user_id, search in self._searches.items():
+            if search.get("active", True):
+                self._index_search(user_id, search)
+
+    def _read_db(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.db_file):
+            return {}
+        try:
+            with open(self.db_file, "r") as f:
+                return json.load(f).get("searches", {})
+        except Exception:
+            return {}
+
+    def _write_db(self):
+        tmp_file = f"{self.db_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"searches": self._searches}, f, indent=2)
+        os.replace(tmp_file, self.db_file)
+
+    def _index_key(self, search: Dict) -> Tuple[str, str]:
+        return normalize_city(search["city"]), search.get("type", "Flat")
+
+    def _index_search(self, user_id: str, search: Dict):
+        budget = float(search["budget"])
+        self._index[self._index_key(search)].add(user_id, budget * self.min_budget_ratio, budget)
+
+    def _unindex_search(self, user_id: str, search: Dict):
+        tree = self._index.get(self._index_key(search))
+        if tree is not None:
+            tree.remove(user_id)
+
+    def save(self, user_id: str, preferences: Dict, seen_listings: Optional[List[str]] = None) -> Optional[Dict]:
+        """Store (or replace) a lead's search. Returns None if preferences are incomplete."""
+        budget = parse_price_to_crores(preferences.get("budget"))
+        city = preferences.get("city")
+        if not city or not budget:
+            return None
+
+        with self._lock:
+            previous = self._searches.get(user_id)
+            if previous:
+                self._unindex_search(user_id, previous)
+
+            search = {
+                "city": city,
+                "budget": budget,
+                "type": preferences.get("type", "Flat"),
+                "active": True,
+                "created_at": datetime.now().isoformat(),
+                "alerted": list(seen_listings or []),
+            }
+            self._searches[user_id] = search
+            self._index_search(user_id, search)
+            self._write_db()
+
+        print(f"🔔 [Alerts] Saved search for {user_id}: {city}, {search['type']}, ≤ {budget} Cr")
+        return search
+
+    def deactivate(self, user_id: str) -> bool:
+        with self._lock:
+            search = self._searches.get(user_id)
+            if not search or not search.get("active", True):
+                return False
+            search["active"] = False
+            self._unindex_search(user_id, search)
+            self._write_db()
+        return True
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        return self._searches.get(user_id)
+
+    def crawl_targets(self) -> List[Dict]:
+        """
+        One crawl per (city, type) bucket, using the highest budget in the bucket,
+        instead of re-running every lead's search.
+        """
+        targets = {}
+        for search in self._searches.values():
+            if not search.get("active", True):
+                continue
+            key = self._index_key(search)
+            target = targets.setdefault(key, {"city": search["city"], "type": key[1], "max_budget": 0.0})
+            target["max_budget"] = max(target["max_budget"], float(search["budget"]))
+        return list(targets.values())
+
+    def match_listing(self, listing: Dict, city: str, property_type: str) -> List[str]:
+        """Users whose saved search this listing satisfies and who haven't seen it yet"""
+        price = parse_price_to_crores(listing.get("Price") or listing.get("price"))
+        if price is None:
+            return []
+
+        tree = self._index.get((normalize_city(city), property_type))
+        if tree is None:
+            return []
+
+        key = listing_key(listing)
+        with self._lock:
+            return [
+                user_id for user_id in tree.stab(price)
+                if key not in self._searches[user_id]["alerted"]
+            ]
+
+    def mark_alerted(self, alerted: Dict[str, List[str]]):
+        """Record which listings were sent to which users"""
+        with self._lock:
+            for user_id, keys in alerted.items():
+                search = self._searches.get(user_id)
+                if search:
+                    search["alerted"].extend(keys)
+            self._write_db()
+
+# --- Alert Dispatch ---
+def format_alert(listings: List[Dict]) -> str:
+    lines = ["🔔 New listings matching your saved search!\n"]
+    for listing in listings[:MAX_LISTINGS_PER_ALERT]:
+        name = listing.get("Building_name") or listing.get("building_name") or "Property"
+        price = listing.get("Price") or listing.get("price") or "Price on request"
+        address = listing.get("location_address") or ""
+        lines.append(f"🏠 *{name}*\n💰 {price}\n📍 {address}\n")
+    if len(listings) > MAX_LISTINGS_PER_ALERT:
+        lines.append(f"...and {len(listings) - MAX_LISTINGS_PER_ALERT} more.")
+    lines.append("Reply 'start' to search again or 'stop alerts' to unsubscribe.")
+    return "\n".join(lines)
+
+def collect_alerts(store: SavedSearchStore, listings: List[Dict], city: str, property_type: str) -> Dict[str, List[Dict]]:
+    """Match a batch of freshly crawled listings against every saved search"""
+    matches: Dict[str, List[Dict]] = defaultdict(list)
+    for listing in listings:
+        for user_id in store.match_listing(listing, city, property_type):
+            matches[user_id].append(listing)
+    return matches
+
+def run_alert_sweep(store: SavedSearchStore, property_agent, send_batch) -> Dict[str, int]:
+    """
+    Crawl each (city, type) bucket once, match the new listings through the index
+    and send one batched WhatsApp message per user.
+    `send_batch` takes a list of (user_id, text) and returns {user_id: sent_ok}.
+    """
+    matches: Dict[str, List[Dict]] = defaultdict(list)
+    targets = store.crawl_targets()
+
+    for target in targets:
+        try:
+            listings = property_agent.fetch_listings(
+                city=target["city"],
+                max_price=target["max_budget"],
+                property_type=target["type"],
+            )
+        except Exception as e:
+            print(f"❌ [Alerts] Crawl failed for {target['city']} ({target['type']}): {e}")
+            continue
+
+        for user_id, user_listings in collect_alerts(store, listings, target["city"], target["type"]).items():
+            matches[user_id].extend(user_listings)
+
+    if not matches:
+        return {"crawls": len(targets), "alerts": 0}
+
+    results = send_batch([(user_id, format_alert(user_listings)) for user_id, user_listings in matches.items()])
+    store.mark_alerted({
+        user_id: [listing_key(listing) for listing in user_listings]
+        for user_id, user_listings in matches.items()
+        if results.get(user_id)
+    })
+
+    sent = sum(1 for ok in results.values() if ok)
+    print(f"🔔 [Alerts] Sweep done: {len(targets)} crawls, {sent}/{len(matches)} alerts sent")
+    return {"crawls": len(targets), "alerts": sent}
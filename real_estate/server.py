@@ -1,5 +1,7 @@
-from fastapi import FastAPI, Request, BackgroundTasks, HTTPException
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
 import uvicorn
 import os
 import sys
@@ -8,13 +10,24 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from whatsapp_agent import RealEstateWhatsAppBot
-from meta_utils import send_whatsapp_message, VERIFY_TOKEN
+from meta_utils import send_whatsapp_message, send_whatsapp_messages, VERIFY_TOKEN
+from job_queue import SearchJobQueue
+from saved_searches import run_alert_sweep
 
 app = FastAPI(title="Skylix Real Estate WhatsApp Bot")
 
 # Initialize Bot Logic
 bot = RealEstateWhatsAppBot()
 
+# Searches are persisted so a redeploy or crash does not lose them
+job_queue = SearchJobQueue()
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "2"))
+QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "5"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Saved-search alerts: re-crawl each (city, type) bucket on this interval; 0 disables
+ALERT_SWEEP_HOURS = float(os.getenv("ALERT_SWEEP_HOURS", "6"))
+_job_available: Optional[asyncio.Event] = None
+
 @app.get("/")
 def home():
     return {"status": "ok", "message": "Skylix WhatsApp Webhook is running 🚀"}
@@ -35,24 +48,112 @@ async def verify_webhook(request: Request):
     
     raise HTTPException(status_code=403, detail="Verification failed")
 
-async def process_search_task(user_id: str):
+async def process_search_task(job: dict):
     """
-    Background task to perform the search and send the result back.
+    Run one queued search and send the result back.
+    The lease is renewed while the search runs so other workers don't pick it up.
     """
-    print(f"⏳ Background Task: Searching for {user_id}...")
-    
-    # Run the heavy agent search
-    search_result_text = bot.perform_search(user_id)
-    
+    user_id = job["user_id"]
+    job_id = job["id"]
+
+    if job["status"] == "failed":
+        # The job kept dying mid-search; let the user out of the "searching" step
+        send_whatsapp_message(user_id, "⚠️ Sorry, we couldn't complete your property search. Type 'start' to try again.")
+        bot.session_state[user_id] = {"step": "home"}
+        print(f"❌ Search {job_id} for {user_id} gave up after {job['attempts']} attempts")
+        return
+
+    print(f"⏳ Background Task: Searching for {user_id} ({job_id}, attempt {job['attempts']})...")
+    bot.session_state[user_id] = {"step": "searching"}
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(job_queue.lease_seconds / 3)
+            await asyncio.to_thread(job_queue.extend_lease, job_id)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        # Run the heavy agent search off the event loop
+        preferences = (job.get("payload") or {}).get("preferences")
+        search_result_text = await asyncio.to_thread(bot.perform_search, user_id, preferences)
+    except Exception as e:
+        heartbeat_task.cancel()
+        print(f"❌ Search {job_id} failed: {e}")
+        if job_queue.fail(job_id, str(e)) == "failed":
+            send_whatsapp_message(user_id, "⚠️ Sorry, we couldn't complete your property search. Type 'start' to try again.")
+            bot.session_state[user_id] = {"step": "home"}
+        return
+    heartbeat_task.cancel()
+
     # Send the result back to the user
     send_whatsapp_message(user_id, search_result_text)
-    
+    job_queue.complete(job_id)
+
     # Reset state
     bot.session_state[user_id] = {"step": "home"}
     print(f"✅ Search completed and sent to {user_id}")
 
+async def search_worker(worker_number: int):
+    """Claims jobs from the persistent queue until the server shuts down"""
+    while True:
+        try:
+            job = await asyncio.to_thread(job_queue.claim)
+        except Exception as e:
+            print(f"❌ Worker {worker_number} could not claim a job: {e}")
+            job = None
+
+        if job is None:
+            _job_available.clear()
+            try:
+                await asyncio.wait_for(_job_available.wait(), timeout=QUEUE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        await process_search_task(job)
+
+async def alert_sweeper():
+    """Periodically matches newly crawled listings against all saved searches"""
+    while True:
+        await asyncio.sleep(ALERT_SWEEP_HOURS * 3600)
+        try:
+            await asyncio.to_thread(run_alert_sweep, bot.saved_searches, bot.property_agent, send_whatsapp_messages)
+        except Exception as e:
+            print(f"❌ Alert sweep failed: {e}")
+
+@app.on_event("startup")
+async def start_search_workers():
+    global _job_available
+    _job_available = asyncio.Event()
+
+    # Users whose search was interrupted by a restart are still waiting on it
+    for user_id in job_queue.unfinished_users():
+        bot.session_state[user_id] = {"step": "searching"}
+    print(f"🔁 Queue on startup: {job_queue.stats()}")
+
+    for worker_number in range(SEARCH_WORKERS):
+        asyncio.create_task(search_worker(worker_number))
+
+    if ALERT_SWEEP_HOURS > 0:
+        asyncio.create_task(alert_sweeper())
+
+@app.get("/admin/jobs")
+def admin_jobs(status: Optional[str] = None, limit: int = 50, token: Optional[str] = None):
+    """
+    Small admin view of the search queue.
+    Set ADMIN_TOKEN to require ?token=... on this endpoint.
+    """
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    return {
+        "worker_id": job_queue.worker_id,
+        "counts": job_queue.stats(),
+        "jobs": job_queue.list_jobs(status=status, limit=limit),
+    }
+
 @app.post("/webhook")
-async def receive_message(request: Request, background_tasks: BackgroundTasks):
+async def receive_message(request: Request):
     """
     Handle incoming WhatsApp messages.
     """
@@ -82,9 +183,12 @@ async def receive_message(request: Request, background_tasks: BackgroundTasks):
             # 2. Send Immediate Reply
             send_whatsapp_message(from_number, reply_text)
             
-            # 3. Trigger Search if needed
+            # 3. Queue Search if needed
             if trigger_search:
-                background_tasks.add_task(process_search_task, from_number)
+                prefs = bot.db.get_user_context(from_number).get("preferences", {})
+                job_queue.enqueue(from_number, {"preferences": prefs})
+                if _job_available is not None:
+                    _job_available.set()
                 
         return {"status": "received"}
         
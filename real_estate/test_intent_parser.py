@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from intent_parser import IntentParser, LLMSlotFiller, parse_menu_choice, parse_slots
+
+def test_free_text_fills_all_slots():
+    assert parse_slots("need a 3BHK under 80 lakh in Pune") == {"type": "Flat", "budget": 0.8, "city": "Pune"}
+    assert parse_slots("villa in bengaluru, budget is 2 cr") == {
+        "type": "Individual House", "city": "Bangalore", "budget": 2.0,
+    }
+
+def test_only_known_cities_are_recognised():
+    assert parse_slots("Can you help me in Finding a flat") == {"type": "Flat"}
+    assert parse_slots("I want to buy in March") == {}
+    assert parse_slots("up to 1.5 crore in Navi Mumbai") == {"budget": 1.5, "city": "Navi Mumbai"}
+
+def test_budget_ranges_keep_the_upper_bound_across_units():
+    assert parse_slots("50 lakh to 1 crore") == {"budget": 1.0}
+    assert parse_slots("80-95 lakh") == {"budget": 0.95}
+    assert parse_slots("Rs 90 lakh - 1.2 cr") == {"budget": 1.2}
+    assert parse_slots("budget is 2 to 3 cr") == {"budget": 3.0}
+
+def test_budget_needs_a_unit_or_budget_word():
+    assert parse_slots("under 2") == {"budget": 2.0}
+    assert parse_slots("I have 3 kids") == {}
+    assert parse_slots("2 bhk") == {"type": "Flat"}
+
+def test_menu_choice():
+    assert parse_menu_choice("1") == "find"
+    assert parse_menu_choice(" 3) ") == "company"
+    assert parse_menu_choice("I have 1 question") is None
+    assert parse_menu_choice("can I talk to an agent") == "contact"
+
+class CountingFiller(LLMSlotFiller):
+    def __init__(self):
+        super().__init__(api_key="test", cache_size=2)
+        self.calls = 0
+
+    def _call_llm(self, message):
+        self.calls += 1
+        return {"city": "Lucknow"} if "lucknow" in message.lower() else {}
+
+def test_llm_tier_only_when_rules_find_nothing():
+    filler = CountingFiller()
+    parser = IntentParser(filler)
+
+    assert parser.parse("3BHK in Pune") == {"slots": {"type": "Flat", "city": "Pune"}, "source": "rules"}
+    assert parser.parse("ok") == {"slots": {}, "source": "none"}
+    assert filler.calls == 0
+
+    assert parser.parse("somewhere around Lucknow please") == {"slots": {"city": "Lucknow"}, "source": "llm"}
+    assert parser.parse("Somewhere around  LUCKNOW please!") == {"slots": {"city": "Lucknow"}, "source": "llm"}
+    assert filler.calls == 1
+    assert (filler.hits, filler.misses) == (1, 1)
+
+def test_slot_cache_is_bounded():
+    filler = CountingFiller()
+    for message in ("first message here", "second message here", "third message here", "first message here"):
+        filler.fill(message)
+    assert filler.calls == 4
+    assert len(filler._cache) == 2
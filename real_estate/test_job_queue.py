@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from job_queue import SearchJobQueue
+
+def make_queue(tmp_path, **kwargs):
+    return SearchJobQueue(db_file=str(tmp_path / "jobs.db"), **kwargs)
+
+def test_claim_leases_oldest_pending_job(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.enqueue("user-1", {"preferences": {"city": "Pune"}})
+    queue.enqueue("user-2")
+
+    job = queue.claim()
+    assert job["id"] == first
+    assert job["status"] == "running"
+    assert job["attempts"] == 1
+    assert job["payload"] == {"preferences": {"city": "Pune"}}
+
+def test_enqueue_reuses_unfinished_job(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.enqueue("user-1") == queue.enqueue("user-1")
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.2)
+    job_id = queue.enqueue("user-1")
+    assert queue.claim()["id"] == job_id
+
+    # Still leased: another worker gets nothing
+    other = SearchJobQueue(db_file=queue.db_file, lease_seconds=0.2)
+    assert other.claim() is None
+
+    time.sleep(0.3)
+    reclaimed = other.claim()
+    assert reclaimed["id"] == job_id
+    assert reclaimed["attempts"] == 2
+    # The original worker lost the lease
+    assert not queue.extend_lease(job_id)
+    assert other.extend_lease(job_id)
+
+def test_lease_expiring_too_often_fails_the_job(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05, max_attempts=1)
+    job_id = queue.enqueue("user-1")
+    queue.claim()
+    time.sleep(0.1)
+
+    job = queue.claim()
+    assert job["id"] == job_id
+    assert job["status"] == "failed"
+    assert queue.stats()["failed"] == 1
+
+def test_failed_job_waits_for_exponential_backoff(tmp_path):
+    queue = make_queue(tmp_path, retry_backoff_seconds=0.2, max_attempts=3)
+    job_id = queue.enqueue("user-1")
+
+    queue.claim()
+    assert queue.fail(job_id, "boom") == "pending"
+    assert queue.claim() is None
+    assert queue.list_jobs()[0]["retry_in"] > 0
+    time.sleep(0.25)
+    assert queue.claim()["attempts"] == 2
+
+    # Second failure doubles the delay
+    assert queue.fail(job_id, "boom again") == "pending"
+    time.sleep(0.25)
+    assert queue.claim() is None
+    time.sleep(0.2)
+    assert queue.claim()["attempts"] == 3
+
+    assert queue.fail(job_id, "still broken") == "failed"
+    assert queue.claim() is None
+    assert queue.list_jobs(status="failed")[0]["last_error"] == "still broken"
+
+def test_complete_and_unfinished_users(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("user-1")
+    queue.enqueue("user-2")
+    queue.claim()
+    queue.complete(job_id)
+
+    assert queue.unfinished_users() == ["user-2"]
+    assert queue.stats() == {"pending": 1, "running": 0, "done": 1, "failed": 0}
+
+def test_old_schema_gets_available_at_column(tmp_path):
+    import sqlite3
+    db_file = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE search_jobs (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, payload TEXT NOT NULL DEFAULT '{}', "
+        "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, lease_owner TEXT, "
+        "lease_until REAL, last_error TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO search_jobs (id, user_id, created_at, updated_at) VALUES ('JOB-1', 'user-1', 'a', 'a')")
+    conn.commit()
+    conn.close()
+
+    assert SearchJobQueue(db_file=db_file).claim()["id"] == "JOB-1"
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from saved_searches import IntervalTree, SavedSearchStore, listing_key, parse_price_to_crores, run_alert_sweep
+
+def test_parse_price_units():
+    assert parse_price_to_crores("₹1.25 Cr") == 1.25
+    assert parse_price_to_crores("85 Lakh") == 0.85
+    assert parse_price_to_crores("9,50,00,000") == 9.5
+    assert parse_price_to_crores("3 BHK, 1.1 Cr") == 1.1
+    assert parse_price_to_crores("2") == 2.0
+    assert parse_price_to_crores("80-95 Lakh") == 0.8
+    assert parse_price_to_crores("80-95 Lakh", upper_bound=True) == 0.95
+    assert parse_price_to_crores("price on request") is None
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    tree = IntervalTree()
+    intervals = {}
+    for i in range(300):
+        low = rng.uniform(0, 10)
+        intervals[f"k{i}"] = (low, low + rng.uniform(0, 3))
+        tree.add(f"k{i}", *intervals[f"k{i}"])
+    for key in list(intervals)[::5]:
+        tree.remove(key)
+        del intervals[key]
+
+    assert len(tree) == len(intervals)
+    for point in [rng.uniform(-1, 14) for _ in range(200)] + [low for low, _ in intervals.values()]:
+        expected = {key for key, (low, high) in intervals.items() if low <= point <= high}
+        assert set(tree.stab(point)) == expected
+
+def test_interval_tree_endpoints_are_closed():
+    tree = IntervalTree()
+    tree.add("a", 1.0, 2.0)
+    assert tree.stab(1.0) == ["a"]
+    assert tree.stab(2.0) == ["a"]
+    assert tree.stab(2.01) == []
+
+def test_store_matches_listing_in_budget_band(tmp_path):
+    store = SavedSearchStore(db_file=str(tmp_path / "searches.json"), min_budget_ratio=0.5)
+    store.save("u1", {"city": "Pune", "budget": "1 Cr", "type": "Flat"})
+    store.save("u2", {"city": "pune ", "budget": "2 Cr", "type": "Flat"})
+    store.save("u3", {"city": "Pune", "budget": "2 Cr", "type": "Villa"})
+
+    listing = {"Building_name": "Green Acres", "Price": "90 Lakh"}
+    assert store.match_listing(listing, "Pune", "Flat") == ["u1"]
+    assert sorted(store.match_listing({"Price": "1 Cr"}, "PUNE", "Flat")) == ["u1", "u2"]
+    assert store.match_listing({"Price": "3 Cr"}, "Pune", "Flat") == []
+
+    # Reloaded from disk, the index is rebuilt
+    reloaded = SavedSearchStore(db_file=store.db_file, min_budget_ratio=0.5)
+    assert reloaded.match_listing(listing, "Pune", "Flat") == ["u1"]
+
+def test_store_skips_deactivated_and_alerted(tmp_path):
+    store = SavedSearchStore(db_file=str(tmp_path / "searches.json"))
+    store.save("u1", {"city": "Pune", "budget": "1"})
+    listing = {"Building_name": "A", "Price": "0.8 Cr"}
+
+    store.mark_alerted({"u1": [listing_key(listing)]})
+    assert store.match_listing(listing, "Pune", "Flat") == []
+
+    store.save("u2", {"city": "Pune", "budget": "1"})
+    assert store.deactivate("u2")
+    assert store.match_listing({"Price": "0.9 Cr"}, "Pune", "Flat") == ["u1"]
+    assert store.save("u3", {"city": "Pune"}) is None
+
+def test_alert_sweep_crawls_each_bucket_once(tmp_path):
+    store = SavedSearchStore(db_file=str(tmp_path / "searches.json"))
+    store.save("u1", {"city": "Pune", "budget": "1"})
+    store.save("u2", {"city": "Pune", "budget": "2"})
+
+    class Agent:
+        calls = []
+
+        def fetch_listings(self, city, max_price, property_type):
+            self.calls.append((city, max_price, property_type))
+            return [{"Building_name": "A", "Price": "1.5 Cr"}]
+
+    sent = []
+    def send_batch(messages):
+        sent.extend(messages)
+        return {user_id: True for user_id, _ in messages}
+
+    assert run_alert_sweep(store, Agent(), send_batch) == {"crawls": 1, "alerts": 1}
+    assert Agent.calls == [("Pune", 2.0, "Flat")]
+    assert [user_id for user_id, _ in sent] == ["u2"]
+    # Already alerted: a second sweep sends nothing
+    assert run_alert_sweep(store, Agent(), send_batch) == {"crawls": 1, "alerts": 0}
@@ -14,6 +14,9 @@ except ImportError:
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from agent import PropertyFindingAgent, PropertyData
 
+from saved_searches import SavedSearchStore, listing_key, parse_price_to_crores
+from intent_parser import IntentParser, parse_menu_choice, parse_slots
+
 # Load environment variables
 load_dotenv()
 
@@ -88,21 +91,31 @@ class LeadDatabase:
 
 # --- Main WhatsApp Bot Logic ---
 class RealEstateWhatsAppBot:
-    def __init__(self):
-        self.db = LeadDatabase()
+    def __init__(self, property_agent=None, db: Optional[LeadDatabase] = None,
+                 intent_parser: Optional[IntentParser] = None, saved_searches: Optional[SavedSearchStore] = None):
+        # Everything is injectable so the replay harness can run against stubs and scratch files
+        self.db = db or LeadDatabase()
         
-        # Initialize the property search agent
-        # We assume keys are in .env or we prompt for them
-        api_key = os.getenv("OPENAI_API_KEY")
-        firecrawl_key = os.getenv("FIRECRAWL_API_KEY")
+        if property_agent is None:
+            # Initialize the property search agent
+            # We assume keys are in .env or we prompt for them
+            api_key = os.getenv("OPENAI_API_KEY")
+            firecrawl_key = os.getenv("FIRECRAWL_API_KEY")
+            
+            if not api_key or not firecrawl_key:
+                print("⚠️ API Keys missing (OPENAI_API_KEY or FIRECRAWL_API_KEY). Search functionality might fail.")
+            
+            property_agent = PropertyFindingAgent(
+                firecrawl_api_key=firecrawl_key or "sk-dummy", # Fallback for init, will fail on call if invalid
+                openai_api_key=api_key or "sk-dummy"
+            )
+        self.property_agent = property_agent
         
-        if not api_key or not firecrawl_key:
-            print("⚠️ API Keys missing (OPENAI_API_KEY or FIRECRAWL_API_KEY). Search functionality might fail.")
+        # Rules first, LLM slot filling only when they find nothing
+        self.intent_parser = intent_parser or IntentParser()
         
-        self.property_agent = PropertyFindingAgent(
-            firecrawl_api_key=firecrawl_key or "sk-dummy", # Fallback for init, will fail on call if invalid
-            openai_api_key=api_key or "sk-dummy"
-        )
+        # Saved searches power the "we'll WhatsApp you if something comes up" alerts
+        self.saved_searches = saved_searches or SavedSearchStore()
         
         # Session state to track user flow (e.g., are we waiting for a budget?)
         # In a production app, this should be in Redis or DB
@@ -138,17 +151,29 @@ class RealEstateWhatsAppBot:
                 "What would you like to do? (Type 1, 2, or 3)"
             )
             
+        elif message_lower in ["stop alerts", "unsubscribe"]:
+            if self.saved_searches.deactivate(user_id):
+                response = "🔕 Done! I won't send you new listing alerts anymore. Type 'start' whenever you want to search again."
+            else:
+                response = "You don't have any active listing alerts. Type 'start' to search for properties."
+
         elif state["step"] == "home":
-            if "1" in message or "find" in message_lower:
-                self.session_state[user_id] = {"step": "collect_city"}
+            # Free text like "3BHK under 80 lakh in Pune" skips straight to the missing questions
+            choice = parse_menu_choice(message)
+            parsed = self.intent_parser.parse(message, use_llm=choice is None)
+            
+            if parsed["slots"]:
+                return self._continue_search_flow(user_id, parsed["slots"])
+            elif choice == "find":
+                self.session_state[user_id] = {"step": "collect_city", "slots": {}}
                 response = "Great! 🌍 Which city should we search in? (e.g., Bangalore, Mumbai)"
-            elif "2" in message or "contact" in message_lower:
+            elif choice == "contact":
                 response = (
                     f"Let's get you connected! 📞\n"
                     f"You can call us directly at {COMPANY_DETAILS['phone']}\n"
                     "Or typically our agents will call you back if you share your requirements."
                 )
-            elif "3" in message or "company" in message_lower:
+            elif choice == "company":
                 response = (
                     f"ℹ️ *About {COMPANY_DETAILS['name']}*\n"
                     f"📍 Address: {COMPANY_DETAILS['address']}\n"
@@ -157,76 +182,125 @@ class RealEstateWhatsAppBot:
                     "We specialize in: " + ", ".join(COMPANY_DETAILS['specialties'])
                 )
             else:
-                response = "I didn't quite catch that. Please type 1, 2, or 3. 🤔"
+                response = "I didn't quite catch that. Please type 1, 2, or 3, or just tell me what you're looking for (e.g. '2BHK in Pune under 80 lakh'). 🤔"
 
         # --- Property Search Flow ---
-        elif state["step"] == "collect_city":
-            self.db.update_lead(user_id, {"preferences": {"city": message}})
-            self.session_state[user_id] = {"step": "collect_budget"}
-            response = f"Got it, {message}. 💸 What is your maximum budget in Crores? (e.g., 2.5)"
-            
-        elif state["step"] == "collect_budget":
-            try:
-                # Simple extraction, in real world might use LLM to extract number
-                import re
-                budget_match = re.search(r"(\d+(\.\d+)?)", message)
-                if budget_match:
-                    budget = float(budget_match.group(1))
-                    self.db.update_lead(user_id, {"preferences": {"budget": budget}})
-                    self.session_state[user_id] = {"step": "collect_type"}
-                    response = "Noted. 🏡 Are you looking for a 'Flat' or 'Individual House'?"
+        # Every step merges whatever details the message carries, not only the one being asked for
+        elif state["step"] in ("collect_city", "collect_budget", "collect_type"):
+            slots = parse_slots(message)
+            if not slots:
+                # Nothing recognised: read the message as the bare answer to the question just asked
+                if state["step"] == "collect_city":
+                    slots["city"] = message.strip()
+                elif state["step"] == "collect_budget":
+                    budget = parse_price_to_crores(message, upper_bound=True)
+                    if budget:
+                        slots["budget"] = budget
                 else:
-                    response = "Could not verify the amount. Please just type the number (e.g. 5.0)"
-            except Exception:
-                response = "Please enter a valid number (e.g., 2.5)"
-
-        elif state["step"] == "collect_type":
-            prop_type = "Flat"
-            if "house" in message_lower or "villa" in message_lower:
-                prop_type = "Individual House"
+                    slots["type"] = "Flat"
+            if slots:
+                return self._continue_search_flow(user_id, slots)
+            response = "Could not verify the amount. Please just type the number (e.g. 5.0)"
             
-            self.db.update_lead(user_id, {"preferences": {"type": prop_type}})
+        elif state["step"] == "searching":
+            response = "⏳ I'm still searching for listings that match your criteria. I'll message you as soon as they're ready!"
+
+        else:
+            # Fallback Chat using LLM if needed (not implemented here to keep it deterministic)
+            response = "I can help you find properties! Type 'start' to begin."
+
+        # 4. Log Response
+        self.db.save_message(user_id, "bot", response)
+        return response, False
+
+    def _continue_search_flow(self, user_id: str, new_slots: Dict):
+        """
+        Merge newly understood details into this search and ask only for what's still missing.
+        Returns (response, trigger_search) like handle_incoming_message.
+        """
+        state = self.session_state.get(user_id, {})
+        slots = {**state.get("slots", {}), **new_slots}
+        self.db.update_lead(user_id, {"preferences": new_slots})
+        
+        if "city" not in slots:
+            self.session_state[user_id] = {"step": "collect_city", "slots": slots}
+            response = "Great! 🌍 Which city should we search in? (e.g., Bangalore, Mumbai)"
+        elif "budget" not in slots:
+            self.session_state[user_id] = {"step": "collect_budget", "slots": slots}
+            response = f"Got it, {slots['city']}. 💸 What is your maximum budget in Crores? (e.g., 2.5)"
+        elif "type" not in slots:
+            self.session_state[user_id] = {"step": "collect_type", "slots": slots}
+            response = "Noted. 🏡 Are you looking for a 'Flat' or 'Individual House'?"
+        else:
             self.session_state[user_id] = {"step": "searching"}  # prevent loops
             
             # --- TRIGGER AI AGENT ---
-            response = "Thank you! 🤖 I'm now searching the entire web for real-time listings matching your criteria. This takes about 15 seconds..."
+            response = (
+                f"Thank you! 🤖 Searching for a {slots['type']} in {slots['city']} under {slots['budget']:g} Cr. "
+                "I'm scanning the web for real-time listings matching your criteria. This takes about 15 seconds..."
+            )
             
             # We return this immediately to the user, but we'd typically trigger a background job.
             # For this synchronous CLI demo, we will just call it next.
             # In a real webhook, we would return 200 OK here and send a follow-up message via API.
             
             return response, True # Signal to run search
-            
-        else:
-            # Fallback Chat using LLM if needed (not implemented here to keep it deterministic)
-            response = "I can help you find properties! Type 'start' to begin."
-
-        # 4. Log Response
+        
         self.db.save_message(user_id, "bot", response)
         return response, False
 
-    def perform_search(self, user_id):
-        """Execute the heavy AI search task"""
-        user_data = self.db.get_user_context(user_id)
-        prefs = user_data.get("preferences", {})
+    def perform_search(self, user_id, preferences=None):
+        """
+        Execute the heavy AI search task.
+        `preferences` is the snapshot queued with the job (falls back to the stored lead).
+        Errors propagate so the job queue can retry transient failures.
+        """
+        prefs = preferences or self.db.get_user_context(user_id).get("preferences", {})
         
         print(f"🕵️ SERVER ENGINE: Starting search for {user_id} with {prefs}")
         
+        city = prefs.get("city", "Bangalore")
+        budget = prefs.get("budget", 2.0)
+        prop_type = prefs.get("type", "Flat")
+        
+        listings = self.property_agent.fetch_listings(city=city, max_price=budget, property_type=prop_type)
+        results = self.property_agent.analyze_properties(listings, max_price=budget, property_type=prop_type)
+        
+        # Save results to memory/DB if needed
+        self.db.save_message(user_id, "bot", f"[Search Results]: {results[:50]}...")
+        
+        # Keep watching for new listings; the ones just shown don't count as new
+        self.saved_searches.save(
+            user_id,
+            {"city": city, "budget": budget, "type": prop_type},
+            seen_listings=[listing_key(listing) for listing in listings]
+        )
+        return (
+            f"Here is what I found! 🎉\n\n{results}\n\n"
+            "Would you like to speak to a human agent now to book a visit?\n"
+            "🔔 I'll also WhatsApp you when new matching listings come up (reply 'stop alerts' to opt out)."
+        )
+
+# --- Simulation Interface (CLI) ---
+def simulate_turn(bot: RealEstateWhatsAppBot, user_id: str, msg: str) -> List[str]:
+    """
+    One user message through the bot, including the search follow-up the server
+    would send from its background worker. Returns the bot replies in order.
+    """
+    # 1. Get immediate response
+    reply, trigger_search = bot.handle_incoming_message(user_id, msg)
+    replies = [reply]
+    
+    # 2. If 'trigger_search' is True, simulate the async follow-up
+    if trigger_search:
         try:
-            results = self.property_agent.find_properties(
-                city=prefs.get("city", "Bangalore"),
-                max_price=prefs.get("budget", 2.0),
-                property_type=prefs.get("type", "Flat")
-            )
-            
-            # Save results to memory/DB if needed
-            self.db.save_message(user_id, "bot", f"[Search Results]: {results[:50]}...")
-            return f"Here is what I found! 🎉\n\n{results}\n\nWould you like to speak to a human agent now to book a visit?"
-            
+            replies.append(bot.perform_search(user_id))
         except Exception as e:
-            return f"⚠️ I encountered an error while searching real-time listings: {str(e)}"
+            replies.append(f"⚠️ I encountered an error while searching real-time listings: {str(e)}")
+        # Reset state after search
+        bot.session_state[user_id] = {"step": "home"}
+    return replies
 
-# --- Simulation Interface (CLI) ---
 def run_cli_simulation():
     bot = RealEstateWhatsAppBot()
     
@@ -244,17 +318,11 @@ def run_cli_simulation():
             if msg.lower() in ["exit", "quit"]:
                 break
             
-            # 1. Get immediate response
-            reply, trigger_search = bot.handle_incoming_message(user_id, msg)
+            reply, *follow_ups = simulate_turn(bot, user_id, msg)
             print(f"\n[Bot]: {reply}")
-            
-            # 2. If 'trigger_search' is True, simulate the async follow-up
-            if trigger_search:
+            for search_results in follow_ups:
                 print("\n... (Simulating background processing) ...")
-                search_results = bot.perform_search(user_id)
                 print(f"\n[Bot - Follow Up]: {search_results}")
-                # Reset state after search
-                bot.session_state[user_id] = {"step": "home"} 
                 
         except KeyboardInterrupt:
             break
@@ -1,15 +1,32 @@
 import os
-import json
-from datetime import datetime
-from typing import Optional
+import sys
+import math
+import time
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncContextManager, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from context_manager import ConversationContext, make_llm_summarizer
+from crm_store import CRMStore, get_crm_store
+from slot_extractor import extract_slots, has_required_slots
+
 load_dotenv()
 
+_crm: Optional[CRMStore] = None
+
+def get_crm() -> CRMStore:
+    """Shared CRM handle; migrates the legacy leads_db.json on first use"""
+    global _crm
+    if _crm is None:
+        _crm = get_crm_store()
+    return _crm
+
 # --- Data Models ---
 class LeadInfo(BaseModel):
     name: str = Field(..., description="Name of the lead")
@@ -22,41 +39,36 @@ class LeadInfo(BaseModel):
 # --- Tools ---
 def save_lead_to_crm(name: str, service_interest: str, budget: str = "Unknown", phone: str = "Unknown", timeline: str = "Unknown") -> str:
     """
-    Saves a qualified lead to the CRM database (simulated JSON file).
+    Saves a qualified lead to the CRM database.
     Call this tool ONLY when you have gathered at least the Name and Service Interest.
     """
-    lead_data = {
-        "id": f"LEAD-{int(datetime.now().timestamp())}",
+    lead_data = get_crm().add_lead({
         "name": name,
         "service_interest": service_interest,
         "budget": budget,
         "phone": phone,
         "timeline": timeline,
         "status": "QUALIFIED_HOT",
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    # Simulate DB write
-    file_path = "leads_db.json"
-    existing_leads = []
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                existing_leads = json.load(f)
-        except:
-            pass
-    
-    existing_leads.append(lead_data)
-    
-    with open(file_path, "w") as f:
-        json.dump(existing_leads, f, indent=2)
-        
+    })
+    if lead_data["sightings"] > 1:
+        return f"SUCCESS: Returning lead {name} merged into existing CRM record {lead_data['id']}. Schedule a follow-up call."
     return f"SUCCESS: Lead {name} saved to CRM with ID {lead_data['id']}. Schedule a follow-up call."
 
 # --- Agent Definition ---
-def create_receptionist_agent():
+RECEPTIONIST_MODEL = os.getenv("RECEPTIONIST_MODEL", "gpt-4o-mini")
+GREETING = "Hello! Thanks for calling Skylix Agency. I'm Sarah, an AI assistant. How can I help you today?"
+TTFT_TARGET_MS = float(os.getenv("RECEPTIONIST_TTFT_TARGET_MS", "800"))
+LLM_SUMMARY = os.getenv("RECEPTIONIST_LLM_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+def create_receptionist_agent(client=None, async_client=None):
+    """
+    Build one receptionist. Pass shared OpenAI/AsyncOpenAI clients to reuse their
+    connection pools across many concurrent conversations (see service.py).
+    The agent keeps no chat history of its own; ReceptionistSession sends it a
+    bounded context (summary + recent turns + known slots) every turn.
+    """
     return Agent(
-        model=OpenAIChat(id="gpt-4o-mini"),
+        model=OpenAIChat(id=RECEPTIONIST_MODEL, client=client, async_client=async_client),
         description="You are Sarah, a friendly and professional AI receptionist for 'Skylix Agency'.",
         instructions=[
             "Your goal is to qualify incoming leads for our AI & Marketing services.",
@@ -72,17 +84,160 @@ def create_receptionist_agent():
         markdown=True
     )
 
+def create_conversation_context(client=None) -> ConversationContext:
+    """Extractive summaries by default; RECEPTIONIST_LLM_SUMMARY=true folds old turns with the model"""
+    return ConversationContext(summarizer=make_llm_summarizer(client) if LLM_SUMMARY else None)
+
+# Streamed run events that carry a piece of the reply (agno 2.x, then older releases)
+_CONTENT_EVENTS = {"RunContent", "RunResponseContent", "RunResponse"}
+
+def _content_chunks(events: Iterable) -> Iterator[str]:
+    for event in events:
+        content = getattr(event, "content", None)
+        if getattr(event, "event", None) in _CONTENT_EVENTS and isinstance(content, str) and content:
+            yield content
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+class ReceptionistSession:
+    """
+    One caller's conversation. Each session owns its agent, so memory never leaks between callers.
+    A rule-based extractor runs before every LLM turn: it pre-fills the lead's slots,
+    tells the agent what is already known, and saves the lead directly once the
+    required slots are filled so that turn never reaches the LLM.
+    Replies can be streamed (stream/astream); every turn records time-to-first-token and total latency.
+    The prompt size stays flat on long calls: older turns are folded into a rolling summary.
+    """
+
+    def __init__(self, agent: Optional[Agent] = None, context: Optional[ConversationContext] = None):
+        self.agent = agent or create_receptionist_agent()
+        self.context = context or create_conversation_context()
+        self.slots = {}
+        self.lead_captured = False
+        self.turns = 0
+        self.llm_turns = 0
+        self.latencies: List[Dict] = []
+
+    @property
+    def lead_info(self) -> LeadInfo:
+        """Partially filled LeadInfo (unvalidated until the required fields are known)"""
+        return LeadInfo.model_construct(**self.slots)
+
+    def _prepare_turn(self, user_input: str) -> Optional[str]:
+        """Returns a reply if the turn can be finished without the LLM, else None"""
+        self.turns += 1
+        self.slots.update(extract_slots(user_input))
+        if self.lead_captured or not has_required_slots(self.slots):
+            return None
+
+        save_lead_to_crm(
+            name=self.slots["name"],
+            service_interest=self.slots["service_interest"],
+            budget=self.slots.get("budget", "Unknown"),
+            phone=self.slots["phone"],
+            timeline=self.slots.get("timeline", "Unknown"),
+        )
+        self.lead_captured = True
+        return (
+            f"Thank you, {self.slots['name']}! I've noted your interest in {self.slots['service_interest']}. "
+            f"A specialist will call you shortly at {self.slots['phone']}. Have a great day!"
+        )
+
+    def _agent_message(self, user_input: str) -> str:
+        self.llm_turns += 1
+        return self.context.build_prompt(user_input, self.slots)
+
+    def _after_turn(self, user_input: str, content) -> str:
+        content = str(content)
+        self.context.add_turn(user_input, content)
+        # Check if the tool was called (simulated by checking if conversation implies closure)
+        if "specialist will call you" in content.lower():
+            self.lead_captured = True
+        return content
+
+    def _record_latency(self, started: float, first_token: Optional[float], used_llm: bool):
+        finished = time.perf_counter()
+        self.latencies.append({
+            "ttft_ms": ((first_token or finished) - started) * 1000,
+            "total_ms": (finished - started) * 1000,
+            "llm": used_llm,
+        })
+
+    def stream(self, user_input: str) -> Iterator[str]:
+        """Yield the reply as it is generated; latency is recorded once the turn completes"""
+        started = time.perf_counter()
+        direct_reply = self._prepare_turn(user_input)
+        if direct_reply:
+            self.context.add_turn(user_input, direct_reply)
+            self._record_latency(started, None, used_llm=False)
+            yield direct_reply
+            return
+
+        chunks, first_token = [], None
+        for chunk in _content_chunks(self.agent.run(self._agent_message(user_input), stream=True)):
+            first_token = first_token or time.perf_counter()
+            chunks.append(chunk)
+            yield chunk
+        self._after_turn(user_input, "".join(chunks))
+        self._record_latency(started, first_token, used_llm=True)
+
+    async def astream(self, user_input: str, llm_slot: Optional[AsyncContextManager] = None) -> AsyncIterator[str]:
+        """`llm_slot` is entered only when the turn actually needs the model (e.g. a concurrency limit)"""
+        started = time.perf_counter()
+        direct_reply = self._prepare_turn(user_input)
+        if direct_reply:
+            self.context.add_turn(user_input, direct_reply)
+            self._record_latency(started, None, used_llm=False)
+            yield direct_reply
+            return
+
+        chunks, first_token = [], None
+        async with llm_slot or nullcontext():
+            # Context upkeep may call the summary model, so keep it off the event loop
+            message = await asyncio.to_thread(self._agent_message, user_input)
+            async for event in self.agent.arun(message, stream=True):
+                for chunk in _content_chunks((event,)):
+                    first_token = first_token or time.perf_counter()
+                    chunks.append(chunk)
+                    yield chunk
+        await asyncio.to_thread(self._after_turn, user_input, "".join(chunks))
+        self._record_latency(started, first_token, used_llm=True)
+
+    def respond(self, user_input: str) -> str:
+        return "".join(self.stream(user_input))
+
+    async def arespond(self, user_input: str, llm_slot: Optional[AsyncContextManager] = None) -> str:
+        return "".join([chunk async for chunk in self.astream(user_input, llm_slot)])
+
+    def latency_summary(self) -> Dict:
+        """Per-session latency stats for LLM turns, checked against RECEPTIONIST_TTFT_TARGET_MS"""
+        llm = [entry for entry in self.latencies if entry["llm"]]
+        ttft = sorted(entry["ttft_ms"] for entry in llm)
+        total = sorted(entry["total_ms"] for entry in llm)
+        return {
+            "model": RECEPTIONIST_MODEL,
+            "turns": len(self.latencies),
+            "llm_turns": len(llm),
+            "ttft_p50_ms": _percentile(ttft, 50),
+            "ttft_p95_ms": _percentile(ttft, 95),
+            "total_p50_ms": _percentile(total, 50),
+            "total_p95_ms": _percentile(total, 95),
+            "ttft_target_ms": TTFT_TARGET_MS,
+            "within_target": sum(1 for value in ttft if value <= TTFT_TARGET_MS),
+        }
+
 # --- Interactive CLI ---
 def run_receptionist():
-    agent = create_receptionist_agent()
+    session = ReceptionistSession()
     
     print("\n" + "="*50)
     print("📞 INBOUND CALL SIMULATOR - SKYLIX AGENCY")
     print("="*50)
-    print("Agent: Hello! Thanks for calling Skylix Agency. I'm Sarah, an AI assistant. How can I help you today?")
-    
-    # Initial history
-    history = []
+    print(f"Agent: {GREETING}")
     
     while True:
         try:
@@ -90,13 +245,20 @@ def run_receptionist():
             if user_input.lower() in ['quit', 'exit', 'bye']:
                 print("\nAgent: Goodbye! Have a great day.")
                 break
+            if not user_input:
+                continue
                 
-            response = agent.run(user_input)
-            print(f"\n🤖 Sarah: {response.content}")
+            print("\n🤖 Sarah: ", end="", flush=True)
+            for chunk in session.stream(user_input):
+                print(chunk, end="", flush=True)
+            latency = session.latencies[-1]
+            if latency["llm"]:
+                print(f"\n   ⏱️ first token {latency['ttft_ms']:.0f} ms · turn {latency['total_ms']:.0f} ms")
+            else:
+                print()
             
-            # Check if the tool was called (simulated by checking if conversation implies closure)
-            if "specialist will call you" in str(response.content).lower():
-                print("\n[System]: Call ended. Lead captured.")
+            if session.lead_captured:
+                print(f"\n[System]: Call ended. Lead captured ({session.llm_turns}/{session.turns} turns used the LLM).")
                 break
                 
         except KeyboardInterrupt:
@@ -105,5 +267,16 @@ def run_receptionist():
             print(f"Error: {e}")
             break
 
+    if session.context.token_log:
+        peak = max(entry["prompt_tokens"] for entry in session.context.token_log)
+        print(f"[System]: Peak prompt size {peak} tokens over {len(session.context.token_log)} LLM turns.")
+
+    summary = session.latency_summary()
+    if summary["llm_turns"]:
+        print(f"\n📊 Latency summary ({summary['model']}, {summary['llm_turns']} LLM turns of {summary['turns']}):")
+        print(f"   Time to first token: p50 {summary['ttft_p50_ms']:.0f} ms · p95 {summary['ttft_p95_ms']:.0f} ms")
+        print(f"   Full turn:           p50 {summary['total_p50_ms']:.0f} ms · p95 {summary['total_p95_ms']:.0f} ms")
+        print(f"   Within {summary['ttft_target_ms']:.0f} ms TTFT target: {summary['within_target']}/{summary['llm_turns']} turns")
+
 if __name__ == "__main__":
     run_receptionist()
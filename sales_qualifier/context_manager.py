@@ -0,0 +1,149 @@
+import os
+import re
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from slot_extractor import describe_slots
+
+# --- Configuration ---
+KEEP_TURNS = int(os.getenv("RECEPTIONIST_KEEP_TURNS", "6"))
+TURN_TOKEN_BUDGET = int(os.getenv("RECEPTIONIST_TURN_TOKEN_BUDGET", "1500"))
+SUMMARY_TOKEN_CAP = int(os.getenv("RECEPTIONIST_SUMMARY_TOKEN_CAP", "300"))
+SUMMARY_MODEL = os.getenv("RECEPTIONIST_SUMMARY_MODEL", "gpt-4o-mini")
+
+Turn = Tuple[str, str]  # (caller, assistant)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except Exception:
+    def count_tokens(text: str) -> int:
+        # ~4 characters per token for English text
+        return max(1, len(text) // 4) if text else 0
+
+def _clip(sentence: str, limit: int = 140) -> str:
+    return sentence if len(sentence) <= limit else sentence[: limit - 1] + "…"
+
+def _gist(text: str, prefer_question: bool = False) -> str:
+    sentences = [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+    if not sentences:
+        return ""
+    if prefer_question:
+        questions = [s for s in sentences if s.endswith("?")]
+        if questions:
+            return _clip(questions[-1])
+    return _clip(sentences[0])
+
+def extractive_summary(previous: str, turns: List[Turn]) -> str:
+    """Cheap default: one line per folded turn with what the caller said and what Sarah asked"""
+    lines = [previous] if previous else []
+    for caller, assistant in turns:
+        lines.append(f"- Caller: {_gist(caller)} / Sarah: {_gist(assistant, prefer_question=True)}")
+    return "\n".join(lines)
+
+def make_llm_summarizer(client=None, model: str = SUMMARY_MODEL) -> Callable[[str, List[Turn]], str]:
+    """Summarizer that asks a small model to fold old turns into the running summary"""
+    from openai import OpenAI
+    client = client or OpenAI()
+
+    def summarize(previous: str, turns: List[Turn]) -> str:
+        transcript = "\n".join(f"Caller: {caller}\nSarah: {assistant}" for caller, assistant in turns)
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                temperature=0,
+                max_tokens=SUMMARY_TOKEN_CAP,
+                messages=[
+                    {"role": "system", "content": (
+                        "Update the running summary of a sales qualification call. Keep facts the caller gave, "
+                        "open questions and their mood. Be terse; bullet points only."
+                    )},
+                    {"role": "user", "content": f"Current summary:\n{previous or '(empty)'}\n\nNew turns:\n{transcript}"},
+                ],
+            )
+            return completion.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"⚠️ [Context] LLM summary failed, using extractive summary: {e}")
+            return extractive_summary(previous, turns)
+
+    return summarize
+
+class ConversationContext:
+    """
+    Bounded conversation context for the receptionist.
+    The last `keep_turns` turns stay verbatim; older ones are folded into a rolling
+    summary. Together with the lead's known slots this is the only history the agent
+    sees, and each prompt is kept within `token_budget`.
+    """
+
+    def __init__(self, keep_turns: int = KEEP_TURNS, token_budget: int = TURN_TOKEN_BUDGET,
+                 summarizer: Optional[Callable[[str, List[Turn]], str]] = None):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summarizer = summarizer or extractive_summary
+        self.recent: deque = deque()
+        self.summary = ""
+        self.token_log: List[Dict] = []
+
+    def add_turn(self, caller: str, assistant: str):
+        self.recent.append((caller, assistant))
+        if len(self.recent) > self.keep_turns:
+            evicted = [self.recent.popleft() for _ in range(len(self.recent) - self.keep_turns)]
+            self._fold(evicted)
+
+    def _fold(self, turns: List[Turn]):
+        self.summary = self.summarizer(self.summary, turns)
+        self._trim_summary(SUMMARY_TOKEN_CAP)
+
+    def _trim_summary(self, max_tokens: int):
+        # Oldest summary lines go first; a single oversized line is dropped entirely
+        while self.summary and count_tokens(self.summary) > max_tokens:
+            self.summary = self.summary.split("\n", 1)[1] if "\n" in self.summary else ""
+
+    def _render(self, user_input: str, slots: Dict[str, str]) -> str:
+        sections = []
+        if self.summary:
+            sections.append(f"[Earlier in this call]\n{self.summary}")
+        if self.recent:
+            transcript = "\n".join(f"Caller: {caller}\nSarah: {assistant}" for caller, assistant in self.recent)
+            sections.append(f"[Recent turns]\n{transcript}")
+        if slots:
+            sections.append(describe_slots(slots))
+        if not sections:
+            return user_input
+        sections.append(f"[Caller now says]\n{user_input}")
+        return "\n\n".join(sections)
+
+    def build_prompt(self, user_input: str, slots: Dict[str, str]) -> str:
+        """Render the turn's prompt, folding verbatim turns into the summary until it fits the budget"""
+        prompt = self._render(user_input, slots)
+        while count_tokens(prompt) > self.token_budget and self.recent:
+            self._fold([self.recent.popleft()])
+            prompt = self._render(user_input, slots)
+
+        overflow = count_tokens(prompt) - self.token_budget
+        if overflow > 0 and self.summary:
+            self._trim_summary(max(0, count_tokens(self.summary) - overflow))
+            prompt = self._render(user_input, slots)
+            overflow = count_tokens(prompt) - self.token_budget
+        if overflow > 0:
+            # Only the caller's own message is left to shorten; keep its end
+            keep_chars = max(0, len(user_input) - overflow * 4)
+            prompt = self._render("…" + user_input[len(user_input) - keep_chars:], slots)
+
+        tokens = count_tokens(prompt)
+
+        self.token_log.append({
+            "turn": len(self.token_log) + 1,
+            "prompt_tokens": tokens,
+            "summary_tokens": count_tokens(self.summary),
+            "verbatim_turns": len(self.recent),
+        })
+        print(
+            f"🧮 [Context] turn {len(self.token_log)}: {tokens}/{self.token_budget} tokens "
+            f"(summary {count_tokens(self.summary)}, {len(self.recent)} verbatim turns)"
+        )
+        return prompt
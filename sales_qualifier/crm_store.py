@@ -0,0 +1,308 @@
+import os
+import json
+import uuid
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lead_dedup import dedupe_records, interest_tokens, merge_lead, normalize_phone, real_estate_leads
+
+# --- Configuration ---
+CRM_DB_FILE = os.getenv("CRM_DB_FILE", "leads_db.sqlite")
+LEGACY_JSON_FILE = "leads_db.json"
+
+LEAD_FIELDS = ("id", "name", "service_interest", "budget", "phone", "timeline", "status", "timestamp",
+               "phone_e164", "last_seen", "sightings")
+# Columns added after the first release; older databases get them via ALTER TABLE
+_ADDED_COLUMNS = {"phone_e164": "TEXT", "last_seen": "TEXT", "sightings": "INTEGER NOT NULL DEFAULT 1"}
+
+def new_lead_id() -> str:
+    """Collision-free ID that keeps the old LEAD-<unix time> prefix readable"""
+    return f"LEAD-{int(datetime.now().timestamp())}-{uuid.uuid4().hex[:8]}"
+
+class CRMStore:
+    """
+    SQLite-backed CRM for the receptionist.
+    Appends are a single INSERT, WAL mode lets several receptionist processes
+    write concurrently (SQLite serializes writers with its own file lock), and
+    phone and status are indexed for lookups, and each service interest gets a
+    row in lead_interests so merged leads ("AI, Marketing") match either one.
+    Phones are normalized to E.164 and uniquely indexed, so a returning caller is
+    merged into their existing lead instead of becoming a duplicate row.
+    """
+
+    def __init__(self, db_file: str = CRM_DB_FILE):
+        self.db_file = db_file
+        self.ensure_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ensure_db(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS leads (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    service_interest TEXT NOT NULL,
+                    budget TEXT,
+                    phone TEXT,
+                    timeline TEXT,
+                    status TEXT NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(leads)")}
+            for column, ddl in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE leads ADD COLUMN {column} {ddl}")
+
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads (phone)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_status ON leads (status)")
+            conn.execute("DROP INDEX IF EXISTS idx_leads_service")
+            has_interests = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lead_interests'"
+            ).fetchone()
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lead_interests (
+                    lead_id TEXT NOT NULL,
+                    interest TEXT NOT NULL COLLATE NOCASE,
+                    PRIMARY KEY (lead_id, interest)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_lead_interests_interest ON lead_interests (interest)")
+            if not has_interests:
+                for row in conn.execute("SELECT id, service_interest FROM leads").fetchall():
+                    self._set_interests(conn, row["id"], row["service_interest"])
+            has_phone_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_leads_phone_e164'"
+            ).fetchone()
+            if not has_phone_index:
+                # Databases from before phone normalization may hold duplicates; merge them first
+                self._dedupe(conn)
+                conn.execute(
+                    "CREATE UNIQUE INDEX idx_leads_phone_e164 ON leads (phone_e164) WHERE phone_e164 IS NOT NULL"
+                )
+            conn.execute("COMMIT")
+
+    def _new_record(self, lead: Dict) -> Dict:
+        record = {field: lead.get(field) for field in LEAD_FIELDS}
+        record["id"] = record["id"] or new_lead_id()
+        record["name"] = record["name"] or "Unknown"
+        record["service_interest"] = record["service_interest"] or "Unknown"
+        record["status"] = record["status"] or "QUALIFIED_HOT"
+        record["timestamp"] = record["timestamp"] or datetime.now().isoformat()
+        record["last_seen"] = record["last_seen"] or record["timestamp"]
+        record["sightings"] = record["sightings"] or 1
+        record["phone_e164"] = normalize_phone(record["phone"])
+        return record
+
+    def _set_interests(self, conn, lead_id: str, service_interest: Optional[str]):
+        conn.execute("DELETE FROM lead_interests WHERE lead_id = ?", (lead_id,))
+        conn.executemany(
+            "INSERT INTO lead_interests (lead_id, interest) VALUES (?, ?)",
+            [(lead_id, interest) for interest in interest_tokens(service_interest)],
+        )
+
+    def _insert(self, conn, record: Dict):
+        conn.execute(
+            f"INSERT INTO leads ({', '.join(LEAD_FIELDS)}) VALUES ({', '.join('?' for _ in LEAD_FIELDS)})",
+            [record[field] for field in LEAD_FIELDS],
+        )
+        self._set_interests(conn, record["id"], record["service_interest"])
+
+    def _update(self, conn, record: Dict):
+        fields = [field for field in LEAD_FIELDS if field != "id"]
+        conn.execute(
+            f"UPDATE leads SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+            [record.get(field) for field in fields] + [record["id"]],
+        )
+        self._set_interests(conn, record["id"], record.get("service_interest"))
+
+    def _upsert(self, conn, lead: Dict) -> Tuple[Dict, bool]:
+        record = self._new_record(lead)
+        if record["phone_e164"]:
+            row = conn.execute("SELECT * FROM leads WHERE phone_e164 = ?", (record["phone_e164"],)).fetchone()
+            if row:
+                merged = merge_lead(dict(row), record)
+                self._update(conn, merged)
+                return merged, True
+        if conn.execute("SELECT 1 FROM leads WHERE id = ?", (record["id"],)).fetchone():
+            record["id"] = new_lead_id()
+        self._insert(conn, record)
+        return record, False
+
+    def add_lead(self, lead: Dict) -> Dict:
+        """Add a lead, or merge it into the existing lead with the same phone number"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            record, merged = self._upsert(conn, lead)
+            conn.execute("COMMIT")
+        if merged:
+            print(f"🔁 [CRM] Returning lead {record['phone_e164']} merged into {record['id']} "
+                  f"({record['sightings']} sightings)")
+        return record
+
+    def add_leads(self, leads: Iterable[Dict]) -> Tuple[int, int]:
+        """Bulk add/merge in one transaction. Returns (inserted, merged)."""
+        inserted = merged = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for lead in leads:
+                _, was_merged = self._upsert(conn, lead)
+                merged += was_merged
+                inserted += not was_merged
+            conn.execute("COMMIT")
+        return inserted, merged
+
+    def _dedupe(self, conn) -> int:
+        rows = [dict(row) for row in conn.execute("SELECT * FROM leads ORDER BY timestamp, id")]
+        unique, duplicates = dedupe_records(rows)
+        kept_ids = {record["id"] for record in unique}
+        for record in unique:
+            self._update(conn, record)
+        for row in rows:
+            if row["id"] not in kept_ids:
+                conn.execute("DELETE FROM leads WHERE id = ?", (row["id"],))
+                conn.execute("DELETE FROM lead_interests WHERE lead_id = ?", (row["id"],))
+        if duplicates:
+            print(f"🧹 [CRM] Merged {duplicates} duplicate leads by phone number")
+        return duplicates
+
+    def dedupe(self) -> int:
+        """Re-run the linear phone-index merge over the whole table (e.g. after manual edits)"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            duplicates = self._dedupe(conn)
+            conn.execute("COMMIT")
+        return duplicates
+
+    def get(self, lead_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find(self, phone: Optional[str] = None, status: Optional[str] = None,
+             service_interest: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """
+        Indexed lookup; filters combine with AND, newest first.
+        `service_interest` matches any one of a lead's interests, case-insensitively.
+        """
+        clauses, params = [], []
+        if phone:
+            clauses.append("phone_e164 = ?")
+            params.append(normalize_phone(phone))
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if service_interest:
+            clauses.append("id IN (SELECT lead_id FROM lead_interests WHERE interest = ?)")
+            params.append(service_interest)
+
+        query = "SELECT * FROM leads"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def migrate_from_json(self, json_file: str = LEGACY_JSON_FILE, archive: bool = True) -> int:
+        """
+        Import leads from the old leads_db.json in one transaction.
+        Leads with a known phone are merged like any other sighting; legacy IDs
+        from int(timestamp) may collide, so duplicates get a fresh ID.
+        The JSON file is renamed to *.migrated so it is not imported twice.
+        If the import fails, rename it back and run again.
+        """
+        source_file = json_file
+        if archive:
+            # Claim the file with an atomic rename so concurrent receptionists import it only once
+            source_file = f"{json_file}.migrated"
+            try:
+                os.rename(json_file, source_file)
+            except FileNotFoundError:
+                return 0
+        elif not os.path.exists(json_file):
+            return 0
+
+        with open(source_file, "r") as f:
+            try:
+                legacy_leads = json.load(f)
+            except json.JSONDecodeError:
+                print(f"⚠️ Could not parse {json_file}; nothing migrated.")
+                return 0
+
+        legacy_leads.sort(key=lambda lead: lead.get("timestamp") or "")
+        inserted, merged = self.add_leads(legacy_leads)
+        print(f"📦 Migrated {inserted + merged} leads from {json_file} to {self.db_file} ({merged} merged as duplicates)")
+        return inserted + merged
+
+    def import_real_estate_leads(self, json_file: str) -> Tuple[int, int]:
+        """Merge the real estate WhatsApp bot's leads (real_estate_leads.json) into the CRM"""
+        if not os.path.exists(json_file):
+            return 0, 0
+        inserted, merged = self.add_leads(real_estate_leads(json_file))
+        print(f"🏠 Imported real estate leads from {json_file}: {inserted} new, {merged} merged")
+        return inserted, merged
+
+def get_crm_store(db_file: str = CRM_DB_FILE) -> CRMStore:
+    """Open the CRM, importing the legacy JSON file on first use"""
+    store = CRMStore(db_file)
+    store.migrate_from_json()
+    return store
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Skylix CRM store utilities")
+    parser.add_argument("--migrate", metavar="JSON_FILE", nargs="?", const=LEGACY_JSON_FILE,
+                        help="Import a legacy leads_db.json")
+    parser.add_argument("--import-real-estate", metavar="JSON_FILE",
+                        help="Merge leads from the real estate bot's real_estate_leads.json")
+    parser.add_argument("--dedupe", action="store_true", help="Merge duplicate leads already in the CRM")
+    parser.add_argument("--dedupe-file", nargs="+", metavar=("IN_FILE", "OUT_FILE"),
+                        help="Deduplicate a JSON list of leads without touching the CRM")
+    parser.add_argument("--phone")
+    parser.add_argument("--status")
+    parser.add_argument("--service")
+    args = parser.parse_args()
+
+    if args.dedupe_file:
+        from lead_dedup import dedupe_json_file
+        dedupe_json_file(*args.dedupe_file[:2])
+        raise SystemExit(0)
+
+    crm = CRMStore()
+    if args.migrate:
+        crm.migrate_from_json(args.migrate)
+    if args.import_real_estate:
+        crm.import_real_estate_leads(args.import_real_estate)
+    if args.dedupe:
+        print(f"Merged {crm.dedupe()} duplicates")
+    for found in crm.find(phone=args.phone, status=args.status, service_interest=args.service):
+        print(json.dumps(found))
+    print(f"Total leads: {crm.count()}")
@@ -0,0 +1,139 @@
+import os
+import re
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# --- Configuration ---
+DEFAULT_COUNTRY_CODE = os.getenv("CRM_DEFAULT_COUNTRY_CODE", "91")
+NATIONAL_NUMBER_LENGTH = int(os.getenv("CRM_NATIONAL_NUMBER_LENGTH", "10"))
+
+UNKNOWN_VALUES = {"", "unknown", "n/a", "na", "none", "-"}
+
+def is_known(value) -> bool:
+    return value is not None and str(value).strip().lower() not in UNKNOWN_VALUES
+
+def normalize_phone(raw, default_country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Normalize a phone number to E.164 (+<country><number>), or None if it is not one.
+    "+44 20 7946 0958", "0044...", "098765 43210", "9876543210" and WhatsApp IDs
+    like "16315551181" all map to a single canonical key.
+    """
+    if not is_known(raw):
+        return None
+    text = str(raw).strip()
+    digits = re.sub(r"\D", "", text)
+
+    if text.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif len(digits) == NATIONAL_NUMBER_LENGTH + 1 and digits.startswith("0"):
+        # Trunk prefix of a national number
+        digits = default_country_code + digits[1:]
+    elif len(digits) == NATIONAL_NUMBER_LENGTH:
+        digits = default_country_code + digits
+    # Anything longer already carries its country code (e.g. WhatsApp sender IDs)
+
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return "+" + digits
+
+def interest_tokens(*values) -> List[str]:
+    """Distinct interests across comma-separated values: ('AI, SEO', 'ai') -> ['AI', 'SEO']"""
+    tokens: List[str] = []
+    for value in values:
+        if not is_known(value):
+            continue
+        for item in str(value).split(","):
+            item = item.strip()
+            if is_known(item) and item.lower() not in (token.lower() for token in tokens):
+                tokens.append(item)
+    return tokens
+
+def _merge_interests(existing: Optional[str], incoming: Optional[str]) -> Optional[str]:
+    merged = interest_tokens(existing, incoming)
+    return ", ".join(merged) if merged else existing
+
+def merge_lead(existing: Dict, incoming: Dict) -> Dict:
+    """
+    Fold a new sighting of the same person into the existing record.
+    The first record keeps its id, status and first-seen timestamp; newer known
+    budget/timeline/phone values win, a known name is never replaced by a placeholder,
+    and service interests are combined.
+    """
+    merged = dict(existing)
+    if not is_known(merged.get("name")) and is_known(incoming.get("name")):
+        merged["name"] = incoming["name"]
+    for field in ("budget", "timeline", "phone"):
+        if is_known(incoming.get(field)):
+            merged[field] = incoming[field]
+    if not is_known(merged.get("status")) and is_known(incoming.get("status")):
+        merged["status"] = incoming["status"]
+    merged["service_interest"] = _merge_interests(merged.get("service_interest"), incoming.get("service_interest"))
+
+    seen = [value for value in (existing.get("last_seen"), existing.get("timestamp"),
+                                incoming.get("last_seen"), incoming.get("timestamp")) if value]
+    merged["last_seen"] = max(seen) if seen else datetime.now().isoformat()
+    merged["sightings"] = (existing.get("sightings") or 1) + (incoming.get("sightings") or 1)
+    return merged
+
+def dedupe_records(records: Iterable[Dict]) -> Tuple[List[Dict], int]:
+    """
+    Deduplicate leads in one linear pass with a phone -> lead hash index.
+    Records are merged in input order (oldest first gives the oldest id the win);
+    records without a usable phone are kept as they are.
+    Returns (unique records in first-seen order, number of duplicates merged).
+    """
+    index: Dict[str, Dict] = {}
+    unique: List[Dict] = []
+    duplicates = 0
+    for record in records:
+        phone_e164 = normalize_phone(record.get("phone"))
+        record = dict(record, phone_e164=phone_e164)
+        if phone_e164 is None:
+            unique.append(record)
+            continue
+        existing = index.get(phone_e164)
+        if existing is None:
+            index[phone_e164] = record
+            unique.append(record)
+            continue
+        # Merge in place so the record keeps its position in `unique`
+        existing.update(merge_lead(existing, record))
+        duplicates += 1
+    return unique, duplicates
+
+def dedupe_json_file(in_file: str, out_file: Optional[str] = None) -> Tuple[int, int]:
+    """Bulk mode for a JSON list of leads (e.g. a legacy leads_db.json). Returns (kept, merged)."""
+    with open(in_file, "r") as f:
+        records = json.load(f)
+    records.sort(key=lambda record: record.get("timestamp") or "")
+    unique, duplicates = dedupe_records(records)
+
+    out_file = out_file or in_file
+    tmp_file = f"{out_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(unique, f, indent=2)
+    os.replace(tmp_file, out_file)
+    print(f"🧹 Deduplicated {in_file}: kept {len(unique)}, merged {duplicates} duplicates -> {out_file}")
+    return len(unique), duplicates
+
+def real_estate_leads(json_file: str) -> List[Dict]:
+    """Convert the real estate bot's LeadDatabase (keyed by WhatsApp number) into CRM leads"""
+    with open(json_file, "r") as f:
+        data = json.load(f)
+    leads = []
+    for user_id, lead in data.get("leads", {}).items():
+        preferences = lead.get("preferences", {})
+        leads.append({
+            "name": lead.get("name") or "Unknown",
+            "service_interest": "Real Estate",
+            "budget": preferences.get("budget") or "Unknown",
+            "phone": lead.get("phone") or user_id,
+            "timeline": "Unknown",
+            "status": "WHATSAPP_INQUIRY",
+            "timestamp": lead.get("first_seen"),
+            "last_seen": lead.get("last_active"),
+        })
+    return leads
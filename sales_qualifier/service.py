@@ -0,0 +1,178 @@
+"""
+Multi-session receptionist service.
+
+Runs many qualification conversations concurrently in one process:
+- every session has its own ReceptionistSession (isolated memory),
+- all sessions share one pooled OpenAI/AsyncOpenAI client pair,
+- a semaphore caps how many LLM calls are in flight at once.
+
+Run:
+    uvicorn service:app --host 0.0.0.0 --port 8100
+
+HTTP:
+    POST   /sessions                      -> {"session_id", "reply"}
+    POST   /sessions/{session_id}/messages   {"text": "..."} -> {"reply", "lead_captured"}
+    DELETE /sessions/{session_id}
+WebSocket:
+    /ws  (one connection = one session; send text, receive JSON replies)
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from openai import AsyncOpenAI, OpenAI
+from pydantic import BaseModel
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from agent import GREETING, ReceptionistSession, create_conversation_context, create_receptionist_agent
+
+# --- Configuration ---
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "32"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+HTTP_POOL_SIZE = int(os.getenv("OPENAI_HTTP_POOL_SIZE", str(MAX_CONCURRENT_LLM_CALLS)))
+
+app = FastAPI(title="Skylix Receptionist Service")
+
+# Shared, pooled model clients: sessions differ only in conversation state
+_limits = httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+openai_client = OpenAI(http_client=httpx.Client(limits=_limits, timeout=60))
+async_openai_client = AsyncOpenAI(http_client=httpx.AsyncClient(limits=_limits, timeout=60))
+
+class _ServiceSession:
+    __slots__ = ("session", "lock", "last_active")
+
+    def __init__(self, session: ReceptionistSession):
+        self.session = session
+        self.lock = asyncio.Lock()  # one turn at a time per caller
+        self.last_active = time.monotonic()
+
+sessions: Dict[str, _ServiceSession] = {}
+_llm_slots: Optional[asyncio.Semaphore] = None
+_llm_in_flight = 0
+
+class MessageIn(BaseModel):
+    text: str
+
+def _new_session() -> str:
+    if len(sessions) >= MAX_SESSIONS:
+        raise HTTPException(status_code=503, detail="Too many active sessions, try again shortly")
+    session_id = uuid.uuid4().hex
+    agent = create_receptionist_agent(client=openai_client, async_client=async_openai_client)
+    context = create_conversation_context(client=openai_client)
+    sessions[session_id] = _ServiceSession(ReceptionistSession(agent, context))
+    return session_id
+
+@asynccontextmanager
+async def _llm_slot():
+    """Held only while a turn is talking to the model; slot-filled and canned turns skip it"""
+    global _llm_in_flight
+    async with _llm_slots:
+        _llm_in_flight += 1
+        try:
+            yield
+        finally:
+            _llm_in_flight -= 1
+
+async def _run_turn(session_id: str, text: str) -> Dict:
+    entry = sessions.get(session_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+
+    async with entry.lock:
+        entry.last_active = time.monotonic()
+        reply = await entry.session.arespond(text, llm_slot=_llm_slot())
+        entry.last_active = time.monotonic()
+
+    return {"reply": reply, "lead_captured": entry.session.lead_captured}
+
+async def _evict_idle_sessions():
+    while True:
+        await asyncio.sleep(60)
+        cutoff = time.monotonic() - SESSION_TTL_SECONDS
+        for session_id in [sid for sid, entry in sessions.items() if entry.last_active < cutoff]:
+            sessions.pop(session_id, None)
+
+@app.on_event("startup")
+async def startup():
+    global _llm_slots
+    _llm_slots = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+    asyncio.create_task(_evict_idle_sessions())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await async_openai_client.close()
+    openai_client.close()
+
+@app.get("/health")
+def health():
+    return {
+        "status": "ok",
+        "active_sessions": len(sessions),
+        "llm_calls_in_flight": _llm_in_flight,
+        "max_concurrent_llm_calls": MAX_CONCURRENT_LLM_CALLS,
+    }
+
+@app.post("/sessions")
+def create_session():
+    return {"session_id": _new_session(), "reply": GREETING}
+
+@app.post("/sessions/{session_id}/messages")
+async def post_message(session_id: str, message: MessageIn):
+    try:
+        return await _run_turn(session_id, message.text)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Session {session_id} error: {e}")
+        raise HTTPException(status_code=502, detail="The assistant could not respond, please retry")
+
+@app.delete("/sessions/{session_id}")
+def end_session(session_id: str):
+    entry = sessions.pop(session_id, None)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return {"session_id": session_id, "lead_captured": entry.session.lead_captured}
+
+@app.websocket("/ws")
+async def websocket_session(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        session_id = _new_session()
+    except HTTPException as e:
+        await websocket.send_json({"error": e.detail})
+        await websocket.close()
+        return
+
+    await websocket.send_json({"session_id": session_id, "reply": GREETING})
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                result = await _run_turn(session_id, text)
+            except Exception as e:
+                print(f"❌ Session {session_id} error: {e}")
+                await websocket.send_json({"error": "The assistant could not respond, please retry"})
+                continue
+            await websocket.send_json(result)
+            if result["lead_captured"]:
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sessions.pop(session_id, None)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass  # already closed by the client
+
+if __name__ == "__main__":
+    print("🚀 Starting Receptionist Service on Port 8100...")
+    uvicorn.run(app, host="0.0.0.0", port=8100)
@@ -0,0 +1,144 @@
+import re
+from typing import Dict, Optional, Tuple
+
+# Slots the receptionist needs before a lead can be saved without another LLM turn
+REQUIRED_SLOTS = ("name", "service_interest", "phone")
+SLOT_LABELS = {
+    "name": "Name",
+    "company": "Company",
+    "service_interest": "Service Interest",
+    "budget": "Budget",
+    "timeline": "Timeline",
+    "phone": "Phone Number",
+}
+
+SERVICE_KEYWORDS = {
+    "AI": ["ai", "artificial intelligence", "machine learning", "ml", "chatbot", "chat bot", "llm", "automation"],
+    "Marketing": ["marketing", "seo", "social media", "ads", "advertising", "branding", "lead generation", "content"],
+    "Web Development": ["website", "web app", "web development", "landing page", "e-commerce", "ecommerce"],
+    "Real Estate": ["real estate", "property", "properties"],
+}
+
+_NOT_NAMES = {"Interested", "Looking", "Calling", "Here", "Not", "Just", "Trying", "From", "With", "The", "Fine", "Good", "Ok"}
+
+_PHONE_RE = re.compile(r"(?<![\w$€£₹])(\+|00)?\d[\d\s().-]{6,}\d(?!\s*(?:k\b|usd|dollars|%))", re.IGNORECASE)
+# A digit run without +/00 only counts as a phone when the caller says it is one
+# ("my number is ...", "call me on ...") or sends nothing but the number
+_PHONE_CUE_RE = re.compile(r"\b(?:phone|number|mobile|cell|whats\s?app|call\s+me|reach\s+me|contact\s+me|text\s+me)\b",
+                           re.IGNORECASE)
+_NOT_PHONE_CUE_RE = re.compile(r"\b(?:order|invoice|account|ticket|ref(?:erence)?|id|pin|otp|zip)\b", re.IGNORECASE)
+_PHONE_CUE_WINDOW = 40
+_AMOUNT = r"(?:\$|usd\s*|us\$|€|£|₹|rs\.?\s*|inr\s*)\s*\d+(?:[.,]\d+)?\s*(?:k|m|mn|million|thousand|lakhs?|cr)?\b"
+_BARE_AMOUNT = r"\d+(?:[.,]\d+)?\s*(?:k|m|thousand|lakhs?)\b"
+_QUALIFIER = r"(?:under|below|less\ than|up\ to|upto|around|about|roughly|max(?:imum)?|over|above|at\ least|<|>|~)"
+_RANGE_END = rf"(?:\s*(?:-|–|to|and)\s*(?:{_AMOUNT}|{_BARE_AMOUNT}))?"
+# After the word "budget" a bare amount or range is enough ("my budget is 5k", "budget: 5,000", "budget 5000-10000")
+_PLAIN_NUMBER = r"(?:\d{1,3}(?:,\d{3})+|\d{1,7})(?:\.\d+)?\b"
+_BUDGET_AMOUNT = rf"(?:{_AMOUNT}|{_BARE_AMOUNT}|{_PLAIN_NUMBER})"
+_BUDGET_RE = re.compile(
+    rf"""
+    \bbudget(?:\s+(?:is|of|would\ be|will\ be)|\s*[:=])?\s*
+    (?P<budget>(?:{_QUALIFIER}\s*)?{_BUDGET_AMOUNT}(?:\s*(?:-|–|to|and)\s*{_BUDGET_AMOUNT})?)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+# Anywhere else the amount needs a currency sign, so phone digits never match
+_AMOUNT_RE = re.compile(
+    rf"(?P<budget>(?:{_QUALIFIER}\s*)?{_AMOUNT}{_RANGE_END})",
+    re.IGNORECASE | re.VERBOSE,
+)
+_TIMELINE_RE = re.compile(
+    r"""
+    \b(?:asap|as\ soon\ as\ possible|immediately|right\ away|urgent(?:ly)?)\b
+    | \b(?:this|next)\ (?:week|month|quarter|year)\b
+    | \b(?:in|within)\ (?:a|an|one|two|three|four|six|\d+)\s*(?:-\s*\d+\s*)?(?:days?|weeks?|months?|years?)\b
+    | \bby\ (?:the\ )?(?:end\ of\ )?(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?|the\ month|the\ year|q[1-4])\b
+    | \b(?:end\ of\ (?:the\ )?(?:month|quarter|year)|q[1-4](?:\ \d{4})?)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_NAME_RE = re.compile(
+    r"\b(?:i'm|i am|im|my name is|my name's|this is|name's)\s+(?P<name>(?-i:[A-Z][a-z]+(?:\s[A-Z][a-z]+)?))",
+    re.IGNORECASE,
+)
+_COMPANY_RE = re.compile(
+    r"\b(?:from|at|with|work for|working for|company is|company called)\s+(?P<company>(?-i:[A-Z][\w&.-]*(?:\s[A-Z][\w&.-]*){0,2}))",
+    re.IGNORECASE,
+)
+_SERVICE_RE = {
+    service: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+    for service, keywords in SERVICE_KEYWORDS.items()
+}
+
+def _has_phone_cue(text: str, match: re.Match) -> bool:
+    if match.group(0).strip() == text.strip(" .!"):
+        return True
+    before = text[max(0, match.start() - _PHONE_CUE_WINDOW):match.start()]
+    after = text[match.end():match.end() + _PHONE_CUE_WINDOW]
+    if _NOT_PHONE_CUE_RE.search(before[-20:]):
+        return False
+    return bool(_PHONE_CUE_RE.search(before) or _PHONE_CUE_RE.search(after))
+
+def _extract_phone(text: str, skip: Optional[Tuple[int, int]] = None) -> Optional[str]:
+    """First phone-like digit run outside `skip` (the budget's span) that has a +/00 prefix or a phone cue"""
+    for match in _PHONE_RE.finditer(text):
+        if skip and match.start() < skip[1] and match.end() > skip[0]:
+            continue
+        digits = re.sub(r"\D", "", match.group(0))
+        if not 8 <= len(digits) <= 15:
+            continue
+        if match.group(1) or _has_phone_cue(text, match):
+            prefix = "+" if match.group(1) else ""
+            return prefix + (digits[2:] if match.group(1) == "00" else digits)
+    return None
+
+def extract_slots(text: str) -> Dict[str, str]:
+    """
+    Deterministic pass over one utterance: phone numbers, currency amounts/ranges,
+    timelines, service keywords, and "I'm <Name> from <Company>" patterns.
+    Only slots that were actually found are returned.
+    """
+    slots: Dict[str, str] = {}
+
+    # Budgets need a currency sign or the word "budget", so phone digits never match
+    budget = _BUDGET_RE.search(text) or _AMOUNT_RE.search(text)
+    if budget:
+        slots["budget"] = re.sub(r"\s+", " ", budget.group("budget").strip())
+
+    # ...and a budget's digits are never read as a phone
+    phone = _extract_phone(text, skip=budget.span("budget") if budget else None)
+    if phone:
+        slots["phone"] = phone
+
+    timeline = _TIMELINE_RE.search(text)
+    if timeline:
+        slots["timeline"] = timeline.group(0)
+
+    name = _NAME_RE.search(text)
+    if name and name.group("name").split()[0] not in _NOT_NAMES:
+        slots["name"] = name.group("name")
+
+    company = _COMPANY_RE.search(text)
+    if company:
+        slots["company"] = company.group("company").rstrip(".,")
+
+    services = [service for service, pattern in _SERVICE_RE.items() if pattern.search(text)]
+    if services:
+        slots["service_interest"] = ", ".join(services)
+
+    return slots
+
+def missing_slots(slots: Dict[str, str]):
+    return [slot for slot in ("name", "service_interest", "budget", "timeline", "phone") if not slots.get(slot)]
+
+def has_required_slots(slots: Dict[str, str]) -> bool:
+    return all(slots.get(slot) for slot in REQUIRED_SLOTS)
+
+def describe_slots(slots: Dict[str, str]) -> str:
+    """Note appended to the caller's message so the agent skips questions already answered"""
+    known = "; ".join(f"{SLOT_LABELS[key]}: {value}" for key, value in slots.items() if value)
+    needed = ", ".join(SLOT_LABELS[key] for key in missing_slots(slots))
+    return (
+        f"[Receptionist notes - already known: {known or 'nothing yet'}. "
+        f"Still needed: {needed or 'nothing'}. Do not ask again for details that are already known.]"
+    )
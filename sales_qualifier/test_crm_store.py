@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import sqlite3
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from crm_store import CRMStore
+from lead_dedup import dedupe_records, merge_lead, normalize_phone
+
+def test_normalize_phone_variants_share_one_key():
+    variants = ["+91 98765 43210", "0091 98765 43210", "098765 43210", "9876543210", "919876543210"]
+    assert {normalize_phone(phone) for phone in variants} == {"+919876543210"}
+    assert normalize_phone("Unknown") is None
+    assert normalize_phone("12345") is None
+
+def test_merge_lead_keeps_first_identity_and_combines_interests():
+    existing = {"id": "LEAD-1", "name": "Asha", "service_interest": "AI", "budget": "Unknown",
+                "status": "QUALIFIED_HOT", "timestamp": "2024-01-01", "sightings": 1}
+    incoming = {"id": "LEAD-2", "name": "Unknown", "service_interest": "SEO, ai", "budget": "$5k",
+                "status": "WHATSAPP_INQUIRY", "timestamp": "2024-02-01"}
+    merged = merge_lead(existing, incoming)
+    assert merged["id"] == "LEAD-1"
+    assert merged["name"] == "Asha"
+    assert merged["status"] == "QUALIFIED_HOT"
+    assert merged["budget"] == "$5k"
+    assert merged["service_interest"] == "AI, SEO"
+    assert merged["last_seen"] == "2024-02-01"
+    assert merged["sightings"] == 2
+
+def test_dedupe_records_is_linear_merge_by_phone():
+    records = [
+        {"id": "1", "phone": "9876543210", "service_interest": "AI", "timestamp": "1"},
+        {"id": "2", "phone": None, "service_interest": "AI", "timestamp": "2"},
+        {"id": "3", "phone": "+91 98765 43210", "service_interest": "Marketing", "timestamp": "3"},
+    ]
+    unique, duplicates = dedupe_records(records)
+    assert duplicates == 1
+    assert [record["id"] for record in unique] == ["1", "2"]
+    assert unique[0]["service_interest"] == "AI, Marketing"
+
+def test_merged_lead_is_found_by_each_interest(tmp_path):
+    crm = CRMStore(str(tmp_path / "crm.sqlite"))
+    first = crm.add_lead({"name": "Asha", "service_interest": "AI", "phone": "9876543210"})
+    merged = crm.add_lead({"name": "Asha", "service_interest": "SEO", "phone": "+91 98765 43210"})
+
+    assert merged["id"] == first["id"]
+    assert merged["service_interest"] == "AI, SEO"
+    assert [lead["id"] for lead in crm.find(service_interest="ai")] == [first["id"]]
+    assert [lead["id"] for lead in crm.find(service_interest="SEO")] == [first["id"]]
+    # Whole interests only, not substrings
+    assert crm.find(service_interest="A") == []
+    assert crm.count() == 1
+
+def _old_schema_db(db_file):
+    """A CRM database as the first release created it: no phone_e164/last_seen/sightings, no child table"""
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE leads (id TEXT PRIMARY KEY, name TEXT NOT NULL, service_interest TEXT NOT NULL, "
+        "budget TEXT, phone TEXT, timeline TEXT, status TEXT NOT NULL, timestamp TEXT NOT NULL)"
+    )
+    conn.execute("CREATE INDEX idx_leads_service ON leads (service_interest COLLATE NOCASE)")
+    conn.executemany(
+        "INSERT INTO leads VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("LEAD-1", "Asha", "AI", "$5k", "9876543210", "ASAP", "QUALIFIED_HOT", "2024-01-01T10:00:00"),
+            ("LEAD-2", "Ravi", "Marketing", None, "+1 415 555 0100", None, "QUALIFIED_COLD", "2024-01-02T10:00:00"),
+            ("LEAD-3", "Asha K", "Web Development", None, "+91 98765 43210", None, "QUALIFIED_COLD", "2024-01-03T10:00:00"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+def test_old_schema_is_migrated_and_indexed(tmp_path):
+    db_file = str(tmp_path / "crm.sqlite")
+    _old_schema_db(db_file)
+    crm = CRMStore(db_file)
+
+    with sqlite3.connect(db_file) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(leads)")}
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM leads WHERE phone_e164 = '+919876543210'"
+        ))
+    assert {"phone_e164", "last_seen", "sightings"} <= columns
+    assert {"idx_leads_phone_e164", "idx_leads_status", "idx_lead_interests_interest"} <= indexes
+    assert "idx_leads_service" not in indexes
+    assert "idx_leads_phone_e164" in plan
+
+    # The two Asha rows share a phone and were merged into the oldest one
+    assert crm.count() == 2
+    asha = crm.find(phone="098765 43210")
+    assert [lead["id"] for lead in asha] == ["LEAD-1"]
+    assert asha[0]["service_interest"] == "AI, Web Development"
+    assert asha[0]["sightings"] == 2
+
+    assert [lead["id"] for lead in crm.find(phone="+14155550100")] == ["LEAD-2"]
+    assert [lead["id"] for lead in crm.find(status="QUALIFIED_COLD")] == ["LEAD-2"]
+    assert [lead["id"] for lead in crm.find(service_interest="web development")] == ["LEAD-1"]
+    assert [lead["id"] for lead in crm.find(service_interest="marketing", status="QUALIFIED_COLD")] == ["LEAD-2"]
+    assert crm.find(service_interest="marketing", status="QUALIFIED_HOT") == []
+
+    # Re-opening an already migrated database changes nothing
+    assert CRMStore(db_file).count() == 2
+
+def test_legacy_json_is_imported_once(tmp_path):
+    json_file = str(tmp_path / "leads_db.json")
+    with open(json_file, "w") as f:
+        json.dump([
+            {"id": 1700000000, "name": "Asha", "service_interest": "AI", "phone": "9876543210",
+             "status": "QUALIFIED_HOT", "timestamp": "2024-01-01T10:00:00"},
+            {"id": 1700000000, "name": "Ravi", "service_interest": "Marketing", "phone": "Unknown",
+             "status": "QUALIFIED_HOT", "timestamp": "2024-01-02T10:00:00"},
+        ], f)
+
+    crm = CRMStore(str(tmp_path / "crm.sqlite"))
+    assert crm.migrate_from_json(json_file) == 2
+    assert crm.migrate_from_json(json_file) == 0
+    assert os.path.exists(f"{json_file}.migrated")
+    assert crm.count() == 2
+    assert [lead["name"] for lead in crm.find(status="QUALIFIED_HOT")] == ["Ravi", "Asha"]
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from slot_extractor import describe_slots, extract_slots, has_required_slots, missing_slots
+
+def test_full_introduction():
+    slots = extract_slots("I'm Priya from Acme, my number is 98765 43210, budget $5k, need a chatbot ASAP")
+    assert slots == {
+        "name": "Priya", "company": "Acme", "phone": "9876543210", "budget": "$5k",
+        "timeline": "ASAP", "service_interest": "AI",
+    }
+    assert has_required_slots(slots)
+
+def test_budget_range_is_not_read_as_phone():
+    slots = extract_slots("my budget is 5000-10000")
+    assert slots == {"budget": "5000-10000"}
+
+def test_bare_digit_run_without_phone_cue_is_not_a_phone():
+    assert extract_slots("Order 12345678 was wrong") == {}
+    assert extract_slots("Order number 12345678 was wrong") == {}
+    # Name and service alone must not trigger the direct CRM save
+    assert not has_required_slots(extract_slots("I'm Raj, I need a website. Order 12345678 was wrong"))
+
+def test_phone_with_prefix_cue_or_on_its_own():
+    assert extract_slots("+44 20 7946 0958")["phone"] == "+442079460958"
+    assert extract_slots("0044 20 7946 0958")["phone"] == "+442079460958"
+    assert extract_slots("call me on 98765-43210")["phone"] == "9876543210"
+    assert extract_slots("98765 43210 is my whatsapp")["phone"] == "9876543210"
+    assert extract_slots("9876543210")["phone"] == "9876543210"
+
+def test_budget_phrasings():
+    assert extract_slots("my budget is 5k")["budget"] == "5k"
+    assert extract_slots("budget: $5,000")["budget"] == "$5,000"
+    assert extract_slots("budget: 5,000")["budget"] == "5,000"
+    assert extract_slots("budget 2-3 lakhs")["budget"] == "2-3 lakhs"
+    assert extract_slots("budget is 5000 to 10000 dollars")["budget"] == "5000 to 10000"
+    assert extract_slots("we'd spend $10k to $20k")["budget"] == "$10k to $20k"
+    assert extract_slots("around ₹2 lakhs")["budget"] == "around ₹2 lakhs"
+
+def test_its_is_not_a_name_introduction():
+    assert extract_slots("It's Monday and I need a website") == {"service_interest": "Web Development"}
+    assert extract_slots("this is Anna Lee")["name"] == "Anna Lee"
+    assert "name" not in extract_slots("I'm interested in SEO")
+
+def test_timeline_and_services():
+    assert extract_slots("within 2 weeks")["timeline"] == "within 2 weeks"
+    assert extract_slots("by end of March")["timeline"] == "by end of March"
+    assert extract_slots("AI chatbot plus social media ads")["service_interest"] == "AI, Marketing"
+
+def test_describe_slots_lists_known_and_missing():
+    note = describe_slots({"name": "Priya", "phone": "9876543210"})
+    assert "Name: Priya; Phone Number: 9876543210" in note
+    assert "Still needed: Service Interest, Budget, Timeline" in note
+    assert missing_slots({"name": "x", "service_interest": "AI", "budget": "1", "timeline": "t", "phone": "p"}) == []